@@ -0,0 +1,42 @@
+"Compares the concat and join accumulators, see `Tempered(accumulator=...)`"
+from tempered import Tempered
+from timing import bench
+from data import user
+import os
+from pathlib import Path
+
+
+def benchmark_accumulators(name: str, folder: str, context: dict):
+    print(name)
+    results = {}
+    for accumulator in ("concat", "join"):
+        tempered = Tempered(
+            template_folder=folder,
+            generate_types=False,
+            accumulator=accumulator,
+        )
+        render = lambda: tempered.render("page.html", **context)
+        results[accumulator] = bench(accumulator, render)
+
+    winner = max(results, key=results.__getitem__)
+    print(f" {winner} is {max(results.values()) / min(results.values()):.2f}x faster")
+
+
+def create_rows(count: int) -> list:
+    return [
+        {"id": i, "title": f"Video <{i}>", "views": i * 1000} for i in range(count)
+    ]
+
+
+os.chdir(Path(__file__).parent)
+benchmark_accumulators(
+    name="Full Page Application",
+    folder="./real_world/tempered",
+    context={"user": user},
+)
+for count in (10, 1_000, 10_000):
+    benchmark_accumulators(
+        name=f"Table with {count:,} rows",
+        folder="./large_table/tempered",
+        context={"rows": create_rows(count)},
+    )
@@ -0,0 +1,54 @@
+"Compares the escape backends on the kinds of values templates usually render"
+from tempered._internals.escape import BACKENDS, ESCAPERS
+from timing import time_per_call
+import random
+
+
+def replace_escape(value) -> str:
+    "The previous escaper, which always replaces every character"
+    if type(value) in (int, float):
+        return str(value)
+
+    return (
+        str(value)
+        .replace("&", "&amp;")
+        .replace(">", "&gt;")
+        .replace("<", "&lt;")
+        .replace("'", "&#39;")
+        .replace('"', "&#34;")
+    )
+
+
+def create_values() -> dict:
+    random.seed(0)
+    words = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do".split()
+    paragraph = lambda: " ".join(random.choice(words) for _ in range(200))
+    return {
+        "short ascii": ["Ben", "Home", "user_123", "Add to basket", "Settings"] * 20,
+        "long text": [paragraph() for _ in range(10)],
+        "heavy escape": ["<a href='/?a=1&b=2'>\"Quotes\"</a>" * 20 for _ in range(10)],
+    }
+
+
+def bench(name: str, func, values: list) -> float:
+    render = lambda: [func(value) for value in values]
+    duration = time_per_call(render, number=1000, repeat=5)
+    ns_per_value = duration / len(values) * 1e9
+    print(f" {name:>12}: {ns_per_value:>8,.0f}ns")
+    return ns_per_value
+
+
+for name, values in create_values().items():
+    print(name)
+    baseline = bench("replace", replace_escape, values)
+    for backend, escape in BACKENDS.items():
+        assert [escape(value) for value in values] == [
+            replace_escape(value) for value in values
+        ]
+        duration = bench(backend, escape, values)
+        print(f" {backend} is {baseline / duration:.2f}x faster")
+
+    # Text and attributes need fewer characters escaped
+    for context in ("text", "attribute"):
+        duration = bench(context, ESCAPERS[context], values)
+        print(f" {context} is {baseline / duration:.2f}x faster")
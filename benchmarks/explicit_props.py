@@ -0,0 +1,42 @@
+"Compares calling components with and without `Tempered(explicit_props=True)`"
+from tempered import Tempered
+from timing import bench
+import os
+from pathlib import Path
+
+
+def benchmark_explicit_props(name: str, folder: str, context: dict, **kwargs):
+    print(name)
+    results = {}
+    for explicit_props in (False, True):
+        tempered = Tempered(
+            template_folder=folder,
+            generate_types=False,
+            explicit_props=explicit_props,
+            **kwargs,
+        )
+        render = lambda: tempered.render("page.html", **context)
+        results[explicit_props] = bench(f"explicit_props={explicit_props}", render)
+
+    print(f" explicit_props is {results[True] / results[False]:.2f}x faster")
+
+
+def create_products(count: int) -> list:
+    return [
+        {"views": i * 1000, "price": i * 0.25, "stock": i % 3} for i in range(count)
+    ]
+
+
+# Pages are usually rendered with more than they need, such as the user and request
+EXTRA_CONTEXT = {f"extra_{i}": i for i in range(20)}
+
+os.chdir(Path(__file__).parent)
+for count in (10, 1_000, 10_000):
+    for context_size in (0, len(EXTRA_CONTEXT)):
+        extra_context = dict(list(EXTRA_CONTEXT.items())[:context_size])
+        benchmark_explicit_props(
+            name=f"Table with {count:,} rows, {context_size} extra context variables",
+            folder="./numeric_table/tempered",
+            context={"products": create_products(count), **extra_context},
+            inline_threshold=0,
+        )
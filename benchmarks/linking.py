@@ -0,0 +1,43 @@
+"Renders the pages of the building fixture, which import many components"
+from tempered import Tempered
+from timing import bench
+from data import Comment, user
+import os
+from pathlib import Path
+
+
+def create_tempered(**kwargs) -> Tempered:
+    tempered = Tempered(
+        template_folder="./building/tempered",
+        generate_types=False,
+        **kwargs,
+    )
+    tempered.add_global("account", None)
+    tempered.add_global("format_number", lambda number: f"{number:,}")
+    tempered.add_global("format_time_since", lambda time: time.strftime("%d %B"))
+    return tempered
+
+
+video = user.videos[0]
+video.comments = [
+    Comment(
+        id=i,
+        author=video.uploader,
+        created_at=video.created_at,
+        editted_at=None,
+        text=f"Comment {i}",
+    )
+    for i in range(20)
+]
+pages = {
+    "Video.html": {"video": video, "recommendations": user.videos},
+    "User.html": {"user": user, "isMyAccount": False},
+    "Index.html": {"videos": user.videos},
+}
+
+os.chdir(Path(__file__).parent)
+for inline_threshold in (0, 32):
+    print(f"inline_threshold={inline_threshold}")
+    tempered = create_tempered(inline_threshold=inline_threshold)
+    for name, context in pages.items():
+        bench(name, lambda: tempered.render(name, **context))
@@ -0,0 +1,38 @@
+"Compares rendering numbers with and without `Tempered(strict_types=True)`"
+from tempered import Tempered
+from timing import bench
+import os
+from pathlib import Path
+
+
+def benchmark_strict_types(name: str, folder: str, context: dict, **kwargs):
+    print(name)
+    results = {}
+    for strict_types in (False, True):
+        tempered = Tempered(
+            template_folder=folder,
+            generate_types=False,
+            strict_types=strict_types,
+            **kwargs,
+        )
+        render = lambda: tempered.render("page.html", **context)
+        results[strict_types] = bench(f"strict={strict_types}", render)
+
+    print(f" strict_types is {results[True] / results[False]:.2f}x faster")
+
+
+def create_products(count: int) -> list:
+    return [
+        {"views": i * 1000, "price": i * 0.25, "stock": i % 3} for i in range(count)
+    ]
+
+
+os.chdir(Path(__file__).parent)
+for count in (10, 1_000, 10_000):
+    for inline_threshold in (0, 32):
+        benchmark_strict_types(
+            name=f"Table with {count:,} rows, inline_threshold={inline_threshold}",
+            folder="./numeric_table/tempered",
+            context={"products": create_products(count)},
+            inline_threshold=inline_threshold,
+        )
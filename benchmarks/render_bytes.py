@@ -0,0 +1,40 @@
+"Compares `render_bytes` to encoding the output of `render`"
+from tempered import Tempered
+from timing import bench_time
+from data import user
+import os
+from pathlib import Path
+
+
+def benchmark_render_bytes(name: str, folder: str, context: dict):
+    print(name)
+    tempered = Tempered(template_folder=folder, generate_types=False)
+    encode = bench_time(
+        "render().encode()",
+        lambda: tempered.render("page.html", **context).encode(),
+    )
+    render_bytes = bench_time(
+        "render_bytes()",
+        lambda: tempered.render_bytes("page.html", **context),
+    )
+    print(f" render_bytes is {encode / render_bytes:.2f}x the speed")
+
+
+def create_rows(count: int) -> list:
+    return [
+        {"id": i, "title": f"Video <{i}>", "views": i * 1000} for i in range(count)
+    ]
+
+
+os.chdir(Path(__file__).parent)
+benchmark_render_bytes(
+    name="Full Page Application",
+    folder="./real_world/tempered",
+    context={"user": user},
+)
+for count in (10, 1_000, 10_000):
+    benchmark_render_bytes(
+        name=f"Table with {count:,} rows",
+        folder="./large_table/tempered",
+        context={"rows": create_rows(count)},
+    )
@@ -0,0 +1,36 @@
+"Compares the time to the first chunk and the total time of `render_stream` and `render`"
+from tempered import Tempered
+from timing import bench_time
+import os
+from pathlib import Path
+
+
+def create_products(count: int) -> list:
+    return [
+        {"views": i * 1000, "price": i * 0.25, "stock": i % 3} for i in range(count)
+    ]
+
+
+os.chdir(Path(__file__).parent)
+for chunk_size in (1024, 8192, 65536):
+    tempered = Tempered(
+        template_folder="./numeric_table/tempered",
+        generate_types=False,
+        inline_threshold=0,
+        streaming=True,
+        stream_chunk_size=chunk_size,
+    )
+    for count in (100, 10_000):
+        context = {"products": create_products(count)}
+        print(f"Table with {count:,} rows, {chunk_size:,} character chunks")
+        render = bench_time("render", lambda: tempered.render("page.html", **context))
+        first = bench_time(
+            "first chunk",
+            lambda: next(iter(tempered.render_stream("page.html", **context))),
+        )
+        stream = bench_time(
+            "whole stream",
+            lambda: list(tempered.render_stream("page.html", **context)),
+        )
+        print(f" first chunk is {render / first:.2f}x sooner than render")
+        print(f" whole stream is {render / stream:.2f}x the speed of render")
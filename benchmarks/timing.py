@@ -0,0 +1,35 @@
+"Timing helpers shared by the benchmarks"
+import time
+import timeit
+import typing as t
+
+
+def bench(name: str, func: t.Callable[[], t.Any], duration: float = 2) -> float:
+    "Call a function repeatedly for `duration` seconds, returning the calls per second"
+    end = time.time() + duration
+
+    renders = 0
+    while time.time() < end:
+        func()
+        renders += 1
+
+    per_second = renders / duration
+    ms_per_render = 1000 / per_second
+    print(f" {name:>20}: {int(per_second):>10,}/s | {ms_per_render:.3f}ms")
+    return per_second
+
+
+def time_per_call(
+    func: t.Callable[[], t.Any],
+    number: int = 20,
+    repeat: int = 3,
+) -> float:
+    "The fastest time in seconds a function took, out of a few repeats"
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number
+
+
+def bench_time(name: str, func: t.Callable[[], t.Any], number: int = 20) -> float:
+    "Time a function, returning the seconds each call took"
+    duration = time_per_call(func, number=number)
+    print(f" {name:>20}: {duration * 1000:.3f}ms")
+    return duration
@@ -1,9 +1,15 @@
 "Generate native python functions from HTML templates"
 __version__ = "0.11.0"
+from ._internals import Markup as Markup
+from .src.cache import CacheInfo as CacheInfo
 from .src.errors import BuildException as BuildException
+from .src.errors import FrozenGlobalException as FrozenGlobalException
 from .src.errors import InvalidTemplateException as InvalidTemplateException
 from .src.errors import ParserException as ParserException
 from .src.errors import ParsingWarning as ParsingWarning
+from .src.module import CancelInfo as CancelInfo
+from .src.module import RenderStream as RenderStream
+from .src.module import Writer as Writer
 from .src.tempered import Tempered as Tempered
 
 __all__ = [
@@ -12,4 +18,10 @@ __all__ = [
     "ParserException",
     "ParsingWarning",
     "BuildException",
+    "FrozenGlobalException",
+    "CacheInfo",
+    "CancelInfo",
+    "RenderStream",
+    "Writer",
+    "Markup",
 ]
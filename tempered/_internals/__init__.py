@@ -1,6 +1,6 @@
 "This module is used internally by tempered for components"
 
 from ..src.parsing import Template
-from .escape import escape
+from .escape import Markup, escape
 
-__all__ = ["escape", "Template"]
+__all__ = ["escape", "Markup", "Template"]
@@ -1,17 +1,151 @@
-from typing import Any
+from typing import Any, Callable, Dict, Optional
+
+try:
+    from markupsafe._speedups import _escape_inner
+except ImportError:
+    _escape_inner = None
 
 SAFE_CONVERSIONS = (int, float)
 
 
-def escape(value: Any) -> str:
+class Markup(str):
+    """
+    A string of HTML that's safe to render without escaping it.
+
+    Templates return Markup, so their output can be passed into other templates.
+    Any object with an `__html__` method is also rendered without escaping.
+    """
+
+    __slots__ = ()
+
+    def __html__(self) -> "Markup":
+        return self
+
+    def __repr__(self) -> str:
+        return f"Markup({super().__repr__()})"
+
+
+def safe_string(value: Any) -> Optional[str]:
+    "Convert a value that never needs escaping, such as numbers and Markup"
     if type(value) in SAFE_CONVERSIONS:
         return str(value)
+    elif type(value) is Markup:
+        return value
+
+    html = getattr(value, "__html__", None)
+    if html is None:
+        return None
+
+    # Other Markup classes may escape strings they're added to
+    return str(html())
+
+
+def python_escape(value: Any) -> str:
+    if type(value) is not str:
+        safe = safe_string(value)
+        if safe is not None:
+            return safe
+
+        value = str(value)
+
+    # Most values don't contain any special characters, checking for them
+    # first avoids creating a new string for each replacement
+    if "&" in value or "<" in value or ">" in value or "'" in value or '"' in value:
+        return (
+            value.replace("&", "&amp;")
+            .replace(">", "&gt;")
+            .replace("<", "&lt;")
+            .replace("'", "&#39;")
+            .replace('"', "&#34;")
+        )
+
+    return value
+
+
+def escape_text(value: Any) -> str:
+    "Escape a value placed between tags, where quotes don't need escaping"
+    if type(value) is not str:
+        safe = safe_string(value)
+        if safe is not None:
+            return safe
+
+        value = str(value)
+
+    if "&" in value or "<" in value or ">" in value:
+        return value.replace("&", "&amp;").replace(">", "&gt;").replace("<", "&lt;")
+
+    return value
+
+
+def escape_attribute(value: Any) -> str:
+    "Escape a value placed in a double quoted attribute"
+    if type(value) is not str:
+        safe = safe_string(value)
+        if safe is not None:
+            return safe
+
+        value = str(value)
+
+    if "&" in value or "<" in value or '"' in value:
+        return value.replace("&", "&amp;").replace("<", "&lt;").replace('"', "&#34;")
+
+    return value
+
+
+SAFE_URL_SCHEMES = ("http", "https", "mailto", "tel")
+UNSAFE_URL = "about:invalid#unsafe-url"
+"Used in place of URLs with a scheme that could run code, such as javascript:"
+IGNORED_URL_CHARS = "".join(map(chr, range(0x21)))
+"Browsers ignore whitespace and control characters before a URL's scheme"
+
+
+def escape_url(value: Any) -> str:
+    "Escape a value placed in an attribute containing a URL, such as href"
+    if type(value) is not str:
+        safe = safe_string(value)
+        if safe is not None:
+            return safe
+
+        value = str(value)
+
+    if ":" in value and not is_safe_url(value):
+        return UNSAFE_URL
+
+    return escape_attribute(value)
+
+
+def is_safe_url(url: str) -> bool:
+    colon = url.index(":")
+    if any(char in url[:colon] for char in "/?#"):
+        return True  # The colon is in the path, not the scheme
+
+    scheme = url[:colon].lstrip(IGNORED_URL_CHARS)
+    scheme = scheme.replace("\t", "").replace("\n", "").replace("\r", "")
+    return scheme.lower() in SAFE_URL_SCHEMES
+
+
+def markupsafe_escape(value: Any) -> str:
+    if type(value) is not str:
+        safe = safe_string(value)
+        if safe is not None:
+            return safe
+
+    # markupsafe's escape function returns Markup, which escapes any
+    # strings it's added to, so the plain string escaper is used instead
+    return _escape_inner(str(value))  # type: ignore
+
+
+BACKENDS: Dict[str, Callable[[Any], str]] = {"python": python_escape}
+"The available escape functions, markupsafe is used if it's installed"
+if _escape_inner is not None:
+    BACKENDS["markupsafe"] = markupsafe_escape
+
+escape = BACKENDS.get("markupsafe", python_escape)
 
-    return (
-        str(value)
-        .replace("&", "&amp;")
-        .replace(">", "&gt;")
-        .replace("<", "&lt;")
-        .replace("'", "&#39;")
-        .replace('"', "&#34;")
-    )
+ESCAPERS: Dict[str, Callable[[Any], str]] = {
+    "html": escape,
+    "text": escape_text,
+    "attribute": escape_attribute,
+    "url": escape_url,
+}
+"The escape function for each place a value can be rendered"
@@ -0,0 +1,155 @@
+"Persistent on-disk cache of parsed templates and their compiled code"
+import hashlib
+import marshal
+import os
+import pickle
+import sys
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from types import CodeType
+import typing_extensions as t
+from .. import __version__
+from .compiling.dependencies import calculate_dependencies
+from .compiling.options import CompilerOptions
+from .parsing import Template
+from .template.template import parse_template
+
+
+@dataclass
+class CacheInfo:
+    parse_hits: int = 0
+    parse_misses: int = 0
+    code_hits: int = 0
+    code_misses: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.parse_hits + self.code_hits
+
+    @property
+    def misses(self) -> int:
+        return self.parse_misses + self.code_misses
+
+
+class TemplateCache:
+    folder: Path
+    info: CacheInfo
+    _fingerprints: t.Dict[str, str]
+
+    def __init__(self, folder: t.Union[str, Path]):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.info = CacheInfo()
+        self._fingerprints = {}
+
+    def parse_template(
+        self,
+        name: str,
+        html: str,
+        file: t.Union[Path, None] = None,
+    ) -> Template:
+        key = create_key("parse", name, str(file), html)
+        data = self._read(key, ".pickle")
+        if data is not None:
+            try:
+                template = pickle.loads(data)
+            except Exception:
+                template = None
+
+            if isinstance(template, Template):
+                self.info.parse_hits += 1
+                self._fingerprints[name] = create_key(data)
+                return template
+
+        self.info.parse_misses += 1
+        template = parse_template(name, html, file)
+        data = pickle.dumps(template)
+        self._fingerprints[name] = create_key(data)
+        self._write(key, ".pickle", data)
+        return template
+
+    def load_code(
+        self,
+        template: Template,
+        lookup: t.Dict[str, Template],
+        options: CompilerOptions,
+    ) -> t.Optional[CodeType]:
+        key = self._code_key(template, lookup, options)
+        if key is None:
+            return None
+
+        data = self._read(key, ".code")
+        if data is not None:
+            try:
+                code = marshal.loads(data)
+            except Exception:
+                code = None
+
+            if isinstance(code, CodeType):
+                self.info.code_hits += 1
+                return code
+
+        self.info.code_misses += 1
+        return None
+
+    def store_code(
+        self,
+        template: Template,
+        lookup: t.Dict[str, Template],
+        options: CompilerOptions,
+        code: CodeType,
+    ):
+        key = self._code_key(template, lookup, options)
+        if key is None:
+            return
+
+        self._write(key, ".code", marshal.dumps(code))
+
+    def _code_key(
+        self,
+        template: Template,
+        lookup: t.Dict[str, Template],
+        options: CompilerOptions,
+    ) -> t.Optional[str]:
+        # The generated code embeds the layout signature and the CSS of every
+        # template it depends on, so they all have to be part of the key
+        dependencies = sorted(calculate_dependencies(template, lookup))
+        fingerprints = []
+        for name in dependencies:
+            if name not in self._fingerprints:
+                return None  # Template wasn't parsed through the cache
+
+            fingerprints.append(f"{name}:{self._fingerprints[name]}")
+
+        return create_key("code", template.name, repr(options), *fingerprints)
+
+    def _read(self, key: str, suffix: str) -> t.Optional[bytes]:
+        try:
+            return self.folder.joinpath(key + suffix).read_bytes()
+        except OSError:
+            return None
+
+    def _write(self, key: str, suffix: str, data: bytes):
+        # Write to a temporary file first so concurrent workers never read
+        # a partially written entry
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=self.folder, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+
+            os.replace(temp_path, self.folder.joinpath(key + suffix))
+        except OSError:
+            pass
+
+
+def create_key(*parts: t.Union[str, bytes]) -> str:
+    hash = hashlib.sha256()
+    for part in (__version__, sys.implementation.cache_tag or "", *parts):
+        if isinstance(part, str):
+            part = part.encode()
+
+        hash.update(len(part).to_bytes(8, "little"))
+        hash.update(part)
+
+    return hash.hexdigest()
@@ -0,0 +1,90 @@
+import argparse
+from pathlib import Path
+import typing_extensions as t
+from .compiling.options import AccumulatorType
+from .tempered import Tempered
+
+
+def main(argv: t.Optional[t.Sequence[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="tempered",
+        description="A fast, strongly typed html templating library for python",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser(
+        "build",
+        help="Compile a template folder into a python module",
+        description=(
+            "Compile a template folder into a python module, "
+            "which can render the templates without tempered's build dependencies"
+        ),
+    )
+    build_parser.add_argument("folder", type=Path, help="The template folder")
+    build_parser.add_argument(
+        "-o",
+        "--output",
+        type=Path,
+        required=True,
+        help="The python file to create",
+    )
+    build_parser.add_argument(
+        "--accumulator",
+        choices=t.get_args(AccumulatorType),
+        default="concat",
+        help="How template output is built",
+    )
+    build_parser.add_argument(
+        "--inline-threshold",
+        type=int,
+        default=32,
+        help="Inline components with at most this many nodes",
+    )
+    build_parser.add_argument(
+        "--strict-types",
+        action="store_true",
+        help="Check numeric parameter types, so they aren't escaped",
+    )
+    build_parser.add_argument(
+        "--explicit-props",
+        action="store_true",
+        help="Only pass components their parameters",
+    )
+    build_parser.add_argument(
+        "--sequential-awaits",
+        dest="concurrent_awaits",
+        action="store_false",
+        help="Await async components one after another",
+    )
+    build_parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Also compile templates for render_stream",
+    )
+    build_parser.add_argument(
+        "--stream-chunk-size",
+        type=int,
+        default=8192,
+        help="The minimum number of characters in each streamed chunk",
+    )
+
+    args = parser.parse_args(argv)
+    if args.command == "build":
+        build(
+            args.folder,
+            args.output,
+            accumulator=args.accumulator,
+            inline_threshold=args.inline_threshold,
+            strict_types=args.strict_types,
+            explicit_props=args.explicit_props,
+            concurrent_awaits=args.concurrent_awaits,
+            streaming=args.streaming,
+            stream_chunk_size=args.stream_chunk_size,
+        )
+
+
+def build(folder: Path, output: Path, **options: t.Any):
+    # Building doesn't change the installed type declarations
+    tempered = Tempered(template_folder=folder, generate_types=None, **options)
+    tempered.export_module(output)
+    print(f"Built {len(tempered.template_files)} templates into {output}")
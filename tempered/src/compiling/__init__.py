@@ -1,4 +1,18 @@
 from . import constants
-from .module import create_template_functions_code, default_module_code
+from .dependencies import calculate_dependents
+from .module import (
+    create_template_code, create_template_functions_code, default_module_code,
+)
+from .options import CompilerOptions, freeze_globals
+from .validate import validate_templates
 
-__all__ = ["default_module_code", "create_template_functions_code", "constants"]
+__all__ = [
+    "default_module_code",
+    "create_template_code",
+    "create_template_functions_code",
+    "calculate_dependents",
+    "validate_templates",
+    "CompilerOptions",
+    "freeze_globals",
+    "constants",
+]
@@ -1,9 +1,13 @@
 import ast
 import typing_extensions as t
 from ..utils import ast_utils
+from . import constants
+from .options import AccumulatorType
 
 
 class Variable:
+    "Builds a string by concatenating each part onto it"
+
     name: ast.Name
     assigned: bool = False
 
@@ -12,6 +16,11 @@ class Variable:
             name = ast_utils.Name(name)
         self.name = name
 
+    @property
+    def value(self) -> ast.expr:
+        "The value of the string once the output is finished"
+        return self.name
+
     def create_add(self, value: ast.expr) -> ast.stmt:
         if self.assigned:
             return ast_utils.AddAssign(target=self.name, value=value)
@@ -22,3 +31,89 @@ class Variable:
     def assign(self, value: ast.expr = ast_utils.EmptyStr) -> t.List[ast.stmt]:
         self.assigned = True
         return [ast_utils.Assign(target=self.name, value=value)]
+
+    def finish(self) -> t.List[ast.stmt]:
+        "Leave the finished string in the variable"
+        return []
+
+    def flush(self, force: bool = False) -> t.List[ast.stmt]:
+        """
+        Send the output so far to the caller, if the output is streamed.
+
+        Unless it's forced, the output is only sent once it's a full chunk.
+        """
+        return []
+
+
+class JoinVariable(Variable):
+    "Builds a string by collecting parts in a list, then joining them once"
+
+    @property
+    def value(self) -> ast.expr:
+        join = ast_utils.Attribute(ast_utils.EmptyStr, "join")
+        return ast_utils.Call(join, [self.name])
+
+    def create_add(self, value: ast.expr) -> ast.stmt:
+        if self.assigned:
+            append = ast_utils.Attribute(self.name, "append")
+            return ast_utils.Expr(ast_utils.Call(append, [value]))
+        else:
+            self.assigned = True
+            return ast_utils.Assign(target=self.name, value=ast_utils.List([value]))
+
+    def assign(self, value: ast.expr = ast_utils.EmptyStr) -> t.List[ast.stmt]:
+        self.assigned = True
+        if value is ast_utils.EmptyStr:
+            parts = ast_utils.List([])
+        else:
+            parts = ast_utils.List([value])
+
+        return [ast_utils.Assign(target=self.name, value=parts)]
+
+    def finish(self) -> t.List[ast.stmt]:
+        return [ast_utils.Assign(target=self.name, value=self.value)]
+
+
+class StreamVariable(Variable):
+    """
+    The output of a stream function, which is the caller's unsent output.
+
+    Once it reaches the chunk size it's yielded and cleared, so chunks
+    aren't sent for each small part of the template.
+    """
+
+    chunk_size: int
+    assigned = True
+
+    def __init__(self, name: t.Union[str, ast.Name], chunk_size: int):
+        super().__init__(name)
+        self.chunk_size = chunk_size
+
+    def flush(self, force: bool = False) -> t.List[ast.stmt]:
+        if force:
+            should_send: ast.expr = self.name
+        else:
+            length = ast_utils.Call(ast_utils.Name(constants.LEN_FUNC), [self.name])
+            should_send = ast_utils.Compare(
+                ast.GtE(), length, ast_utils.Constant(self.chunk_size)
+            )
+
+        return [
+            ast_utils.If(
+                condition=should_send,
+                if_body=[
+                    ast_utils.Expr(ast.Yield(value=self.name)),
+                    ast_utils.Assign(target=self.name, value=ast_utils.EmptyStr),
+                ],
+            )
+        ]
+
+
+def create_variable(
+    name: t.Union[str, ast.Name],
+    accumulator: AccumulatorType,
+) -> Variable:
+    if accumulator == "join":
+        return JoinVariable(name)
+    else:
+        return Variable(name)
@@ -0,0 +1,159 @@
+"Finds the templates that are async, and the nodes they can await at the same time"
+from __future__ import annotations
+import ast
+from dataclasses import replace
+import typing_extensions as t
+from ..parsing.nodes import (
+    ComponentNode, ExprNode, ForNode, HtmlNode, Node, RawExprNode, Template,
+)
+from ..utils import ast_utils
+from . import constants
+from .calls import create_component_call
+from .walk import iterate_nodes, node_expressions
+
+if t.TYPE_CHECKING:
+    from .builder import BuildContext
+else:
+    BuildContext = t.Any
+
+ASYNC_NODES = (ast.Await, ast.AsyncFor, ast.AsyncWith)
+
+
+def is_async(template: Template, lookup: t.Dict[str, Template]) -> bool:
+    """
+    If a template awaits anything, or uses a component or layout that does.
+
+    Only these templates are compiled to async functions, so templates that
+    never wait don't create a coroutine each time they're called.
+    """
+    stack = [template]
+    seen = {template.name}
+    while len(stack) > 0:
+        template = stack.pop()
+        if uses_await(template):
+            return True
+
+        names = [_import.name for _import in template.imports]
+        if template.layout is not None:
+            names.append(template.layout)
+
+        for name in names:
+            if name in lookup and name not in seen:
+                seen.add(name)
+                stack.append(lookup[name])
+
+    return False
+
+
+def uses_await(template: Template) -> bool:
+    "If a template's body awaits anything, ignoring the components it uses"
+    for node in iterate_nodes(template.body):
+        if isinstance(node, ForNode) and node.is_async:
+            return True
+
+        for expr in node_expressions(node):
+            if any(is_async_node(child) for child in ast.walk(expr)):
+                return True
+
+    return False
+
+
+def is_async_node(node: ast.AST) -> bool:
+    if isinstance(node, ast.comprehension):
+        return bool(node.is_async)
+
+    return isinstance(node, ASYNC_NODES)
+
+
+def group_concurrent_nodes(
+    ctx: BuildContext,
+    block: t.Sequence[Node],
+) -> t.List[t.Sequence[Node]]:
+    """
+    Group awaited nodes that are only separated by HTML, so they're awaited at
+    the same time. Every other node is in a group on it's own.
+
+    Nothing between the nodes in a group can change the variables they use,
+    so running them at once renders the same HTML as running them in order.
+    """
+    groups: t.List[t.Sequence[Node]] = []
+    run: t.List[Node] = []
+
+    def end_run():
+        awaited_count = sum(not isinstance(node, HtmlNode) for node in run)
+        if awaited_count > 1:
+            groups.append(run.copy())
+        else:
+            groups.extend([node] for node in run)
+        run.clear()
+
+    for node in block:
+        if isinstance(node, HtmlNode) or awaited_value(ctx, node) is not None:
+            run.append(node)
+        else:
+            end_run()
+            groups.append([node])
+
+    end_run()
+    return groups
+
+
+def construct_concurrent(
+    ctx: BuildContext,
+    group: t.Sequence[Node],
+) -> t.List[ast.stmt]:
+    "Await every node in a group at once, then output them in document order"
+    awaitables: t.List[ast.expr] = []
+    targets: t.List[ast.expr] = []
+    ctx_group = ctx.create_subcontext()
+    for node in group:
+        value = awaited_value(ctx, node)
+        if value is None:
+            ctx_group.construct_tag(node)
+            continue
+
+        target = ast_utils.Name(f"{constants.GATHERED_PREFIX}{len(targets)}")
+        awaitables.append(value)
+        targets.append(target)
+        if isinstance(node, ComponentNode):
+            ctx_group.construct_tag(RawExprNode(value=target))
+        else:
+            ctx_group.construct_tag(replace(node, value=target))
+
+    gather_call = ast_utils.Call(
+        func=ast_utils.Name(constants.GATHER_FUNC),
+        arguments=awaitables,
+    )
+    return [
+        ast_utils.Assign(
+            target=ast_utils.Tuple(targets),
+            value=ast.Await(value=gather_call),
+        ),
+        *ctx_group.body,
+    ]
+
+
+def awaited_value(ctx: BuildContext, node: Node) -> t.Optional[ast.expr]:
+    "The awaitable a node outputs, if it can be awaited at the same time as others"
+    if isinstance(node, ComponentNode):
+        component = ctx.find_component(node)
+        if not is_async(component, ctx.lookup):
+            return None
+
+        arguments = list(node.keywords.values())
+        value = create_component_call(node, component, ctx.options)
+    elif isinstance(node, (ExprNode, RawExprNode)) and isinstance(
+        node.value, ast.Await
+    ):
+        arguments = [node.value.value]
+        value = node.value.value
+    else:
+        return None
+
+    # Nested awaits and assignments depend on the order they're run in
+    for argument in arguments:
+        for child in ast.walk(argument):
+            if is_async_node(child) or isinstance(child, ast.NamedExpr):
+                return None
+
+    return value
@@ -2,8 +2,11 @@ from __future__ import annotations
 import ast
 from dataclasses import dataclass, field
 import typing_extensions as t
-from ..parsing.nodes import LayoutTemplate, Node, Template
-from .accumulators import Variable
+from ..parsing.nodes import ComponentNode, LayoutTemplate, Node, Template
+from .accumulators import StreamVariable, Variable, create_variable
+from .asynchronous import construct_concurrent, group_concurrent_nodes
+from .escaping import NumericAnalysis
+from .options import CompilerOptions
 
 if t.TYPE_CHECKING:
     from .rules import Rule
@@ -18,7 +21,16 @@ class BuildContext:
     css: t.Optional[str]
     output_variable: Variable
     rules: t.List[Rule]
+    lookup: t.Dict[str, Template]
+    options: CompilerOptions
+    numeric: NumericAnalysis
+    numeric_names: t.FrozenSet[str] = frozenset()
+    "Variables that are always an int, float or bool in this block"
     css_variable: t.Optional[Variable] = None
+    is_async: bool = False
+    "If the template is compiled to an async function"
+    cancellable: bool = False
+    "If loops stop once the stream they're rendered for is cancelled"
     body: t.List[ast.stmt] = field(default_factory=list)
 
     @property
@@ -29,6 +41,11 @@ class BuildContext:
     def is_layout(self):
         return self.template.is_layout
 
+    @property
+    def is_streaming(self):
+        "If the output is streamed, instead of being saved to a variable"
+        return isinstance(self.output_variable, StreamVariable)
+
     def add_expr(self, expr: ast.expr):
         return self.output_variable.create_add(expr)
 
@@ -36,6 +53,22 @@ class BuildContext:
         if not self.output_variable.assigned:
             self.body.extend(self.output_variable.assign())
 
+    def find_component(self, tag: ComponentNode) -> Template:
+        names = {_import.target: _import.name for _import in self.template.imports}
+        return self.lookup[names[tag.component_name]]
+
+    def construct_tags(self, tags: t.Sequence[Node]):
+        if not (self.is_async and self.options.concurrent_awaits):
+            for tag in tags:
+                self.construct_tag(tag)
+            return
+
+        for group in group_concurrent_nodes(self, tags):
+            if len(group) == 1:
+                self.construct_tag(group[0])
+            else:
+                self.body.extend(construct_concurrent(self, group))
+
     def construct_tag(self, tag: Node):
         rules = {tag: func for (tag, func) in self.rules}
         rule = rules.get(type(tag))
@@ -46,10 +79,14 @@ class BuildContext:
         if tag_body is not None:
             self.body.extend(tag_body)
 
-    def create_block(self, tags: t.Sequence[Node]) -> t.Sequence[ast.stmt]:
+    def create_block(
+        self,
+        tags: t.Sequence[Node],
+        numeric_names: t.Iterable[str] = (),
+    ) -> t.Sequence[ast.stmt]:
         ctx_block = self.create_subcontext()
-        for tag in tags:
-            ctx_block.construct_tag(tag)
+        ctx_block.numeric_names = self.numeric_names.union(numeric_names)
+        ctx_block.construct_tags(tags)
 
         return ctx_block.body
 
@@ -59,18 +96,17 @@ class BuildContext:
         tags: t.Sequence[Node],
     ) -> t.List[ast.stmt]:
         ctx_assign = self.create_subcontext(output)
-
-        for tag in tags:
-            ctx_assign.construct_tag(tag)
+        ctx_assign.construct_tags(tags)
 
         ctx_assign.ensure_output_assigned()
+        ctx_assign.body.extend(ctx_assign.output_variable.finish())
         return ctx_assign.body
 
     def create_subcontext(self, name: t.Union[str, ast.Name, None] = None):
         if name is None:
             variable = self.output_variable
         else:
-            variable = Variable(name)
+            variable = create_variable(name, self.options.accumulator)
 
         return BuildContext(
             output_variable=variable,
@@ -78,4 +114,10 @@ class BuildContext:
             layout=self.layout,
             css=self.css,
             rules=self.rules,
+            lookup=self.lookup,
+            options=self.options,
+            numeric=self.numeric,
+            numeric_names=self.numeric_names,
+            is_async=self.is_async,
+            cancellable=self.cancellable,
         )
@@ -1,13 +1,18 @@
 import ast
 import string
 import typing_extensions as t
+from ..parsing.nodes import (
+    ComponentNode, EscapeContext, FlushNode, ForNode, LayoutTemplate, SlotNode, Template,
+)
 from ..utils import ast_utils
 from . import constants
+from .options import CompilerOptions
+from .walk import iterate_nodes
 
 
-def create_escape_call(value: ast.expr) -> ast.expr:
+def create_escape_call(value: ast.expr, context: EscapeContext = "html") -> ast.expr:
     return ast_utils.Call(
-        func=ast_utils.Name(constants.ESCAPE_FUNC),
+        func=ast_utils.Name(constants.ESCAPE_FUNCS[context]),
         arguments=[value],
     )
 
@@ -21,6 +26,15 @@ def layout_func_name(template_name: str) -> str:
     return f"__{template_name}_layout"
 
 
+def stream_func_name(func_name: str) -> str:
+    return f"{func_name}_stream"
+
+
+def stream_variable(variable: str) -> str:
+    "The closure variable a component or layout's stream function is stored in"
+    return f"__stream_{variable}"
+
+
 def slot_variable_name(slot_name: t.Union[str, None]) -> str:
     if slot_name is None:
         return constants.OUTPUT_VAR
@@ -48,26 +62,143 @@ def filter_non_ident_chars(name: str) -> str:
     return "".join(map(encode_char, name))
 
 
-def create_resolve_call(name: str):
+def create_resolve_call(name: str, context: str = constants.KWARGS_VAR):
     return ast_utils.Call(
         func=ast_utils.Name(constants.RESOLVE_FUNC),
         arguments=[
             ast_utils.Constant(name),
-            ast_utils.Name(constants.KWARGS_VAR),
+            ast_utils.Name(context),
         ],
     )
 
 
+def has_explicit_props(template: Template, options: CompilerOptions) -> bool:
+    "If a template is only passed its parameters, instead of the render context"
+    if template.explicit_props is not None:
+        return template.explicit_props
+    else:
+        return options.explicit_props
+
+
+def create_component_call(
+    tag: ComponentNode,
+    component: Template,
+    options: CompilerOptions,
+    func: t.Optional[ast.expr] = None,
+    arguments: t.Sequence[ast.expr] = (),
+) -> ast.Call:
+    keywords = tag.keywords.copy()
+    keywords[constants.WITH_STYLES] = ast_utils.Constant(False)
+
+    # Forwarding the context creates a new dict for every call
+    if has_explicit_props(component, options):
+        kwargs = None
+    else:
+        kwargs = ast_utils.Name(constants.KWARGS_VAR)
+
+    return ast_utils.Call(
+        func=func if func is not None else ast_utils.Name(tag.component_name),
+        arguments=arguments,
+        keywords=keywords,
+        kwargs=kwargs,
+    )
+
+
+def is_streamed(template: Template) -> bool:
+    """
+    If a template is called through its stream function when streaming.
+
+    Templates without loops, components, flushes or a layout render a small
+    amount of HTML, so they're called normally instead of creating a generator.
+    """
+    if template.is_layout or template.layout is not None:
+        return True
+
+    return any(
+        isinstance(node, (ForNode, ComponentNode, FlushNode))
+        for node in iterate_nodes(template.body)
+    )
+
+
+def streamed_slots(
+    layout: LayoutTemplate,
+) -> t.Optional[t.Tuple[t.List[str], t.List[str]]]:
+    """
+    The named slots before and after a layout's default slot, if pages stream
+    their content into it.
+
+    The default slot has to be outside of any if or loop, so the content is
+    always streamed exactly once. Layouts that use a layout render their own
+    content with the rest of their body, so they aren't streamed into.
+    """
+    if layout.layout is not None:
+        return None
+
+    for index, node in enumerate(layout.body):
+        if isinstance(node, SlotNode) and node.name is None:
+            break
+    else:
+        return None
+
+    before = {
+        node.name
+        for node in iterate_nodes(layout.body[:index])
+        if isinstance(node, SlotNode) and node.name is not None
+    }
+    names = [slot.name for slot in layout.slots if slot.name is not None]
+    return (
+        [name for name in names if name in before],
+        [name for name in names if name not in before],
+    )
+
+
+def create_cancel_check(stage: str) -> ast.stmt:
+    "Stop rendering if the stream has been cancelled"
+    render_cancelled = ast_utils.Call(
+        func=ast_utils.Name(constants.RENDER_CANCELLED_CLASS),
+        arguments=[ast_utils.Constant(stage)],
+    )
+    cancelled = ast_utils.Attribute(ast_utils.Name(constants.CANCEL_VAR), "cancelled")
+    return ast_utils.If(
+        condition=cancelled,
+        if_body=[ast.Raise(exc=render_cancelled, cause=None)],
+    )
+
+
+def create_global_lookup(name: str) -> ast.expr:
+    return ast_utils.Index(
+        ast_utils.Name(constants.GLOBALS_VAR),
+        ast_utils.Constant(name),
+    )
+
+
 def create_layout_call(
-    layout_name: str,
     default_slot: ast.expr,
     css: ast.expr,
     has_default_slot: bool,
     blocks: t.Set[str],
+    forward_context: bool = True,
+    stream_buffer: t.Optional[ast.expr] = None,
+    is_async: bool = False,
 ) -> ast.expr:
     kw_args: t.Dict[str, ast.expr] = {}
     kw_args[constants.CSS_VARIABLE] = css
     kw_args[constants.WITH_STYLES] = ast_utils.Name(constants.WITH_STYLES)
+    kwargs = ast_utils.Name(constants.KWARGS_VAR) if forward_context else None
+
+    if stream_buffer is not None:
+        # The layout's stream function continues from the caller's unsent
+        # output, it renders the slots with the content function once it
+        # needs them, so the layout can be sent before them
+        content_func = ast_utils.Name(constants.RENDER_CONTENT_FUNC)
+        kw_args[constants.CONTENT_FUNC] = content_func
+        stream_call = ast_utils.Call(
+            func=ast_utils.Name(stream_variable(constants.LAYOUT_VAR)),
+            arguments=[stream_buffer],
+            keywords=kw_args,
+            kwargs=kwargs,
+        )
+        return ast.YieldFrom(value=stream_call)
 
     if has_default_slot:
         kw_args[slot_parameter(None)] = default_slot
@@ -75,8 +206,9 @@ def create_layout_call(
     for slot in blocks:
         kw_args[slot_parameter(slot)] = ast_utils.Name(slot_variable_name(slot))
 
-    return ast_utils.Call(
-        func=ast_utils.Name(layout_func_name(layout_name)),
+    layout_call = ast_utils.Call(
+        func=ast_utils.Name(constants.LAYOUT_VAR),
         keywords=kw_args,
-        kwargs=ast_utils.Name(constants.KWARGS_VAR),
+        kwargs=kwargs,
     )
+    return ast.Await(value=layout_call) if is_async else layout_call
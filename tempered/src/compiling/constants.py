@@ -1,45 +1,454 @@
 CSS_VARIABLE = "__css"
 WITH_STYLES = "with_styles"
 OUTPUT_VAR = "__html"
+STREAM_BUFFER_VAR = "__buffer"
+STREAM_ATTRIBUTE = "stream"
+STREAM_TEMPLATE_FUNC = "__stream_template"
+RENDER_STREAM_CLASS = "__RenderStream"
+CANCEL_TOKEN_CLASS = "__CancelToken"
+CANCEL_TOKEN_VAR = "__cancel_token"
+CANCEL_VAR = "__cancel"
+RENDER_CANCELLED_CLASS = "__RenderCancelled"
+CANCEL_COUNTS_VAR = "__cancel_counts"
+COUNT_CANCELLED_FUNC = "__count_cancelled"
+CANCEL_STAGES = ("loop", "component", "chunk", "deferred", "awaiting")
+CANCEL_POLL_INTERVAL = 0.1
+RENDER_TEMPLATE_FUNC = "__render_template"
+RENDER_TEMPLATE_ASYNC_FUNC = "__render_template_async"
+RENDER_INTO_FUNC = "__render_into"
+DEFER_FUNC = "__defer"
+DEFER_RENDER_FUNC = "__defer_render"
+DEFER_PLACEHOLDER_FUNC = "__defer_placeholder"
+DEFER_FALLBACK_FUNC = "__defer_fallback"
+DEFERRED_RENDERS_VAR = "__deferred_renders"
+DEFER_EXECUTOR_VAR = "__defer_executor"
+DEFER_EXECUTOR_LOCK_VAR = "__defer_executor_lock"
+GET_DEFER_EXECUTOR_FUNC = "__get_defer_executor"
+CSP_NONCE_NAME = "csp_nonce"
+SEND_DEFERRED_FUNC = "__send_deferred"
+LOGGER_VAR = "__logger"
+DEFER_SWAP_HTML_VAR = "__defer_swap_html"
+CONTENT_FUNC = "__content"
+CONTENT_STREAM_VAR = "__content_stream"
+STREAM_CONTENT_FUNC = "__stream_content"
+RENDER_CONTENT_FUNC = "__render_content"
 NAME_LOOKUP_VAR = "__name_lookup"
 GLOBALS_VAR = "__globals"
 TEMPLATE_LIST_VAR = "__templates"
 REGISTER_TEMPLATE_FUNC = "__register_template"
 REGISTER_GLOBAL_FUNC = "__register_global"
 ESCAPE_FUNC = "__escape"
+ESCAPE_FUNCS = {
+    "html": ESCAPE_FUNC,
+    "text": "__escape_text",
+    "attribute": "__escape_attribute",
+    "url": "__escape_url",
+}
 REGISTER_TEMPLATE_NAME_DECORATOR = "__register_template_name"
+STAGED_LOOKUP_VAR = "__staged_lookup"
+STAGED_LINKS_VAR = "__staged_links"
+LINK_FUNC = "__link"
+LAYOUT_VAR = "__layout"
+COMMIT_TEMPLATES_FUNC = "__commit_templates"
 RESOLVE_FUNC = "__resolve"
+REQUEST_SCOPE_VAR = "__request_scope"
+REQUEST_SCOPE_FUNC = "__enter_request_scope"
+NO_CONTEXT_VAR = "__no_context"
+UNSET_VAR = "__unset"
+TYPE_FUNC = "__type"
+LEN_FUNC = "__len"
+NEXT_FUNC = "__next"
+TYPE_ERROR_FUNC = "__type_error"
+NUMERIC_TYPES_VARS = {
+    "int": "__int_types",
+    "float": "__float_types",
+    "bool": "__bool_types",
+}
+HOISTED_PREFIX = "__v_"
+HOISTED_NO_CONTEXT_PREFIX = "__vn_"
+INLINE_PREFIX = "__inline"
+GATHER_FUNC = "__gather"
+GATHERED_PREFIX = "__gathered_"
 KWARGS_VAR = "context"
+DEFER_SWAP_HTML = (
+    '<template id="%(id)s-content">%(html)s</template>'
+    "<script%(nonce)s>(function(t){"
+    "document.getElementById('%(id)s').replaceWith(t.content);"
+    "t.remove()})(document.getElementById('%(id)s-content'))</script>"
+)
+"Replaces a deferred block's placeholder with it's content once it's sent"
 
 
-FILE_HEADER = f"""
-from __future__ import annotations as _
-from tempered._internals import escape as {ESCAPE_FUNC}, Template as __Template
-import typing_extensions as t
+RUNTIME_HEADER = f"""
+import asyncio as __asyncio
+import concurrent.futures as __futures
+import contextlib as __contextlib
+import contextvars as __contextvars
+import logging as __logging
+import threading as __threading
+import time as __time
 
+{LOGGER_VAR} = __logging.getLogger("tempered")
 {GLOBALS_VAR} = {{}}
 {NAME_LOOKUP_VAR} = {{}}
-{TEMPLATE_LIST_VAR} = []
+{STAGED_LOOKUP_VAR} = {{}}
+{STAGED_LINKS_VAR} = {{}}
+{REQUEST_SCOPE_VAR} = __contextvars.ContextVar("request_scope", default={{}})
+# Templates with explicit props don't use the render context
+{NO_CONTEXT_VAR} = {{}}
+# Variables that haven't been resolved yet
+{UNSET_VAR} = object()
+# The blocks deferred by the current stream, or None when not streaming
+{DEFERRED_RENDERS_VAR} = __contextvars.ContextVar("deferred_renders", default=None)
+# The thread pool is created by the first deferred block
+{DEFER_EXECUTOR_VAR}: t.Optional[__futures.ThreadPoolExecutor] = None
+{DEFER_EXECUTOR_LOCK_VAR} = __threading.Lock()
+{DEFER_SWAP_HTML_VAR} = {DEFER_SWAP_HTML!r}
+
+
+class {CANCEL_TOKEN_CLASS}:
+    __slots__ = ("cancelled",)
+
+    def __init__(self):
+        self.cancelled = False
+
+
+class {RENDER_CANCELLED_CLASS}(Exception):
+    "Raised by a streamed template that's stopped because it's stream was cancelled"
+
+    def __init__(self, stage: str):
+        super().__init__(stage)
+        self.stage = stage
+
+
+# Stream functions check the token at the start of each loop and component
+{CANCEL_TOKEN_VAR} = __contextvars.ContextVar(
+    "cancel_token", default={CANCEL_TOKEN_CLASS}()
+)
+{CANCEL_COUNTS_VAR} = {{stage: 0 for stage in {CANCEL_STAGES!r}}}
+__cancel_counts_lock = __threading.Lock()
+
+
+def {COUNT_CANCELLED_FUNC}(stage: str):
+    with __cancel_counts_lock:
+        {CANCEL_COUNTS_VAR}[stage] += 1
 
 def {REGISTER_GLOBAL_FUNC}(name: str, value: t.Any):
     {GLOBALS_VAR}[name] = value
 
-def {REGISTER_TEMPLATE_FUNC}(template: __Template):
-    {TEMPLATE_LIST_VAR}.append(template)
-
 
 def {REGISTER_TEMPLATE_NAME_DECORATOR}(name: str):
-    def wrapper(func):
-        {NAME_LOOKUP_VAR}[name] = func
+    def wrapper(factory):
+        func, link = factory()
+        {STAGED_LOOKUP_VAR}[name] = func
+        {STAGED_LINKS_VAR}[name] = link
         return func
 
     return wrapper
 
+
+def {COMMIT_TEMPLATES_FUNC}():
+    # Templates are linked to the components they use before they're swapped
+    # in all at once, so renders never mix versions
+    lookup = {{**{NAME_LOOKUP_VAR}, **{STAGED_LOOKUP_VAR}}}
+    for link in {STAGED_LINKS_VAR}.values():
+        link(lookup)
+
+    {NAME_LOOKUP_VAR}.update({STAGED_LOOKUP_VAR})
+    {STAGED_LOOKUP_VAR}.clear()
+    {STAGED_LINKS_VAR}.clear()
+
+
+@__contextlib.contextmanager
+def {REQUEST_SCOPE_FUNC}(values: t.Dict[str, t.Any]) -> t.Iterator[None]:
+    # Each thread and asyncio task has it's own scope
+    token = {REQUEST_SCOPE_VAR}.set({{**{REQUEST_SCOPE_VAR}.get(), **values}})
+    try:
+        yield
+    finally:
+        {REQUEST_SCOPE_VAR}.reset(token)
+
+
+def {RENDER_TEMPLATE_FUNC}(name: str, context: t.Dict[str, t.Any]) -> str:
+    html = {NAME_LOOKUP_VAR}[name](**context)
+    if {TYPE_FUNC}(html) is not str:
+        html.close()
+        raise TypeError(f"'{{name}}' is async, so must be rendered with render_async")
+
+    return html
+
+
+async def {RENDER_TEMPLATE_ASYNC_FUNC}(name: str, context: t.Dict[str, t.Any]) -> str:
+    # Only templates that await anything are async functions
+    html = {NAME_LOOKUP_VAR}[name](**context)
+    if {TYPE_FUNC}(html) is not str:
+        try:
+            html = await html
+        except __asyncio.CancelledError:
+            {COUNT_CANCELLED_FUNC}("awaiting")
+            raise
+
+    return html
+
+
+class {RENDER_STREAM_CLASS}:
+    "The chunks of a streamed template, the stream can be cancelled from any thread"
+    __slots__ = ("_chunks", "_token")
+
+    def __init__(
+        self,
+        chunks: t.Generator[str, None, None],
+        token: {CANCEL_TOKEN_CLASS},
+    ):
+        self._chunks = chunks
+        self._token = token
+
+    def __iter__(self) -> "{RENDER_STREAM_CLASS}":
+        return self
+
+    def __next__(self) -> str:
+        return next(self._chunks)
+
+    def close(self):
+        self._chunks.close()
+
+    def cancel(self):
+        "Stop rendering at the next loop or component, and end the stream"
+        self._token.cancelled = True
+
+
+def {STREAM_TEMPLATE_FUNC}(func: t.Any, context: t.Dict[str, t.Any]) -> t.Iterator[str]:
+    stream = getattr(func, "{STREAM_ATTRIBUTE}", None)
+    if stream is None:
+        raise RuntimeError(
+            "Templates must be compiled with streaming to be streamed, "
+            "and can't be async"
+        )
+
+    # Streams are often read after the request scope has been left, such as
+    # by a WSGI server, so they're run in the context they were created in
+    scope = __contextvars.copy_context()
+    deferred: t.List[t.Any] = []
+    token = {CANCEL_TOKEN_CLASS}()
+    scope.run({DEFERRED_RENDERS_VAR}.set, deferred)
+    scope.run({CANCEL_TOKEN_VAR}.set, token)
+    chunks = stream("", **context)
+
+    def read_chunks() -> t.Generator[str, None, None]:
+        stage = "chunk"
+        try:
+            while True:
+                try:
+                    yield scope.run(next, chunks)
+                except StopIteration as stop:
+                    html = stop.value
+                    break
+
+            if html:
+                yield html
+
+            # Deferred blocks are sent after the rest of the page
+            stage = "deferred"
+            yield from {SEND_DEFERRED_FUNC}(deferred, scope, token)
+        except {RENDER_CANCELLED_CLASS} as cancelled:
+            {COUNT_CANCELLED_FUNC}(cancelled.stage)
+        except GeneratorExit:
+            # The server stopped reading the stream, such as when the client
+            # disconnects from a WSGI server
+            {COUNT_CANCELLED_FUNC}(stage)
+            raise
+        finally:
+            scope.run(chunks.close)
+            for _, future, _, _, block_token in deferred:
+                future.cancel()
+                block_token.cancelled = True
+
+    return {RENDER_STREAM_CLASS}(read_chunks(), token)
+
+
+def {RENDER_INTO_FUNC}(
+    write: t.Callable[[str], t.Any],
+    name: str,
+    context: t.Dict[str, t.Any],
+) -> None:
+    # Stream functions pass their unsent output down to the components they
+    # call, so the page is written in chunks instead of being copied into the
+    # output of each template it's nested in
+    func = {NAME_LOOKUP_VAR}[name]
+    if not hasattr(func, "{STREAM_ATTRIBUTE}"):
+        write({RENDER_TEMPLATE_FUNC}(name, context))
+        return
+
+    for chunk in {STREAM_TEMPLATE_FUNC}(func, context):
+        write(chunk)
+
+
+def {STREAM_CONTENT_FUNC}(
+    content: t.Generator[t.Any, str, t.Tuple[str, ...]],
+    html: str,
+) -> t.Generator[str, None, t.Tuple[str, ...]]:
+    "Stream a page's content from its layout's default slot"
+    # The content has already sent the slots before the default slot, it's
+    # passed the layout's unsent output and returns what's left of it,
+    # followed by the slots after the default slot
+    try:
+        chunk = content.send(html)
+        while True:
+            yield chunk
+            chunk = next(content)
+    except StopIteration as stop:
+        return stop.value
+    finally:
+        content.close()
+
+
+def {GET_DEFER_EXECUTOR_FUNC}() -> __futures.ThreadPoolExecutor:
+    global {DEFER_EXECUTOR_VAR}
+    with {DEFER_EXECUTOR_LOCK_VAR}:
+        if {DEFER_EXECUTOR_VAR} is None:
+            {DEFER_EXECUTOR_VAR} = __futures.ThreadPoolExecutor(
+                thread_name_prefix="tempered-defer"
+            )
+
+        return {DEFER_EXECUTOR_VAR}
+
+
+def {DEFER_FUNC}(
+    render: t.Callable[[], str],
+    placeholder: t.Optional[t.Callable[[], str]],
+    fallback: t.Optional[t.Callable[[], str]],
+    timeout: t.Optional[float],
+) -> str:
+    deferred = {DEFERRED_RENDERS_VAR}.get()
+    if deferred is None:
+        return render()
+
+    # Blocks deferred while rendering a deferred block are rendered in place.
+    # Each block has it's own cancel token, so it stops at the next loop or
+    # component once it times out, or the stream ends
+    scope = __contextvars.copy_context()
+    token = {CANCEL_TOKEN_CLASS}()
+    scope.run({DEFERRED_RENDERS_VAR}.set, None)
+    scope.run({CANCEL_TOKEN_VAR}.set, token)
+    future = {GET_DEFER_EXECUTOR_FUNC}().submit(scope.run, render)
+    deadline = __time.monotonic() + timeout if timeout is not None else None
+
+    element_id = f"t-defer-{{len(deferred)}}"
+    deferred.append((element_id, future, fallback, deadline, token))
+    html = placeholder() if placeholder is not None else ""
+    return f'<t-defer id="{{element_id}}">{{html}}</t-defer>'
+
+
+def {SEND_DEFERRED_FUNC}(
+    deferred: t.List[t.Any],
+    scope: __contextvars.Context,
+    token: {CANCEL_TOKEN_CLASS},
+) -> t.Iterator[str]:
+    "Send each deferred block once it's done, or it's fallback if it fails or times out"
+    pending = deferred.copy()
+    # The swap scripts use the nonce from the request scope the stream was
+    # created in, for a Content Security Policy
+    nonce = scope.run({REQUEST_SCOPE_VAR}.get).get("{CSP_NONCE_NAME}")
+    if nonce is not None:
+        nonce_attribute = f' nonce="{{{ESCAPE_FUNCS["attribute"]}(nonce)}}"'
+    else:
+        nonce_attribute = ""
+
+    while len(pending) > 0:
+        # The token can't be waited on, so it's checked regularly
+        timeout = {CANCEL_POLL_INTERVAL}
+        for _, _, _, deadline, _ in pending:
+            if deadline is not None:
+                timeout = min(timeout, max(deadline - __time.monotonic(), 0))
+
+        __futures.wait(
+            [future for _, future, _, _, _ in pending],
+            timeout=timeout,
+            return_when=__futures.FIRST_COMPLETED,
+        )
+        if token.cancelled:
+            raise {RENDER_CANCELLED_CLASS}("deferred")
+
+        for item in pending.copy():
+            element_id, future, fallback, deadline, block_token = item
+            if future.done() and future.exception() is None:
+                html = future.result()
+            elif future.done():
+                # The page has already been sent, so a failed block is
+                # replaced with it's fallback instead of ending the stream
+                if fallback is None:
+                    raise future.exception()
+
+                {LOGGER_VAR}.error(
+                    "Deferred block %s failed", element_id, exc_info=future.exception()
+                )
+                html = scope.run(fallback)
+            elif deadline is not None and deadline <= __time.monotonic():
+                future.cancel()
+                block_token.cancelled = True
+                html = scope.run(fallback) if fallback is not None else ""
+            else:
+                continue
+
+            pending.remove(item)
+            values = {{"id": element_id, "html": html, "nonce": nonce_attribute}}
+            yield {DEFER_SWAP_HTML_VAR} % values
+
+
+async def {GATHER_FUNC}(*awaitables: t.Awaitable[str]) -> t.List[str]:
+    tasks = [__asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    try:
+        return await __asyncio.gather(*tasks)
+    except BaseException:
+        # Don't leave the other components running once the render has failed
+        for task in tasks:
+            task.cancel()
+        raise
+
+
 def {RESOLVE_FUNC}(name: str, context: t.Dict[str, t.Any]) -> t.Any:
     if name in context:
         return context[name]
+
+    scope = {REQUEST_SCOPE_VAR}.get()
+    if name in scope:
+        return scope[name]
     elif name in {GLOBALS_VAR}:
         return {GLOBALS_VAR}[name]
     else:
         raise RuntimeError(f"The variable '{{name}}' could not be resolved")
+
+
+# Templates can have variables called type or len, so the builtins are aliased
+{TYPE_FUNC} = type
+{LEN_FUNC} = len
+{NEXT_FUNC} = next
+{NUMERIC_TYPES_VARS["int"]} = (int, bool)
+{NUMERIC_TYPES_VARS["float"]} = (float, int, bool)
+{NUMERIC_TYPES_VARS["bool"]} = (bool,)
+
+
+def {TYPE_ERROR_FUNC}(name: str, value: t.Any, types: t.Tuple[type, ...]) -> t.NoReturn:
+    raise TypeError(
+        f"The parameter '{{name}}' must be {{types[0].__name__}}, "
+        f"not {{type(value).__name__}}"
+    )
 """
+
+
+FILE_HEADER = f"""
+from __future__ import annotations as _
+from tempered._internals import escape as {ESCAPE_FUNC}, Template as __Template
+from tempered._internals.escape import (
+    escape_text as {ESCAPE_FUNCS["text"]},
+    escape_attribute as {ESCAPE_FUNCS["attribute"]},
+    escape_url as {ESCAPE_FUNCS["url"]},
+)
+import typing_extensions as t
+
+{TEMPLATE_LIST_VAR} = {{}}
+
+def {REGISTER_TEMPLATE_FUNC}(template: __Template):
+    {TEMPLATE_LIST_VAR}[template.name] = template
+
+{RUNTIME_HEADER}"""
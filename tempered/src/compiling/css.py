@@ -1,15 +1,46 @@
 import typing_extensions as t
 from ..css.postprocess import postprocess_css
 from ..parsing import Template
-from .dependencies import calculate_dependencies
+from .fold import fold_template
+from .options import CompilerOptions
 
 
 def generate_template_css(
     template: Template,
     lookup: t.Dict[str, Template],
+    options: CompilerOptions,
 ) -> str:
-    components_used = calculate_dependencies(template, lookup)
+    components_used = find_rendered_templates(template, lookup, options)
     css_fragments = [lookup[comp].css for comp in components_used]
     css = " ".join(css_fragments)
     css = postprocess_css(css)
     return css
+
+
+def find_rendered_templates(
+    template: Template,
+    lookup: t.Dict[str, Template],
+    options: CompilerOptions,
+) -> t.List[str]:
+    """
+    Find the templates that can be rendered by a template, including itself.
+
+    Components that are only used in branches that are never taken aren't
+    included, so their CSS isn't added to the page.
+    """
+    rendered = [template.name]
+    remaining = [template]
+    while len(remaining) > 0:
+        current = fold_template(
+            remaining.pop(), lookup, options, render_components=False
+        )
+        required_names = [_import.name for _import in current.imports]
+        if current.layout:
+            required_names.append(current.layout)
+
+        for name in required_names:
+            if name not in rendered:
+                rendered.append(name)
+                remaining.append(lookup[name])
+
+    return rendered
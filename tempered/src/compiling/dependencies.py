@@ -30,3 +30,19 @@ def _recursively_calculate_dependencies(
 
     cache[template.name] = components_used
     return list(components_used)
+
+
+def calculate_dependents(
+    names: t.Collection[str],
+    lookup: t.Dict[str, Template],
+) -> t.Sequence[str]:
+    "Find the templates that depend on any of the given templates, including themselves"
+    names = set(names)
+    cache: t.Dict[str, t.Set[str]] = {}
+    dependents = []
+    for template in lookup.values():
+        dependencies = _recursively_calculate_dependencies(template, lookup, cache)
+        if not names.isdisjoint(dependencies):
+            dependents.append(template.name)
+
+    return dependents
@@ -0,0 +1,208 @@
+"Finds expressions that can be rendered without being escaped"
+import ast
+import typing_extensions as t
+from ..parsing.nodes import CodeNode, ForNode, Template
+from ..utils import ast_utils
+from . import constants
+from .options import CompilerOptions
+from .walk import count_assignments, defined_names, iterate_nodes
+
+NUMERIC_TYPES: t.Dict[str, t.Tuple[type, ...]] = {
+    "int": (int, bool),
+    "float": (float, int, bool),
+    "bool": (bool,),
+}
+"The exact types accepted by a parameter with a numeric type in strict mode"
+NUMERIC_FUNCTIONS = ("len", "int", "float", "bool")
+"Builtins that always return an int, float or bool"
+NUMERIC_OPERATORS = (ast.BinOp, ast.UnaryOp, ast.Compare)
+
+
+class NumericAnalysis:
+    """
+    Finds expressions that are always an int, float or bool.
+
+    These are converted to strings without being escaped, since their string
+    never contains HTML. Variables are only trusted if nothing else can assign
+    to them, parameters are only trusted if their type is checked.
+    """
+
+    parameters: t.Dict[str, str]
+    "The type of numeric parameters, which are checked when the template is called"
+    _local_names: t.Set[str]
+    _reassigned_names: t.Set[str]
+    _inline_parameters: t.Set[str]
+
+    def __init__(self, template: Template, options: CompilerOptions):
+        assignments = count_assignments(template.body)
+        code_names: t.Set[str] = set()
+        for node in iterate_nodes(template.body):
+            if isinstance(node, CodeNode):
+                code_names.update(defined_names(node.body))
+
+        assigned_names = {*assignments, *code_names}
+        self._reassigned_names = {
+            *(name for name, count in assignments.items() if count > 1),
+            *code_names,
+        }
+        self._local_names = {
+            *(param.name for param in template.parameters),
+            *(_import.target for _import in template.imports),
+            *assigned_names,
+        }
+        # Parameters of inlined components are assigned before they're used
+        self._inline_parameters = {
+            name
+            for name, count in assignments.items()
+            if count == 1 and name.startswith(constants.INLINE_PREFIX)
+        }
+
+        self.parameters = {}
+        if options.strict_types:
+            for param in template.parameters:
+                type_name = parameter_numeric_type(param.type, param.default)
+                if type_name is not None and param.name not in assigned_names:
+                    self.parameters[param.name] = type_name
+
+    def loop_variables(self, node: ForNode) -> t.List[str]:
+        "Find the loop variables that are always integers"
+        iterable = node.iterable
+        if not (
+            isinstance(iterable, ast.Call)
+            and isinstance(iterable.func, ast.Name)
+            and iterable.func.id not in self._local_names
+        ):
+            return []
+
+        target = node.target
+        if iterable.func.id == "enumerate" and isinstance(target, ast.Tuple):
+            target = target.elts[0] if len(target.elts) == 2 else None
+        elif iterable.func.id != "range":
+            return []
+
+        if isinstance(target, ast.Name) and target.id not in self._reassigned_names:
+            return [target.id]
+        else:
+            return []
+
+    def assigned_variables(
+        self,
+        body: t.List[ast.stmt],
+        numeric_names: t.AbstractSet[str],
+    ) -> t.Set[str]:
+        "Find the parameters of inlined components that are assigned a number"
+        assigned: t.Set[str] = set()
+        for statement in body:
+            if (
+                isinstance(statement, ast.Assign)
+                and len(statement.targets) == 1
+                and isinstance(statement.targets[0], ast.Name)
+                and self.is_numeric(statement.value, {*numeric_names, *assigned})
+            ):
+                name = statement.targets[0].id
+            else:
+                name = type_checked_variable(statement)
+
+            if name in self._inline_parameters:
+                assigned.add(name)
+
+        return assigned
+
+    def is_numeric(self, expr: ast.expr, numeric_names: t.AbstractSet[str]) -> bool:
+        # Assignments inside the expression could change a numeric variable
+        if any(isinstance(node, ast.NamedExpr) for node in ast.walk(expr)):
+            return False
+
+        return self._is_numeric(expr, numeric_names)
+
+    def _is_numeric(self, expr: ast.expr, numeric_names: t.AbstractSet[str]) -> bool:
+        if isinstance(expr, ast.Constant):
+            return type(expr.value) in (int, float, bool)
+        elif isinstance(expr, ast.Name):
+            return expr.id in numeric_names
+        elif isinstance(expr, ast.Call):
+            return (
+                isinstance(expr.func, ast.Name)
+                and expr.func.id in NUMERIC_FUNCTIONS
+                and expr.func.id not in self._local_names
+            )
+        elif isinstance(expr, ast.UnaryOp) and isinstance(expr.op, ast.Not):
+            return True
+        elif isinstance(expr, NUMERIC_OPERATORS):
+            # Operators on ints, floats and bools always return one of them
+            return all(
+                self._is_numeric(child, numeric_names)
+                for child in ast.iter_child_nodes(expr)
+                if isinstance(child, ast.expr)
+            )
+        else:
+            return False
+
+
+def parameter_numeric_type(
+    annotation: t.Optional[ast.expr],
+    default: t.Optional[ast.expr],
+) -> t.Optional[str]:
+    "The type a parameter is checked against in strict mode, if it's numeric"
+    if not isinstance(annotation, ast.Name) or annotation.id not in NUMERIC_TYPES:
+        return None
+
+    if default is None:
+        return annotation.id
+
+    # Defaults aren't checked, so they need to be known
+    try:
+        value = ast.literal_eval(default)
+    except ValueError:
+        return None
+
+    return annotation.id if type(value) in NUMERIC_TYPES[annotation.id] else None
+
+
+def create_type_check(name: str, variable: str, type_name: str) -> ast.stmt:
+    "Create a statement that raises an error if a variable isn't the given type"
+    types = ast_utils.Name(constants.NUMERIC_TYPES_VARS[type_name])
+    value_type = ast_utils.Call(
+        func=ast_utils.Name(constants.TYPE_FUNC),
+        arguments=[ast_utils.Name(variable)],
+    )
+    type_error = ast_utils.Call(
+        func=ast_utils.Name(constants.TYPE_ERROR_FUNC),
+        arguments=[ast_utils.Constant(name), ast_utils.Name(variable), types],
+    )
+    return ast_utils.If(
+        condition=ast_utils.Compare(ast.NotIn(), value_type, types),
+        if_body=ast_utils.Expr(type_error),
+    )
+
+
+def create_type_checks(parameters: t.Dict[str, str]) -> t.List[ast.stmt]:
+    return [
+        create_type_check(name, name, type_name)
+        for name, type_name in parameters.items()
+    ]
+
+
+def type_checked_variable(statement: ast.stmt) -> t.Optional[str]:
+    "Find the variable checked by a statement from `create_type_check`"
+    if not (
+        isinstance(statement, ast.If)
+        and isinstance(statement.test, ast.Compare)
+        and isinstance(statement.test.ops[0], ast.NotIn)
+        and isinstance(statement.test.left, ast.Call)
+        and isinstance(statement.test.left.func, ast.Name)
+        and statement.test.left.func.id == constants.TYPE_FUNC
+        and len(statement.test.left.args) == 1
+        and isinstance(statement.test.left.args[0], ast.Name)
+        and isinstance(statement.test.comparators[0], ast.Name)
+        and statement.test.comparators[0].id in constants.NUMERIC_TYPES_VARS.values()
+        and len(statement.body) == 1
+        and isinstance(statement.body[0], ast.Expr)
+        and isinstance(statement.body[0].value, ast.Call)
+        and isinstance(statement.body[0].value.func, ast.Name)
+        and statement.body[0].value.func.id == constants.TYPE_ERROR_FUNC
+        and len(statement.orelse) == 0
+    ):
+        return None
+
+    return statement.test.left.args[0].id
@@ -0,0 +1,501 @@
+"Evaluates the parts of templates that don't depend on the render context"
+import ast
+import copy
+from dataclasses import replace
+import operator
+from types import CodeType
+import typing_extensions as t
+from ..._internals.escape import ESCAPERS
+from ..parsing.nodes import (
+    BlockNode, CodeNode, ComponentNode, DeferNode, ExprNode, ForNode, HtmlNode, IfNode,
+    LayoutTemplate, Node, RawExprNode, SlotNode, StyleNode, Template, TemplateBlock,
+)
+from . import constants
+from .escaping import NUMERIC_TYPES, parameter_numeric_type
+from .inline import inline_components
+from .options import CONSTANT_TYPES, CompilerOptions
+from .resolve import is_builtin
+from .walk import count_assignments, defined_names, find_used_names, iterate_nodes
+
+STATIC_NODES = (
+    ast.Constant,
+    ast.UnaryOp,
+    ast.BinOp,
+    ast.BoolOp,
+    ast.Compare,
+    ast.IfExp,
+    ast.Tuple,
+    ast.JoinedStr,
+    ast.FormattedValue,
+    ast.expr_context,
+    ast.unaryop,
+    ast.boolop,
+    ast.cmpop,
+    ast.operator,
+)
+
+# The same limits CPython's AST optimizer folds constants with, so building a
+# template can't create huge values
+MAX_INT_SIZE = 128  # Bits
+MAX_COLLECTION_SIZE = 256
+MAX_STR_SIZE = 4096
+
+NodeT = t.TypeVar("NodeT", bound=ast.AST)
+StaticKey: t.TypeAlias = t.Tuple[str, t.Tuple[t.Tuple[str, type, t.Any], ...]]
+
+
+def fold_template(
+    template: Template,
+    lookup: t.Dict[str, Template],
+    options: CompilerOptions,
+    render_components: bool = True,
+) -> Template:
+    """
+    Evaluate the expressions and components that don't use the render context.
+
+    Their output is merged into the surrounding HTML, so a template without
+    any dynamic parts is compiled to a single string. Branches with a constant
+    condition are removed, along with any components only used in them.
+    """
+    folder = Folder(
+        template,
+        lookup,
+        options,
+        stack=(template.name,),
+        static_html={},
+        render_components=render_components,
+    )
+    return folder.fold()
+
+
+class Folder:
+    template: Template
+    lookup: t.Dict[str, Template]
+    options: CompilerOptions
+    stack: t.Tuple[str, ...]
+    static_html: t.Dict[StaticKey, t.Optional[str]]
+    "The output of each component call that was rendered at build time"
+    values: t.Dict[str, t.Any]
+    "Variables that are known to have a constant value"
+    render_components: bool
+    _assignments: t.Counter[str]
+    _component_names: t.Dict[str, str]
+
+    def __init__(
+        self,
+        template: Template,
+        lookup: t.Dict[str, Template],
+        options: CompilerOptions,
+        stack: t.Tuple[str, ...],
+        static_html: t.Dict[StaticKey, t.Optional[str]],
+        arguments: t.Mapping[str, t.Any] = {},
+        render_components: bool = True,
+    ):
+        self.template = template
+        self.lookup = lookup
+        self.options = options
+        self.stack = stack
+        self.static_html = static_html
+        self.render_components = render_components
+        self._assignments = count_assignments(template.body)
+        self._component_names = {
+            _import.target: _import.name for _import in template.imports
+        }
+        self.values = self.find_constants(arguments)
+
+    def fold(self) -> Template:
+        body = self.fold_block(self.template.body)
+
+        # Components that are rendered at build time or in removed
+        # branches no longer need to be imported
+        used_names = find_used_names(body)
+        imports = [
+            _import for _import in self.template.imports if _import.target in used_names
+        ]
+        return replace(self.template, body=body, imports=imports)
+
+    def find_constants(self, arguments: t.Mapping[str, t.Any]) -> t.Dict[str, t.Any]:
+        assigned_names = {*self._component_names, *self._assignments}
+        for node in iterate_nodes(self.template.body):
+            if isinstance(node, CodeNode):
+                assigned_names.update(defined_names(node.body))
+
+        parameter_names = {param.name for param in self.template.parameters}
+        values = {
+            name: value
+            for name, value in self.options.constants.items()
+            if name not in assigned_names
+            and name not in parameter_names
+            and not is_builtin(name)
+        }
+        values.update(
+            (name, value)
+            for name, value in arguments.items()
+            if name not in assigned_names
+        )
+        return values
+
+    def fold_block(self, block: TemplateBlock) -> t.List[Node]:
+        output: t.List[Node] = []
+        for node in block:
+            output.extend(self.fold_node(node))
+
+        return merge_html_nodes(output)
+
+    def fold_node(self, node: Node) -> t.List[Node]:
+        if isinstance(node, ExprNode):
+            value = self.substitute(node.value)
+            is_static, result = evaluate_static(value, ESCAPERS[node.context])
+            if is_static:
+                return [HtmlNode(result)]
+            return [replace(node, value=value)]
+        elif isinstance(node, RawExprNode):
+            value = self.substitute(node.value)
+            is_static, result = evaluate_static(value)
+            if is_static and isinstance(result, str):
+                return [HtmlNode(result)]
+            return [replace(node, value=value)]
+        elif isinstance(node, CodeNode):
+            body = self.fold_code(node.body)
+            return [CodeNode(body=body)] if len(body) > 0 else []
+        elif isinstance(node, ComponentNode):
+            node = replace(
+                node,
+                keywords={
+                    key: self.substitute(value) for key, value in node.keywords.items()
+                },
+            )
+            html = self.render_component(node) if self.render_components else None
+            return [HtmlNode(html)] if html is not None else [node]
+        elif isinstance(node, IfNode):
+            return self.fold_if(node)
+        elif isinstance(node, ForNode):
+            return [
+                replace(
+                    node,
+                    iterable=self.substitute(node.iterable),
+                    loop_block=self.fold_block(node.loop_block),
+                )
+            ]
+        elif isinstance(node, BlockNode):
+            return [replace(node, body=self.fold_block(node.body))]
+        elif isinstance(node, SlotNode) and node.default is not None:
+            return [replace(node, default=self.fold_block(node.default))]
+        elif isinstance(node, DeferNode):
+            return [
+                replace(
+                    node,
+                    body=self.fold_block(node.body),
+                    placeholder=(
+                        self.fold_block(node.placeholder)
+                        if node.placeholder is not None
+                        else None
+                    ),
+                    fallback=(
+                        self.fold_block(node.fallback)
+                        if node.fallback is not None
+                        else None
+                    ),
+                    timeout=(
+                        self.substitute(node.timeout)
+                        if node.timeout is not None
+                        else None
+                    ),
+                )
+            ]
+        else:
+            return [node]
+
+    def fold_if(self, node: IfNode) -> t.List[Node]:
+        branches: t.List[t.Tuple[ast.expr, TemplateBlock]] = []
+        else_block = node.else_block
+        for condition, block in [(node.condition, node.if_block), *node.elif_blocks]:
+            condition = self.substitute(condition)
+            is_static, value = evaluate_static(condition)
+            if not is_static:
+                branches.append((condition, block))
+            elif value:
+                else_block = block  # The branches after this can never be used
+                break
+
+        if len(branches) == 0:
+            return self.fold_block(else_block) if else_block is not None else []
+
+        (condition, if_block), *elif_blocks = branches
+        return [
+            IfNode(
+                condition=condition,
+                if_block=self.fold_block(if_block),
+                elif_blocks=[
+                    (condition, self.fold_block(block))
+                    for condition, block in elif_blocks
+                ],
+                else_block=(
+                    self.fold_block(else_block) if else_block is not None else None
+                ),
+            )
+        ]
+
+    def fold_code(self, body: t.List[ast.stmt]) -> t.List[ast.stmt]:
+        output: t.List[ast.stmt] = []
+        for statement in body:
+            statement = self.substitute(statement)
+            name = inline_parameter_name(statement)
+            if name is None or self._assignments[name] != 1:
+                output.append(statement)
+                continue
+
+            # Parameters of inlined components are only assigned once, so
+            # constant values can be used in place of the variable
+            is_static, value = evaluate_static(t.cast(ast.Assign, statement).value)
+            if is_static and type(value) in CONSTANT_TYPES:
+                self.values[name] = value
+            else:
+                output.append(statement)
+
+        return output
+
+    def render_component(self, call: ComponentNode) -> t.Optional[str]:
+        name = self._component_names.get(call.component_name)
+        if name is None or name not in self.lookup:
+            return None
+
+        keywords: t.Dict[str, t.Any] = {}
+        for key, value in call.keywords.items():
+            is_static, keywords[key] = evaluate_static(value)
+            if not is_static:
+                return None
+
+        component = self.lookup[name]
+        arguments: t.Dict[str, t.Any] = {}
+        for param in component.parameters:
+            if param.name in keywords:
+                is_static, value = True, keywords[param.name]
+            elif param.default is not None:
+                is_static, value = evaluate_static(param.default)
+            else:
+                return None  # Missing arguments are raised when rendering
+
+            type_name = parameter_numeric_type(param.type, param.default)
+            if (
+                self.options.strict_types
+                and type_name is not None
+                and type(value) not in NUMERIC_TYPES[type_name]
+            ):
+                return None  # Type errors are also raised when rendering
+
+            if is_static and type(value) in CONSTANT_TYPES:
+                arguments[param.name] = value
+
+        return self.render_static_component(component, arguments)
+
+    def render_static_component(
+        self,
+        component: Template,
+        arguments: t.Dict[str, t.Any],
+    ) -> t.Optional[str]:
+        # Values such as 1 and True are equal, so the type is part of the key
+        key = (
+            component.name,
+            tuple(
+                (name, type(value), value) for name, value in sorted(arguments.items())
+            ),
+        )
+        if key in self.static_html:
+            return self.static_html[key]
+        if component.name in self.stack:
+            return None
+
+        html = None
+        if (
+            component.inline is not False
+            and component.layout is None
+            and not isinstance(component, LayoutTemplate)
+        ):
+            component = inline_components(component, self.lookup, self.options)
+            folder = Folder(
+                component,
+                self.lookup,
+                self.options,
+                (*self.stack, component.name),
+                self.static_html,
+                arguments,
+            )
+            body = folder.fold_block(component.body)
+
+            # Components are called without their styles
+            if all(isinstance(node, (HtmlNode, StyleNode)) for node in body):
+                html = "".join(node.html for node in body if isinstance(node, HtmlNode))
+
+        self.static_html[key] = html
+        return html
+
+    def substitute(self, node: NodeT) -> NodeT:
+        "Replace variables with a constant value with the value"
+        if not any(
+            isinstance(child, ast.Name) and child.id in self.values
+            for child in ast.walk(node)
+        ):
+            return node
+
+        node = copy.deepcopy(node)
+        return ConstantSubstituter(self.values).visit(node)
+
+
+class ConstantSubstituter(ast.NodeTransformer):
+    values: t.Dict[str, t.Any]
+
+    def __init__(self, values: t.Dict[str, t.Any]):
+        self.values = values
+
+    def visit_Name(self, node: ast.Name) -> ast.expr:
+        if node.id not in self.values or not isinstance(node.ctx, ast.Load):
+            return node
+
+        return ast.copy_location(ast.Constant(value=self.values[node.id]), node)
+
+
+def evaluate_static(
+    expr: ast.expr,
+    convert: t.Optional[t.Callable[[t.Any], t.Any]] = None,
+) -> t.Tuple[bool, t.Any]:
+    """
+    Evaluate an expression if it only uses constants, returning if it was evaluated.
+
+    The value is passed to `convert` if it's given, expressions that fail to
+    evaluate or convert are left until the template is rendered, which is
+    where the error is raised.
+    """
+    if not isinstance(expr, ast.Constant):
+        for node in ast.walk(expr):
+            # Powers can create huge values, so they're left until they're rendered
+            if not isinstance(node, STATIC_NODES) or isinstance(node, ast.Pow):
+                return False, None
+
+            # Formatting with a width could also create a huge string
+            if isinstance(node, ast.FormattedValue) and node.format_spec is not None:
+                return False, None
+
+    try:
+        if isinstance(expr, ast.Constant):
+            value = expr.value
+        else:
+            code = compile_static(expr)
+            value = eval(code, {"__builtins__": {}, BINOP_FUNC: evaluate_binop})
+        return True, convert(value) if convert is not None else value
+    except Exception:
+        return False, None
+
+
+BINOP_FUNC = "__binop"
+BINOP_OPERATORS: t.Dict[t.Type[ast.operator], t.Callable[[t.Any, t.Any], t.Any]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.MatMult: operator.matmul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.LShift: operator.lshift,
+    ast.RShift: operator.rshift,
+    ast.BitOr: operator.or_,
+    ast.BitXor: operator.xor,
+    ast.BitAnd: operator.and_,
+}
+
+
+class ValueTooLarge(Exception):
+    pass
+
+
+class BinOpTransformer(ast.NodeTransformer):
+    "Replace binary operations with calls to `evaluate_binop`"
+
+    def visit_BinOp(self, node: ast.BinOp) -> ast.expr:
+        self.generic_visit(node)
+        op_name = ast.Constant(value=type(node.op).__name__)
+        call = ast.Call(
+            func=ast.Name(id=BINOP_FUNC, ctx=ast.Load()),
+            args=[op_name, node.left, node.right],
+            keywords=[],
+        )
+        return ast.copy_location(call, node)
+
+
+def compile_static(expr: ast.expr) -> CodeType:
+    "Compile an expression so every binary operation checks the size of its result"
+    body = BinOpTransformer().visit(copy.deepcopy(expr))
+    expression = ast.fix_missing_locations(ast.Expression(body=body))
+    return compile(expression, "<tempered>", "eval")
+
+
+def evaluate_binop(op_name: str, left: t.Any, right: t.Any) -> t.Any:
+    "Run a binary operation, unless it'd create a value CPython wouldn't fold"
+    op = getattr(ast, op_name)
+    if op is ast.Mult:
+        check_multiply(left, right)
+    elif op is ast.LShift:
+        check_lshift(left, right)
+    elif op is ast.Mod and isinstance(left, (str, bytes)):
+        raise ValueTooLarge()  # Formatting with a width could create a huge string
+
+    return BINOP_OPERATORS[op](left, right)
+
+
+def check_multiply(left: t.Any, right: t.Any):
+    if isinstance(left, int) and isinstance(right, int):
+        if left.bit_length() + right.bit_length() > MAX_INT_SIZE:
+            raise ValueTooLarge()
+        return
+
+    if isinstance(left, int):
+        left, right = right, left
+
+    if not isinstance(right, int):
+        return
+
+    if isinstance(left, (str, bytes)):
+        limit = MAX_STR_SIZE
+    elif isinstance(left, tuple):
+        limit = MAX_COLLECTION_SIZE
+    else:
+        return
+
+    if right > 0 and len(left) * right > limit:
+        raise ValueTooLarge()
+
+
+def check_lshift(left: t.Any, right: t.Any):
+    if isinstance(left, int) and isinstance(right, int) and right >= 0:
+        if left.bit_length() + right > MAX_INT_SIZE:
+            raise ValueTooLarge()
+
+
+def inline_parameter_name(statement: ast.stmt) -> t.Optional[str]:
+    if (
+        isinstance(statement, ast.Assign)
+        and len(statement.targets) == 1
+        and isinstance(statement.targets[0], ast.Name)
+        and statement.targets[0].id.startswith(constants.INLINE_PREFIX)
+    ):
+        return statement.targets[0].id
+    else:
+        return None
+
+
+def merge_html_nodes(block: t.List[Node]) -> t.List[Node]:
+    "Combine sequential HTML nodes, without changing their whitespace"
+    output: t.List[Node] = []
+    for node in block:
+        if isinstance(node, HtmlNode) and node.html == "":
+            continue
+
+        if isinstance(node, HtmlNode) and len(output) > 0:
+            previous = output[-1]
+            if isinstance(previous, HtmlNode):
+                output[-1] = HtmlNode(previous.html + node.html)
+                continue
+
+        output.append(node)
+
+    return output
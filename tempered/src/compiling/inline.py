@@ -0,0 +1,331 @@
+"Inlines the body of small components into the templates that use them"
+import ast
+from dataclasses import replace
+import typing_extensions as t
+from ..parsing.nodes import (
+    BlockNode, CodeNode, ComponentNode, DeferNode, ExprNode, FlushNode, ForNode,
+    HtmlNode, IfNode, ImportNode, LayoutTemplate, Node, RawExprNode, SlotNode,
+    StyleNode, Template, TemplateBlock,
+)
+from ..utils import ast_utils
+from . import constants
+from .asynchronous import is_async
+from .calls import has_explicit_props
+from .escaping import create_type_check, parameter_numeric_type
+from .options import CompilerOptions
+from .resolve import NameTransformer, extract_loop_variables
+from .walk import find_used_names, iterate_nodes
+
+UNINLINABLE_NODES = (CodeNode, SlotNode, BlockNode, ImportNode)
+
+
+def inline_components(
+    template: Template,
+    lookup: t.Dict[str, Template],
+    options: CompilerOptions,
+) -> Template:
+    """
+    Replace calls to small components with the body of the component.
+
+    Parameters and loop variables of inlined components are renamed, and any
+    other variables are resolved from the context, so the inlined code behaves
+    the same as calling the component.
+    """
+    inliner = Inliner(template, lookup, options)
+    component_names = {_import.target: _import.name for _import in template.imports}
+    body = inliner.inline_block(template.body, component_names, (template.name,))
+    if inliner.count == 0:
+        return template
+
+    # Inlined components no longer need to be imported
+    used_names = find_used_names(body)
+    imports = [
+        _import
+        for _import in [*template.imports, *inliner.imports]
+        if _import.target in used_names
+    ]
+    return replace(template, body=body, imports=imports)
+
+
+class Inliner:
+    template: Template
+    lookup: t.Dict[str, Template]
+    options: CompilerOptions
+    imports: t.List[ImportNode]
+    count: int
+    _caller_names: t.Set[str]
+
+    def __init__(
+        self,
+        template: Template,
+        lookup: t.Dict[str, Template],
+        options: CompilerOptions,
+    ):
+        self.template = template
+        self.lookup = lookup
+        self.options = options
+        self.imports = []
+        self.count = 0
+        self._caller_names = {
+            constants.WITH_STYLES,
+            *(param.name for param in template.parameters),
+            *(_import.target for _import in template.imports),
+            *find_used_names(template.body),
+        }
+
+    def inline_block(
+        self,
+        block: TemplateBlock,
+        component_names: t.Dict[str, str],
+        stack: t.Tuple[str, ...],
+    ) -> t.List[Node]:
+        output: t.List[Node] = []
+        for node in block:
+            if isinstance(node, ComponentNode):
+                name = component_names.get(node.component_name)
+                inlined = self.inline_component(node, name, stack)
+                if inlined is not None:
+                    output.extend(inlined)
+                else:
+                    output.append(node)
+            elif isinstance(node, IfNode):
+                output.append(
+                    replace(
+                        node,
+                        if_block=self.inline_block(node.if_block, component_names, stack),
+                        elif_blocks=[
+                            (condition, self.inline_block(block, component_names, stack))
+                            for condition, block in node.elif_blocks
+                        ],
+                        else_block=(
+                            self.inline_block(node.else_block, component_names, stack)
+                            if node.else_block is not None
+                            else None
+                        ),
+                    )
+                )
+            elif isinstance(node, ForNode):
+                loop_block = self.inline_block(node.loop_block, component_names, stack)
+                output.append(replace(node, loop_block=loop_block))
+            elif isinstance(node, BlockNode):
+                body = self.inline_block(node.body, component_names, stack)
+                output.append(replace(node, body=body))
+            elif isinstance(node, SlotNode) and node.default is not None:
+                default = self.inline_block(node.default, component_names, stack)
+                output.append(replace(node, default=default))
+            elif isinstance(node, DeferNode):
+                output.append(
+                    replace(
+                        node,
+                        body=self.inline_block(node.body, component_names, stack),
+                        placeholder=(
+                            self.inline_block(node.placeholder, component_names, stack)
+                            if node.placeholder is not None
+                            else None
+                        ),
+                        fallback=(
+                            self.inline_block(node.fallback, component_names, stack)
+                            if node.fallback is not None
+                            else None
+                        ),
+                    )
+                )
+            else:
+                output.append(node)
+
+        return output
+
+    def inline_component(
+        self,
+        call: ComponentNode,
+        name: t.Optional[str],
+        stack: t.Tuple[str, ...],
+    ) -> t.Optional[t.List[Node]]:
+        if name is None or name not in self.lookup or name in stack:
+            return None
+
+        component = self.lookup[name]
+        if not self.should_inline(component, call):
+            return None
+
+        prefix = f"{constants.INLINE_PREFIX}{self.count}_"
+        renamer = Renamer(prefix, component, self.options)
+        body = renamer.rename_component(call)
+
+        # Builtins are the only names left unprefixed, they can't be
+        # inlined if the caller shadows them with it's own variables
+        if not renamer.unprefixed_names.isdisjoint(self._caller_names):
+            return None
+
+        self.count += 1
+        component_names: t.Dict[str, str] = {}
+        for _import in component.imports:
+            target = prefix + _import.target
+            component_names[target] = _import.name
+            self.imports.append(ImportNode(target=target, name=_import.name))
+
+        return self.inline_block(body, component_names, (*stack, component.name))
+
+    def should_inline(self, component: Template, call: ComponentNode) -> bool:
+        if isinstance(component, LayoutTemplate) or component.layout is not None:
+            return False
+
+        nodes = list(iterate_nodes(component.body))
+        if any(isinstance(node, UNINLINABLE_NODES) for node in nodes):
+            return False
+
+        if component.inline is False:
+            return False
+        if component.inline is None and len(nodes) > self.options.inline_threshold:
+            return False
+        # Async components are called, so they can be awaited with their siblings
+        if (
+            component.inline is None
+            and self.options.concurrent_awaits
+            and is_async(component, self.lookup)
+        ):
+            return False
+
+        parameter_names = {param.name for param in component.parameters}
+        if not parameter_names.issuperset(call.keywords):
+            return False  # Extra keywords are passed through the context
+
+        return all(
+            param.name in call.keywords
+            for param in component.parameters
+            if param.default is None
+        )
+
+
+class Renamer:
+    prefix: str
+    component: Template
+    options: CompilerOptions
+    unprefixed_names: t.Set[str]
+
+    def __init__(self, prefix: str, component: Template, options: CompilerOptions):
+        self.prefix = prefix
+        self.component = component
+        self.options = options
+        self.unprefixed_names = set()
+
+    def rename_component(self, call: ComponentNode) -> t.List[Node]:
+        parameters = {param.name: param for param in self.component.parameters}
+        assignments: t.List[ast.stmt] = []
+        for name, value in call.keywords.items():
+            # Keyword values are the caller's code, so they aren't renamed
+            target = ast_utils.Name(self.prefix + name)
+            assignments.append(ast_utils.Assign(target=target, value=value))
+
+            param = parameters[name]
+            type_name = parameter_numeric_type(param.type, param.default)
+            if self.options.strict_types and type_name is not None:
+                assignments.append(create_type_check(name, target.id, type_name))
+
+        for name, param in parameters.items():
+            if name in call.keywords:
+                continue
+
+            # Defaults don't have access to other parameters
+            default = self.rename_expr(t.cast(ast.expr, param.default), [])
+            target = ast_utils.Name(self.prefix + name)
+            assignments.append(ast_utils.Assign(target=target, value=default))
+
+        known_names = [
+            *parameters,
+            *(_import.target for _import in self.component.imports),
+        ]
+        body = self.rename_block(self.component.body, known_names)
+        if len(assignments) == 0:
+            return body
+
+        return [CodeNode(body=assignments), *body]
+
+    def rename_block(
+        self, block: TemplateBlock, known_names: t.List[str]
+    ) -> t.List[Node]:
+        return [
+            renamed
+            for node in block
+            if (renamed := self.rename_node(node, known_names)) is not None
+        ]
+
+    def rename_optional_block(
+        self, block: t.Optional[TemplateBlock], known_names: t.List[str]
+    ) -> t.Optional[t.List[Node]]:
+        return self.rename_block(block, known_names) if block is not None else None
+
+    def rename_node(self, node: Node, known_names: t.List[str]) -> t.Optional[Node]:
+        if isinstance(node, (HtmlNode, FlushNode)):
+            return node
+        elif isinstance(node, StyleNode):
+            return None  # Components are called without their styles
+        elif isinstance(node, (ExprNode, RawExprNode)):
+            return replace(node, value=self.rename_expr(node.value, known_names))
+        elif isinstance(node, ComponentNode):
+            return ComponentNode(
+                component_name=self.prefix + node.component_name,
+                keywords={
+                    key: self.rename_expr(value, known_names)
+                    for key, value in node.keywords.items()
+                },
+            )
+        elif isinstance(node, IfNode):
+            return IfNode(
+                condition=self.rename_expr(node.condition, known_names),
+                if_block=self.rename_block(node.if_block, known_names),
+                elif_blocks=[
+                    (
+                        self.rename_expr(condition, known_names),
+                        self.rename_block(block, known_names),
+                    )
+                    for condition, block in node.elif_blocks
+                ],
+                else_block=(
+                    self.rename_block(node.else_block, known_names)
+                    if node.else_block is not None
+                    else None
+                ),
+            )
+        elif isinstance(node, ForNode):
+            loop_names = [*known_names, *extract_loop_variables(node.target)]
+            return ForNode(
+                target=self.prefix_names(ast_utils.copy(node.target), loop_names),
+                iterable=self.rename_expr(node.iterable, known_names),
+                loop_block=self.rename_block(node.loop_block, loop_names),
+                is_async=node.is_async,
+            )
+        elif isinstance(node, DeferNode):
+            return DeferNode(
+                body=self.rename_block(node.body, known_names),
+                placeholder=self.rename_optional_block(node.placeholder, known_names),
+                fallback=self.rename_optional_block(node.fallback, known_names),
+                timeout=(
+                    self.rename_expr(node.timeout, known_names)
+                    if node.timeout is not None
+                    else None
+                ),
+            )
+        else:
+            raise ValueError(f"Cannot inline {node}")
+
+    def rename_expr(self, expr: ast.expr, known_names: t.List[str]) -> ast.expr:
+        # Unknown variables are resolved before renaming, so they still
+        # come from the context instead of the caller's variables
+        expr = ast_utils.copy(expr)
+        explicit_props = has_explicit_props(self.component, self.options)
+        transformer = NameTransformer(list(known_names), self.options, explicit_props)
+        expr = transformer.visit(expr)
+        return self.prefix_names(expr, known_names)
+
+    def prefix_names(self, expr: ast.expr, known_names: t.List[str]) -> ast.expr:
+        for node in ast.walk(expr):
+            if not isinstance(node, ast.Name) or node.id.startswith("__"):
+                continue
+
+            if node.id in known_names:
+                node.id = self.prefix + node.id
+            else:
+                self.unprefixed_names.add(node.id)
+
+        return expr
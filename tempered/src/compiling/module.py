@@ -1,9 +1,14 @@
 import ast
+import linecache
+from types import CodeType
 import typing_extensions as t
 from ..parsing.nodes import LayoutTemplate, Template
 from ..utils import ast_utils
 from . import constants, validate
 from .css import generate_template_css
+from .fold import fold_template
+from .inline import inline_components
+from .options import CompilerOptions
 from .template import create_template_function
 
 
@@ -14,28 +19,50 @@ def default_module_code() -> str:
 def create_template_functions_code(
     templates: t.List[Template],
     existing_templates: t.List[Template],
+    options: CompilerOptions,
 ) -> str:
-    all_templates = [*templates, *existing_templates]
-
-    validate.validate_templates(all_templates)
+    all_templates = [*existing_templates, *templates]
     lookup = {template.name: template for template in all_templates}
-    layout_lookup = {
-        template.name: template
-        for template in all_templates
-        if isinstance(template, LayoutTemplate)
-    }
-
-    functions: t.List[ast.FunctionDef] = []
-    for template in templates:
-        if template.layout is None:
-            layout = None
-        else:
-            layout = layout_lookup[template.layout]
-
-        css = generate_template_css(template, lookup)
-        func = create_template_function(template, layout, css)
-        functions.append(func)
+    validate.validate_templates(templates, lookup, options)
+
+    functions = [create_function(template, lookup, options) for template in templates]
 
     output_module = ast_utils.Module(functions)
     source = ast_utils.unparse(output_module)
     return source
+
+
+def create_template_code(
+    template: Template,
+    lookup: t.Dict[str, Template],
+    options: CompilerOptions,
+    keep_source: bool = False,
+) -> CodeType:
+    func = create_function(template, lookup, options)
+    output_module = ast_utils.Module([func])
+    filename = f"<tempered {template.name}>"
+    if not keep_source:
+        return compile(output_module, filename, "exec")
+
+    # Compiling from the source lets tracebacks and inspect show the generated code
+    source = ast_utils.unparse(output_module)
+    lines = source.splitlines(keepends=True)
+    linecache.cache[filename] = (len(source), None, lines, filename)
+    return compile(source, filename, "exec")
+
+
+def create_function(
+    template: Template,
+    lookup: t.Dict[str, Template],
+    options: CompilerOptions,
+) -> ast.FunctionDef:
+    if template.layout is None:
+        layout = None
+    else:
+        layout = t.cast(LayoutTemplate, lookup[template.layout])
+
+    # Inlined components are still dependencies, so the CSS is created first
+    css = generate_template_css(template, lookup, options)
+    template = inline_components(template, lookup, options)
+    template = fold_template(template, lookup, options)
+    return create_template_function(template, layout, css, lookup, options)
@@ -0,0 +1,70 @@
+from dataclasses import dataclass, field, replace
+import typing_extensions as t
+
+AccumulatorType: t.TypeAlias = t.Literal["concat", "join"]
+
+
+@dataclass(frozen=True)
+class CompilerOptions:
+    accumulator: AccumulatorType = "concat"
+    """
+    How the output of a template is built.
+
+    `concat` appends each part to a string, `join` collects the parts into a
+    list which is joined once when the template returns.
+    """
+    inline_threshold: int = 32
+    """
+    Components with at most this many nodes are inlined into the templates
+    that use them, `0` only inlines components with `inline: true` set.
+    """
+    strict_types: bool = False
+    """
+    Check the type of parameters declared as `int`, `float` or `bool` when a
+    template is called, so they can be rendered without being escaped.
+    """
+    explicit_props: bool = False
+    """
+    Components are only passed their parameters, instead of the render context.
+    Templates can override this with `explicit_props` in their metadata.
+    """
+    concurrent_awaits: bool = True
+    """
+    Await async components and expressions that are only separated by HTML at
+    the same time, instead of one after another.
+    """
+    streaming: bool = False
+    """
+    Also compile each template to a generator, which yields the output in
+    chunks as it's rendered.
+    """
+    stream_chunk_size: int = 8192
+    "The minimum length of the chunks streamed templates yield, except the last"
+    constants: t.Mapping[str, t.Any] = field(default_factory=dict)
+    "Frozen globals with literal values, these are compiled into the templates"
+    frozen_globals: t.Tuple[str, ...] = ()
+    """
+    The name of every frozen global, these are read from the globals without
+    checking the render context.
+    """
+
+
+CONSTANT_TYPES = (type(None), str, bytes, bool, int, float, complex)
+
+
+def freeze_globals(
+    options: CompilerOptions,
+    names: t.Iterable[str],
+    values: t.Mapping[str, t.Any],
+) -> CompilerOptions:
+    frozen_globals = sorted({*options.frozen_globals, *names})
+    constants = {
+        name: values[name]
+        for name in frozen_globals
+        if type(values[name]) in CONSTANT_TYPES
+    }
+    return replace(
+        options,
+        constants=constants,
+        frozen_globals=tuple(frozen_globals),
+    )
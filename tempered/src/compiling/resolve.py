@@ -1,18 +1,162 @@
 import ast
 import builtins
+import copy
 from functools import lru_cache
 import typing_extensions as t
+from ..utils import ast_utils
 from . import constants
-from .calls import create_resolve_call
+from .calls import create_global_lookup, create_resolve_call
+from .options import CompilerOptions
 
 
 def create_resolve_for_unknown_variables(
-    body: t.List[ast.stmt], known_names: t.List[str]
-):
-    transformer = NameTransformer(known_names)
+    body: t.List[ast.stmt],
+    known_names: t.List[str],
+    options: CompilerOptions,
+) -> t.List[ast.stmt]:
+    # The body shares nodes with the parsed template, which is compiled again
+    # if a dependency changes, so the original nodes can't be modified
+    body = copy.deepcopy(body)
+    transformer = NameTransformer(known_names, options)
     for node in body:
         transformer.visit(node)
 
+    return hoist_resolve_calls(body)
+
+
+def hoist_resolve_calls(body: t.List[ast.stmt]) -> t.List[ast.stmt]:
+    """
+    Resolve each unknown variable once per function, when it's first used.
+
+    Uses are replaced with a local variable, which is resolved by a check
+    before each statement that uses it. So a missing variable still only
+    fails if a statement that needs it is run.
+    """
+    hoister = ResolveHoister()
+    body = hoister.visit_block(body)
+
+    assignments = [
+        ast_utils.Assign(target=variable, value=ast_utils.Name(constants.UNSET_VAR))
+        for variable in hoister.resolved
+    ]
+    assignments += [
+        ast_utils.Assign(target=variable, value=value)
+        for variable, value in hoister.global_lookups.items()
+    ]
+    return [*assignments, *body]
+
+
+def hoisted_variable_name(name: str, context: str) -> str:
+    if context == constants.NO_CONTEXT_VAR:
+        return constants.HOISTED_NO_CONTEXT_PREFIX + name
+    else:
+        return constants.HOISTED_PREFIX + name
+
+
+class ResolveHoister(ast.NodeTransformer):
+    resolved: t.Dict[str, None]
+    "The variable of each resolved name, in the order they're first used"
+    global_lookups: t.Dict[str, ast.expr]
+    "The value of each frozen global, these are always defined"
+    _statement_uses: t.Dict[str, ast.Call]
+
+    def __init__(self):
+        self.resolved = {}
+        self.global_lookups = {}
+        self._statement_uses = {}
+
+    def visit_block(self, body: t.List[ast.stmt]) -> t.List[ast.stmt]:
+        output: t.List[ast.stmt] = []
+        for statement in body:
+            output.extend(self.visit_statement(statement))
+
+        return output
+
+    def visit_statement(self, statement: ast.stmt) -> t.List[ast.stmt]:
+        self._statement_uses = {}
+        if isinstance(statement, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            # Nested functions are run later, so resolve their variables then
+            statement.body = hoist_resolve_calls(statement.body)
+        elif isinstance(statement, (ast.If, ast.While)):
+            statement.test = self.visit(statement.test)
+        elif isinstance(statement, (ast.For, ast.AsyncFor)):
+            statement.iter = self.visit(statement.iter)
+        elif isinstance(statement, (ast.With, ast.AsyncWith)):
+            statement.items = [self.visit(item) for item in statement.items]
+        elif not isinstance(statement, ast.Try):
+            statement = self.visit(statement)
+
+        guards = [
+            create_resolve_guard(variable, value)
+            for variable, value in self._statement_uses.items()
+        ]
+        # Blocks inside the statement resolve variables when they're run
+        for field in ("body", "orelse", "finalbody"):
+            if not isinstance(statement, ast.FunctionDef) and hasattr(statement, field):
+                setattr(statement, field, self.visit_block(getattr(statement, field)))
+
+        if isinstance(statement, ast.Try):
+            for handler in statement.handlers:
+                handler.body = self.visit_block(handler.body)
+
+        return [*guards, statement]
+
+    def visit_Lambda(self, node: ast.Lambda) -> ast.expr:
+        return node  # Lambdas are called later, so resolve their variables then
+
+    def visit_Call(self, node: ast.Call) -> ast.expr:
+        node = t.cast(ast.Call, self.generic_visit(node))
+        if not is_resolve_call(node):
+            return node
+
+        name = t.cast(ast.Constant, node.args[0]).value
+        context = t.cast(ast.Name, node.args[1]).id
+        variable = hoisted_variable_name(name, context)
+        self.resolved[variable] = None
+        self._statement_uses[variable] = node
+        return ast_utils.Name(variable)
+
+    def visit_Subscript(self, node: ast.Subscript) -> ast.expr:
+        node = t.cast(ast.Subscript, self.generic_visit(node))
+        if not is_global_lookup(node):
+            return node
+
+        # Frozen globals don't need to check the context
+        name = t.cast(ast.Constant, node.slice).value
+        variable = hoisted_variable_name(name, constants.GLOBALS_VAR)
+        self.global_lookups[variable] = node
+        return ast_utils.Name(variable)
+
+
+def create_resolve_guard(variable: str, value: ast.expr) -> ast.stmt:
+    return ast_utils.If(
+        ast_utils.Is(ast_utils.Name(variable), ast_utils.Name(constants.UNSET_VAR)),
+        ast_utils.Assign(target=variable, value=value),
+    )
+
+
+def is_resolve_call(node: ast.Call) -> bool:
+    return (
+        isinstance(node.func, ast.Name)
+        and node.func.id == constants.RESOLVE_FUNC
+        and len(node.args) == 2
+        and len(node.keywords) == 0
+        and isinstance(node.args[0], ast.Constant)
+        and isinstance(node.args[0].value, str)
+        and isinstance(node.args[1], ast.Name)
+        and node.args[1].id in (constants.KWARGS_VAR, constants.NO_CONTEXT_VAR)
+    )
+
+
+def is_global_lookup(node: ast.Subscript) -> bool:
+    return (
+        isinstance(node.value, ast.Name)
+        and node.value.id == constants.GLOBALS_VAR
+        and isinstance(node.slice, ast.Constant)
+        and isinstance(node.slice.value, str)
+        and isinstance(node.ctx, ast.Load)
+    )
+
 
 class NameTransformer(ast.NodeTransformer):
     RESERVED_NAMES = (
@@ -21,9 +165,19 @@ class NameTransformer(ast.NodeTransformer):
         constants.NAME_LOOKUP_VAR,
     )
     known_names: t.List[str]
+    options: CompilerOptions
+    explicit_props: bool
+    "Unknown variables in inlined components aren't resolved from the caller's context"
 
-    def __init__(self, known_names: t.List[str]):
+    def __init__(
+        self,
+        known_names: t.List[str],
+        options: CompilerOptions = CompilerOptions(),
+        explicit_props: bool = False,
+    ):
         self.known_names = known_names
+        self.options = options
+        self.explicit_props = explicit_props
 
     def visit_Assign(self, node: ast.Assign):
         for target in node.targets:
@@ -35,6 +189,23 @@ class NameTransformer(ast.NodeTransformer):
     def visit_Name(self, node: ast.Name):
         return self.resolve(node)
 
+    def visit_FunctionDef(self, node: t.Union[ast.FunctionDef, ast.AsyncFunctionDef]):
+        # Deferred blocks bind the template's variables with defaults, ones that
+        # aren't defined yet are resolved when the function is called instead
+        arguments = node.args
+        bound = arguments.args[len(arguments.args) - len(arguments.defaults) :]
+        unbound = arguments.args[: len(arguments.args) - len(arguments.defaults)]
+        bound_defaults = [
+            (arg, default)
+            for arg, default in zip(bound, arguments.defaults)
+            if not isinstance(default, ast.Name) or self.resolve(default) is default
+        ]
+        arguments.args = [*unbound, *(arg for arg, _ in bound_defaults)]
+        arguments.defaults = [default for _, default in bound_defaults]
+        return self.generic_visit(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
     def visit_For(self, node: ast.For):
         loop_vars = extract_loop_variables(node.target)
         self.known_names.extend(loop_vars)
@@ -42,6 +213,8 @@ class NameTransformer(ast.NodeTransformer):
         self.known_names = self.known_names[: -len(loop_vars)]
         return output_node
 
+    visit_AsyncFor = visit_For
+
     def _visit_comp(
         self, node: t.Union[ast.ListComp, ast.SetComp, ast.DictComp, ast.GeneratorExp]
     ):
@@ -81,7 +254,14 @@ class NameTransformer(ast.NodeTransformer):
         ):
             return name
 
-        return create_resolve_call(name.id)
+        if name.id in self.options.constants:
+            return ast_utils.Constant(self.options.constants[name.id])
+        elif name.id in self.options.frozen_globals:
+            return create_global_lookup(name.id)
+        elif self.explicit_props:
+            return create_resolve_call(name.id, constants.NO_CONTEXT_VAR)
+        else:
+            return create_resolve_call(name.id)
 
 
 def extract_loop_variables(target: ast.expr) -> t.List[str]:
@@ -2,12 +2,22 @@ from __future__ import annotations
 import ast
 import typing_extensions as t
 from ..parsing.nodes import (
-    BlockNode, CodeNode, ComponentNode, ExprNode, ForNode, HtmlNode, IfNode, ImportNode,
-    Node, RawExprNode, SlotNode, StyleNode,
+    BlockNode, CodeNode, ComponentNode, DeferNode, ExprNode, FlushNode, ForNode,
+    HtmlNode, IfNode, LayoutTemplate, Node, RawExprNode, SlotNode, StyleNode,
+    TemplateBlock,
 )
 from ..utils import ast_utils
-from .calls import create_escape_call, slot_parameter, slot_variable_name
-from .constants import CSS_VARIABLE, KWARGS_VAR, NAME_LOOKUP_VAR, WITH_STYLES
+from .asynchronous import is_async
+from .calls import (
+    create_cancel_check, create_component_call, create_escape_call, is_streamed,
+    slot_parameter, slot_variable_name, stream_variable, streamed_slots,
+)
+from .constants import (
+    CANCEL_TOKEN_VAR, CANCEL_VAR, CONTENT_FUNC, CONTENT_STREAM_VAR, CSS_VARIABLE,
+    DEFER_FALLBACK_FUNC, DEFER_FUNC, DEFER_PLACEHOLDER_FUNC, DEFER_RENDER_FUNC,
+    OUTPUT_VAR, STREAM_CONTENT_FUNC, WITH_STYLES,
+)
+from .walk import count_assignments, find_used_names
 
 if t.TYPE_CHECKING:
     from .builder import BuildContext
@@ -22,7 +32,10 @@ def construct_html(ctx: BuildContext, tag: HtmlNode) -> RuleReturnType:
 
 
 def construct_expr(ctx: BuildContext, tag: ExprNode) -> RuleReturnType:
-    yield ctx.add_expr(create_escape_call(value=tag.value))
+    if ctx.numeric.is_numeric(tag.value, ctx.numeric_names):
+        yield ctx.add_expr(ast_utils.FormatString(tag.value))
+    else:
+        yield ctx.add_expr(create_escape_call(value=tag.value, context=tag.context))
 
 
 def construct_raw_expr(ctx: BuildContext, tag: RawExprNode) -> RuleReturnType:
@@ -30,20 +43,11 @@ def construct_raw_expr(ctx: BuildContext, tag: RawExprNode) -> RuleReturnType:
 
 
 def construct_code(ctx: BuildContext, tag: CodeNode) -> RuleReturnType:
+    numeric_names = ctx.numeric.assigned_variables(tag.body, ctx.numeric_names)
+    ctx.numeric_names = ctx.numeric_names.union(numeric_names)
     yield from tag.body
 
 
-def construct_import(ctx: BuildContext, tag: ImportNode) -> RuleReturnType:
-    template_func = ast_utils.Index(
-        ast_utils.Name(NAME_LOOKUP_VAR),
-        ast_utils.Constant(tag.name),
-    )
-    yield ast_utils.Assign(
-        target=tag.target,
-        value=template_func,
-    )
-
-
 def construct_if(ctx: BuildContext, tag: IfNode) -> RuleReturnType:
     ctx.ensure_output_assigned()
     EMPTY_BODY = [ast_utils.create_stmt("...", ast.Expr)]
@@ -72,13 +76,16 @@ def construct_if(ctx: BuildContext, tag: IfNode) -> RuleReturnType:
 def construct_for(ctx: BuildContext, tag: ForNode) -> RuleReturnType:
     ctx.ensure_output_assigned()
 
-    for_body = ctx.create_block(tag.loop_block)
+    for_body = ctx.create_block(tag.loop_block, ctx.numeric.loop_variables(tag))
     if len(for_body) > 0:
-        yield ast.For(
+        if ctx.cancellable:
+            for_body = [create_cancel_check("loop"), *for_body]
+
+        yield ast_utils.For(
             target=tag.target,
-            iter=tag.iterable,
-            body=for_body,
-            orelse=[],
+            iterable=tag.iterable,
+            body=[*for_body, *ctx.output_variable.flush()],
+            is_async=tag.is_async,
         )
 
 
@@ -91,20 +98,50 @@ def construct_block(ctx: BuildContext, tag: BlockNode) -> RuleReturnType:
 
 def construct_slot(ctx: BuildContext, tag: SlotNode) -> RuleReturnType:
     slot_param = ast_utils.Name(slot_parameter(tag.name))
+    body: t.List[ast.stmt] = []
+    if tag.default is not None:
+        body.append(
+            ast_utils.If(
+                condition=ast_utils.Is(slot_param, ast_utils.None_),
+                if_body=ctx.save_block_output_to_variable(
+                    output=slot_param,
+                    tags=tag.default,
+                ),
+            )
+        )
+    body.append(ctx.add_expr(slot_param))
 
-    if tag.default is None:
-        yield ctx.add_expr(slot_param)
+    slots = streamed_slots(t.cast(LayoutTemplate, ctx.lookup[ctx.template.name]))
+    if tag.name is not None or not ctx.is_streaming or slots is None:
+        yield from body
+        yield from ctx.output_variable.flush()
         return
 
-    if_stmt = ast_utils.If(
-        condition=ast_utils.Is(slot_param, ast_utils.None_),
-        if_body=ctx.save_block_output_to_variable(
-            output=slot_param,
-            tags=tag.default,
-        ),
+    # The page's content streams through the default slot, it continues from
+    # the layout's unsent output and returns the slots after this one
+    _, after = slots
+    targets = [
+        ctx.output_variable.name,
+        *(ast_utils.Name(slot_parameter(name)) for name in after),
+    ]
+    stream_call = ast_utils.Call(
+        func=ast_utils.Name(STREAM_CONTENT_FUNC),
+        arguments=[ast_utils.Name(CONTENT_STREAM_VAR), ctx.output_variable.name],
+    )
+    has_content = ast_utils.Compare(
+        ast.IsNot(), ast_utils.Name(CONTENT_FUNC), ast_utils.None_
     )
-    yield if_stmt
-    yield ctx.add_expr(slot_param)
+    yield ast_utils.If(
+        condition=has_content,
+        if_body=[
+            ast_utils.Assign(
+                target=ast_utils.Tuple(targets),
+                value=ast.YieldFrom(value=stream_call),
+            )
+        ],
+        else_body=body,
+    )
+    yield from ctx.output_variable.flush()
 
 
 def construct_styles(ctx: BuildContext, tag: StyleNode) -> RuleReturnType:
@@ -128,23 +165,102 @@ def construct_styles(ctx: BuildContext, tag: StyleNode) -> RuleReturnType:
             ast_utils.Constant("</style>"),
         )
 
+    # Styles are sent straight away, so the browser can start loading
+    # fonts and images while the rest of the page is rendered
     yield ast_utils.If(
         condition=condition,
-        if_body=ctx.output_variable.create_add(value),
+        if_body=[
+            ctx.output_variable.create_add(value),
+            *ctx.output_variable.flush(force=True),
+        ],
+    )
+
+
+def construct_flush(ctx: BuildContext, tag: FlushNode) -> RuleReturnType:
+    yield from ctx.output_variable.flush(force=True)
+
+
+def construct_defer(ctx: BuildContext, tag: DeferNode) -> RuleReturnType:
+    # Deferring only changes the order the output is sent in when streaming
+    if ctx.is_async or not ctx.options.streaming:
+        yield from ctx.create_block(tag.body)
+        return
+
+    yield create_deferred_function(ctx, DEFER_RENDER_FUNC, tag.body)
+    arguments: t.List[ast.expr] = [ast_utils.Name(DEFER_RENDER_FUNC)]
+    for name, block in [
+        (DEFER_PLACEHOLDER_FUNC, tag.placeholder),
+        (DEFER_FALLBACK_FUNC, tag.fallback),
+    ]:
+        if block is None:
+            arguments.append(ast_utils.None_)
+        else:
+            yield create_deferred_function(ctx, name, block)
+            arguments.append(ast_utils.Name(name))
+
+    arguments.append(tag.timeout if tag.timeout is not None else ast_utils.None_)
+    defer_call = ast_utils.Call(func=ast_utils.Name(DEFER_FUNC), arguments=arguments)
+    yield ctx.add_expr(defer_call)
+
+
+def create_deferred_function(
+    ctx: BuildContext,
+    name: str,
+    block: TemplateBlock,
+) -> ast.FunctionDef:
+    "Create a function that renders a block, which may be called from another thread"
+    # Variables the template assigns are bound when the block is deferred,
+    # since the template can change them before the block is rendered
+    assigned_names = {param.name for param in ctx.template.parameters}
+    assigned_names.update(count_assignments(ctx.template.body))
+    bound_names = sorted(assigned_names.intersection(find_used_names(block)))
+
+    body: t.List[ast.stmt] = []
+    if ctx.cancellable:
+        # Deferred blocks have their own cancel token, so they stop once they
+        # time out
+        cancel_token = ast_utils.Call(
+            ast_utils.Attribute(ast_utils.Name(CANCEL_TOKEN_VAR), "get")
+        )
+        body.append(ast_utils.Assign(CANCEL_VAR, cancel_token))
+
+    body.extend(ctx.save_block_output_to_variable(OUTPUT_VAR, block))
+    body.append(ast_utils.Return(ast_utils.Name(OUTPUT_VAR)))
+    return ast_utils.Function(
+        name=name,
+        args=ast_utils.Arguments(
+            args=[ast_utils.Arg(bound_name) for bound_name in bound_names],
+            defaults=[ast_utils.Name(bound_name) for bound_name in bound_names],
+        ),
+        body=body,
+        returns=ast_utils.Name("str"),
     )
 
 
 def construct_component(ctx: BuildContext, tag: ComponentNode) -> RuleReturnType:
-    func = ast_utils.Name(tag.component_name)
-    keywords = tag.keywords.copy()
-
-    keywords[WITH_STYLES] = ast_utils.Constant(False)
-    func_call = ast_utils.Call(
-        func=func,
-        keywords=keywords,
-        kwargs=ast_utils.Name(KWARGS_VAR),
+    component = ctx.find_component(tag)
+    if not ctx.is_streaming or not is_streamed(component):
+        func_call: ast.expr = create_component_call(tag, component, ctx.options)
+        if is_async(component, ctx.lookup):
+            func_call = ast.Await(value=func_call)
+
+        yield ctx.add_expr(func_call)
+        return
+
+    # Components stream their output through the caller, they're passed its
+    # unsent output and return what's left of it once it's been flushed
+    ctx.ensure_output_assigned()
+    stream_call = create_component_call(
+        tag,
+        component,
+        ctx.options,
+        func=ast_utils.Name(stream_variable(tag.component_name)),
+        arguments=[ctx.output_variable.name],
+    )
+    yield ast_utils.Assign(
+        target=ctx.output_variable.name,
+        value=ast.YieldFrom(value=stream_call),
     )
-    yield ctx.add_expr(func_call)
 
 
 T = t.TypeVar("T", bound=Node, infer_variance=True)
@@ -159,10 +275,11 @@ default_rules: t.List[Rule] = [
     (ComponentNode, construct_component),
     (RawExprNode, construct_raw_expr),
     (CodeNode, construct_code),
-    (ImportNode, construct_import),
     (IfNode, construct_if),
     (ForNode, construct_for),
     (SlotNode, construct_slot),
     (BlockNode, construct_block),
     (StyleNode, construct_styles),
+    (FlushNode, construct_flush),
+    (DeferNode, construct_defer),
 ]
@@ -1,22 +1,75 @@
 import ast
+from dataclasses import replace
 import typing_extensions as t
 from ..parsing import LayoutTemplate, Template, TemplateParameter
+from ..parsing.nodes import BlockNode, Node, SlotNode
 from ..utils import ast_utils
 from . import constants
-from .accumulators import Variable
+from .accumulators import StreamVariable, Variable, create_variable
+from .asynchronous import is_async
 from .builder import BuildContext
 from .calls import (
-    component_func_name, create_layout_call, layout_func_name, slot_parameter,
+    component_func_name, create_cancel_check, create_layout_call, has_explicit_props,
+    layout_func_name, slot_parameter, slot_variable_name, stream_func_name,
+    stream_variable, streamed_slots,
 )
+from .escaping import NumericAnalysis, create_type_checks
+from .options import CompilerOptions
 from .resolve import create_resolve_for_unknown_variables
 from .rules import default_rules
+from .walk import count_assignments, iterate_nodes
+
+RenderFunction: t.TypeAlias = t.Union[ast.FunctionDef, ast.AsyncFunctionDef]
 
 
 def create_template_function(
     template: Template,
     layout: t.Union[LayoutTemplate, None],
     css: str,
+    lookup: t.Dict[str, Template],
+    options: CompilerOptions,
 ) -> ast.FunctionDef:
+    # Folding can remove awaits, so the original template is checked, which
+    # is what the templates that call it check
+    async_function = is_async(lookup[template.name], lookup)
+    func = create_render_function(
+        template, layout, css, lookup, options, async_function=async_function
+    )
+    # Async templates aren't streamed, since async generators can't return the
+    # output they haven't sent
+    if options.streaming and not async_function:
+        stream = create_render_function(
+            template, layout, css, lookup, options, stream=True
+        )
+    else:
+        stream = None
+
+    links = {_import.target: _import.name for _import in template.imports}
+    if layout is not None:
+        links[constants.LAYOUT_VAR] = layout.name
+
+    factory = create_template_factory(template.name, func, links, stream)
+    ast.fix_missing_locations(factory)
+    return factory
+
+
+def create_render_function(
+    template: Template,
+    layout: t.Union[LayoutTemplate, None],
+    css: str,
+    lookup: t.Dict[str, Template],
+    options: CompilerOptions,
+    stream: bool = False,
+    async_function: bool = False,
+) -> RenderFunction:
+    """
+    Create the function that renders a template.
+
+    Stream functions are generators, which are passed the caller's unsent
+    output as their first argument and return what's left of it. Pages with a
+    layout pass it a function that renders their content, which the layout
+    calls once it's sent everything before its first slot.
+    """
     arguements = [*template.parameters]
     arguements.append(
         TemplateParameter(
@@ -37,8 +90,9 @@ def create_template_function(
             )
         )
 
+        # Slots are rendered by the content function when the layout's streamed
         for slot in template.slots:
-            if slot.is_required:
+            if slot.is_required and not stream:
                 type = ast_utils.Str
                 default = None
             else:
@@ -53,31 +107,136 @@ def create_template_function(
                 )
             )
 
+        if stream:
+            arguements.append(
+                TemplateParameter(
+                    name=constants.CONTENT_FUNC,
+                    default=ast_utils.Constant(None),
+                )
+            )
+
+    output_variable: Variable
+    if not stream:
+        buffer = None
+        output_variable = create_variable(constants.OUTPUT_VAR, options.accumulator)
+    elif layout is None:
+        buffer = constants.OUTPUT_VAR
+        output_variable = StreamVariable(buffer, options.stream_chunk_size)
+    else:
+        buffer = constants.STREAM_BUFFER_VAR
+        output_variable = create_variable(constants.OUTPUT_VAR, options.accumulator)
+
+    if stream:
+        function_name = stream_func_name(function_name)
+        returns = ast_utils.create_expr("t.Generator[str, None, str]")
+    else:
+        returns = ast_utils.Name("str")
+
+    numeric = NumericAnalysis(template, options)
     ctx = BuildContext(
         template=template,
-        output_variable=Variable(constants.OUTPUT_VAR),
+        output_variable=output_variable,
         layout=layout,
         css=css if len(css) > 0 else None,
         rules=default_rules,
+        lookup=lookup,
+        options=options,
+        numeric=numeric,
+        numeric_names=frozenset(numeric.parameters),
+        is_async=async_function,
+        cancellable=stream,
     )
-    func = ast_utils.Function(
+    create_function = ast_utils.AsyncFunction if async_function else ast_utils.Function
+    func = create_function(
         name=function_name,
-        decorators=[create_register_template_decorator(template.name)],
-        args=construct_arguments(arguements),
-        body=construct_body(ctx),
-        returns=ast_utils.Name("str"),
+        args=construct_arguments(arguements, buffer),
+        body=construct_body(ctx, buffer),
+        returns=returns,
     )
 
     parameter_names = [param.name for param in ctx.template.parameters]
     component_names = [comp.component_name for comp in ctx.template.components_calls]
-    create_resolve_for_unknown_variables(
-        func.body, [*parameter_names, *component_names]
+    import_names = [_import.target for _import in ctx.template.imports]
+    # With explicit props, components still resolve unknown variables from
+    # their own keywords, since their callers don't forward the context
+    func.body = create_resolve_for_unknown_variables(
+        func.body, [*parameter_names, *component_names, *import_names], options
     )
-    ast.fix_missing_locations(func)
+    func.body = [*create_type_checks(numeric.parameters), *func.body]
     return func
 
 
-def construct_arguments(arguments: t.List[TemplateParameter]) -> ast.arguments:
+def create_template_factory(
+    name: str,
+    func: RenderFunction,
+    links: t.Dict[str, str],
+    stream: t.Optional[RenderFunction] = None,
+) -> ast.FunctionDef:
+    """
+    Wrap a template function in a factory that returns it and a link function.
+
+    Components and layouts are stored in closure variables, which the link
+    function fills from the template lookup when the templates are committed.
+    This means renders don't look them up each time they're used.
+    The stream function is stored on the template function.
+    """
+    LOOKUP_ARG = "lookup"
+    variables = [*links]
+    if stream is not None:
+        variables.extend(stream_variable(variable) for variable in links)
+
+    cells: t.List[ast.stmt] = [
+        ast_utils.Assign(target=variable, value=ast_utils.None_)
+        for variable in variables
+    ]
+
+    link_body: t.List[ast.stmt] = []
+    if len(variables) > 0:
+        link_body.append(ast.Nonlocal(names=variables))
+    for variable, template_name in links.items():
+        template_func = ast_utils.Index(
+            ast_utils.Name(LOOKUP_ARG),
+            ast_utils.Constant(template_name),
+        )
+        link_body.append(ast_utils.Assign(target=variable, value=template_func))
+        if stream is not None:
+            stream_func = ast_utils.Attribute(template_func, constants.STREAM_ATTRIBUTE)
+            link_body.append(
+                ast_utils.Assign(target=stream_variable(variable), value=stream_func)
+            )
+    if len(link_body) == 0:
+        link_body.append(ast.Pass())
+
+    link = ast_utils.Function(
+        name=constants.LINK_FUNC,
+        args=ast_utils.Arguments(args=[ast_utils.Arg(LOOKUP_ARG)]),
+        body=link_body,
+    )
+    functions: t.List[ast.stmt] = [func]
+    if stream is not None:
+        functions.append(stream)
+        func_stream = ast_utils.Attribute(
+            ast_utils.Name(func.name), constants.STREAM_ATTRIBUTE
+        )
+        functions.append(
+            ast_utils.Assign(target=func_stream, value=ast_utils.Name(stream.name))
+        )
+
+    returned = ast_utils.Tuple(
+        [ast_utils.Name(func.name), ast_utils.Name(constants.LINK_FUNC)]
+    )
+    return ast_utils.Function(
+        name=func.name,
+        decorators=[create_register_template_decorator(name)],
+        args=ast_utils.Arguments(),
+        body=[*cells, *functions, link, ast_utils.Return(returned)],
+    )
+
+
+def construct_arguments(
+    arguments: t.List[TemplateParameter],
+    buffer: t.Optional[str] = None,
+) -> ast.arguments:
     args = []
     defaults = []
     for arguement in arguments:
@@ -89,7 +248,10 @@ def construct_arguments(arguments: t.List[TemplateParameter]) -> ast.arguments:
         )
         defaults.append(arguement.default)
 
+    # The buffer is positional only, so it can't be shadowed by the context
+    posonlyargs = [ast_utils.Arg(buffer)] if buffer is not None else []
     return ast_utils.Arguments(
+        posonlyargs=posonlyargs,
         kwonlyargs=args,
         kw_defaults=defaults,
         kwarg=ast_utils.Arg(
@@ -99,36 +261,230 @@ def construct_arguments(arguments: t.List[TemplateParameter]) -> ast.arguments:
     )
 
 
-def construct_body(ctx: BuildContext) -> t.Sequence[ast.stmt]:
+def construct_body(
+    ctx: BuildContext,
+    buffer: t.Optional[str] = None,
+) -> t.Sequence[ast.stmt]:
     statements: t.List[ast.stmt] = []
+    if ctx.cancellable:
+        cancel_token = ast_utils.Call(
+            ast_utils.Attribute(ast_utils.Name(constants.CANCEL_TOKEN_VAR), "get")
+        )
+        statements.append(ast_utils.Assign(constants.CANCEL_VAR, cancel_token))
+        statements.append(create_cancel_check("component"))
+
     if ctx.is_layout or ctx.uses_layout:
         statements.extend(create_style_contant(ctx))
 
-    # TODO: This shoudn't use tag system, legacy from {% import %}
-    for tag in ctx.template.imports:
-        ctx.construct_tag(tag)
-
-    for tag in ctx.template.body:
-        ctx.construct_tag(tag)
-
-    ctx.ensure_output_assigned()
-    output_value = ctx.output_variable.name
+    # Streamed layouts are sent up to their first slot before the content
+    # that's placed in them is rendered
+    content_index = find_first_slot(ctx.template) if buffer is not None else None
+    slots = streamed_slots(ctx.layout) if ctx.layout and buffer is not None else None
+    if slots is not None:
+        before, after = slots
+        content = create_streamed_content_function(ctx, before, after, content_index)
+        statements.append(content)
+        output_value = ctx.output_variable.value
+    else:
+        construct_tags(ctx, ctx.template.body, content_index)
+        ctx.ensure_output_assigned()
+        output_value = ctx.output_variable.value
 
-    statements.extend(ctx.body)
+        if ctx.layout and buffer is not None:
+            statements.append(create_content_function(ctx, output_value))
+        else:
+            statements.extend(ctx.body)
 
     if ctx.layout:
         output_value = create_layout_call(
-            layout_name=ctx.layout.name,
             default_slot=output_value,
             css=ast_utils.Name(constants.CSS_VARIABLE),
             has_default_slot=ctx.layout.has_default_slot,
             blocks=ctx.template.blocks,
+            forward_context=not has_explicit_props(ctx.layout, ctx.options),
+            stream_buffer=ast_utils.Name(buffer) if buffer is not None else None,
+            is_async=is_async(ctx.layout, ctx.lookup),
         )
+    else:
+        # This makes sure stream functions are always generators
+        statements.extend(ctx.output_variable.flush())
 
     statements.append(ast_utils.Return(output_value))
     return statements
 
 
+def construct_tags(
+    ctx: BuildContext,
+    tags: t.Sequence[Node],
+    content_index: t.Optional[int] = None,
+):
+    "Construct tags, calling the content function before the tag at `content_index`"
+    if content_index is None:
+        ctx.construct_tags(tags)
+    else:
+        ctx.construct_tags(tags[:content_index])
+        ctx.body.extend(create_content_call(ctx))
+        ctx.construct_tags(tags[content_index:])
+
+
+def find_first_slot(template: Template) -> t.Optional[int]:
+    "Find the first node in a layout's body that uses a slot"
+    if not isinstance(template, LayoutTemplate) or len(template.slots) == 0:
+        return None
+
+    for index, tag in enumerate(template.body):
+        if any(isinstance(node, SlotNode) for node in iterate_nodes([tag])):
+            return index
+
+    return None
+
+
+def create_content_call(ctx: BuildContext) -> t.List[ast.stmt]:
+    """
+    Send the layout's output so far, then render the slots if the caller
+    passed a content function instead of them.
+    """
+    layout = t.cast(LayoutTemplate, ctx.lookup[ctx.template.name])
+    content_call = ast_utils.Call(ast_utils.Name(constants.CONTENT_FUNC))
+    has_content = ast_utils.Compare(
+        ast.IsNot(), ast_utils.Name(constants.CONTENT_FUNC), ast_utils.None_
+    )
+
+    slots = streamed_slots(layout)
+    if slots is None:
+        names = [slot.name for slot in layout.slots]
+        content_body: t.List[ast.stmt] = [
+            ast_utils.Assign(target=slot_targets(names), value=content_call)
+        ]
+    else:
+        # The content is streamed from the default slot, it first sends the
+        # slots before it
+        before, _ = slots
+        next_call = ast_utils.Call(
+            func=ast_utils.Name(constants.NEXT_FUNC),
+            arguments=[ast_utils.Name(constants.CONTENT_STREAM_VAR)],
+        )
+        content_body = [
+            ast_utils.Assign(target=constants.CONTENT_STREAM_VAR, value=content_call),
+            ast_utils.Assign(target=slot_targets(before), value=next_call),
+        ]
+
+    return [
+        ast_utils.If(
+            condition=has_content,
+            if_body=[*ctx.output_variable.flush(force=True), *content_body],
+        )
+    ]
+
+
+def slot_targets(names: t.Sequence[t.Optional[str]]) -> ast.expr:
+    return ast_utils.Tuple([ast_utils.Name(slot_parameter(name)) for name in names])
+
+
+def create_streamed_content_function(
+    ctx: BuildContext,
+    before: t.List[str],
+    after: t.List[str],
+    content_index: t.Optional[int],
+) -> ast.FunctionDef:
+    """
+    Create a generator that renders a page's content into its layout.
+
+    It renders the page up to the last block the layout needs before its
+    default slot, then sends those blocks. The layout then passes it its unsent
+    output, and the rest of the page is streamed through the default slot.
+    """
+    body = ctx.template.body
+    split = 0
+    for index, node in enumerate(body):
+        if any(
+            isinstance(child, BlockNode) and child.name in before
+            for child in iterate_nodes([node])
+        ):
+            split = index + 1
+
+    if content_index is not None and content_index >= split:
+        rest_content_index: t.Optional[int] = content_index - split
+        content_index = None
+    else:
+        rest_content_index = None
+
+    statements: t.List[ast.stmt] = []
+    if split > 0:
+        construct_tags(ctx, body[:split], content_index)
+        ctx.ensure_output_assigned()
+        ctx.body.extend(ctx.output_variable.finish())
+        statements.extend(ctx.body)
+
+    def slot_value(name: str) -> ast.expr:
+        if name in ctx.template.blocks:
+            return ast_utils.Name(slot_variable_name(name))
+        else:
+            return ast_utils.None_
+
+    buffer = ast_utils.Name(constants.STREAM_BUFFER_VAR)
+    sent_slots = ast_utils.Tuple([slot_value(name) for name in before])
+    statements.append(ast_utils.Assign(target=buffer, value=ast.Yield(sent_slots)))
+    if split > 0:
+        statements.append(
+            ast_utils.AddAssign(target=buffer, value=ctx.output_variable.name)
+        )
+
+    ctx_rest = replace(
+        ctx,
+        output_variable=StreamVariable(buffer, ctx.options.stream_chunk_size),
+        body=[],
+    )
+    construct_tags(ctx_rest, body[split:], rest_content_index)
+    statements.extend(ctx_rest.body)
+
+    remaining = ast_utils.Tuple([buffer, *(slot_value(name) for name in after)])
+    statements.append(ast_utils.Return(remaining))
+    return create_content_function(ctx, statements=statements)
+
+
+def create_content_function(
+    ctx: BuildContext,
+    default_slot: t.Optional[ast.expr] = None,
+    statements: t.Optional[t.List[ast.stmt]] = None,
+) -> ast.FunctionDef:
+    """
+    Create a function that renders a page's content into its layout's slots.
+
+    The statements default to the content's body, returning the slots.
+    """
+    if statements is None:
+        layout = t.cast(LayoutTemplate, ctx.layout)
+        slots: t.List[ast.expr] = []
+        for slot in layout.slots:
+            if slot.name is None:
+                slots.append(t.cast(ast.expr, default_slot))
+            elif slot.name in ctx.template.blocks:
+                slots.append(ast_utils.Name(slot_variable_name(slot.name)))
+            else:
+                slots.append(ast_utils.None_)
+
+        statements = [*ctx.body, ast_utils.Return(ast_utils.Tuple(slots))]
+
+    # The content can assign to the page's parameters, and a layout's slots
+    # are assigned when they're rendered
+    parameter_names = {param.name for param in ctx.template.parameters}
+    assigned_names = parameter_names.intersection(count_assignments(ctx.template.body))
+    if isinstance(ctx.template, LayoutTemplate):
+        assigned_names.update(slot_parameter(slot.name) for slot in ctx.template.slots)
+
+    body: t.List[ast.stmt] = []
+    if len(assigned_names) > 0:
+        body.append(ast.Nonlocal(names=sorted(assigned_names)))
+
+    body.extend(statements)
+    return ast_utils.Function(
+        name=constants.RENDER_CONTENT_FUNC,
+        args=ast_utils.Arguments(),
+        body=body,
+    )
+
+
 def create_style_contant(ctx: BuildContext) -> t.List[ast.stmt]:
     if ctx.is_layout:
         return []
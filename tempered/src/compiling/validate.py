@@ -1,10 +1,17 @@
 import typing_extensions as t
 from ..errors import InvalidTemplateException
-from ..parsing.nodes import LayoutTemplate, Template
+from ..parsing.nodes import ComponentNode, LayoutTemplate, Template
+from .calls import has_explicit_props
+from .constants import WITH_STYLES
+from .options import CompilerOptions
+from .walk import iterate_nodes
 
 
-def validate_templates(templates: t.Sequence[Template]):
-    template_lookup = {template.name: template for template in templates}
+def validate_templates(
+    templates: t.Sequence[Template],
+    template_lookup: t.Dict[str, Template],
+    options: CompilerOptions = CompilerOptions(),
+):
     for template in templates:
         check_for_invalid_imports(template, template_lookup)
         check_for_missing_component_import(template, template_lookup)
@@ -12,6 +19,8 @@ def validate_templates(templates: t.Sequence[Template]):
         check_for_missing_blocks(template, template_lookup)
         check_for_non_existant_blocks(template, template_lookup)
         check_for_duplicate_parameters(template)
+        check_for_missing_props(template, template_lookup, options)
+        check_for_layout_props(template, template_lookup, options)
 
 
 def check_for_invalid_imports(template: Template, lookup: t.Dict[str, Template]):
@@ -100,3 +109,61 @@ def check_for_duplicate_parameters(template: Template):
             name=template.name,
             file=template.file,
         )
+
+
+def check_for_missing_props(
+    template: Template,
+    lookup: t.Dict[str, Template],
+    options: CompilerOptions,
+):
+    "Components with explicit props can't get their parameters from the context"
+    import_names = {_import.target: _import.name for _import in template.imports}
+    for call in iterate_nodes(template.body):
+        if not isinstance(call, ComponentNode):
+            continue
+
+        component = lookup[import_names[call.component_name]]
+        if not has_explicit_props(component, options):
+            continue
+
+        name = call.component_name
+        parameter_names = {param.name for param in component.parameters}
+        for keyword in call.keywords:
+            if keyword not in parameter_names and keyword != WITH_STYLES:
+                raise InvalidTemplateException.create(
+                    msg=f"Component <t:{name} doesn't have parameter '{keyword}'",
+                    name=template.name,
+                    file=template.file,
+                )
+
+        for param in component.parameters:
+            if param.default is None and param.name not in call.keywords:
+                raise InvalidTemplateException.create(
+                    msg=f"Component <t:{name} is missing parameter '{param.name}'",
+                    name=template.name,
+                    file=template.file,
+                )
+
+
+def check_for_layout_props(
+    template: Template,
+    lookup: t.Dict[str, Template],
+    options: CompilerOptions,
+):
+    if template.layout is None:
+        return
+
+    layout = lookup[template.layout]
+    if not has_explicit_props(layout, options):
+        return
+
+    for param in layout.parameters:
+        if param.default is None:
+            raise InvalidTemplateException.create(
+                msg=(
+                    f"'{template.layout}' has explicit props, so parameter "
+                    f"'{param.name}' needs a default"
+                ),
+                name=template.name,
+                file=template.file,
+            )
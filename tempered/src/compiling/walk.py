@@ -0,0 +1,102 @@
+import ast
+from collections import Counter
+import typing_extensions as t
+from ..parsing.nodes import (
+    BlockNode, CodeNode, ComponentNode, DeferNode, ExprNode, ForNode, IfNode, Node,
+    RawExprNode, SlotNode, TemplateBlock,
+)
+
+
+def iterate_nodes(block: TemplateBlock) -> t.Iterable[Node]:
+    "Iterate over every node in a block, including the nodes in nested blocks"
+    for node in block:
+        yield node
+        for child_block in child_blocks(node):
+            yield from iterate_nodes(child_block)
+
+
+def child_blocks(node: Node) -> t.List[TemplateBlock]:
+    if isinstance(node, IfNode):
+        blocks = [node.if_block, *(block for _, block in node.elif_blocks)]
+        if node.else_block is not None:
+            blocks.append(node.else_block)
+        return blocks
+    elif isinstance(node, ForNode):
+        return [node.loop_block]
+    elif isinstance(node, BlockNode):
+        return [node.body]
+    elif isinstance(node, SlotNode) and node.default is not None:
+        return [node.default]
+    elif isinstance(node, DeferNode):
+        blocks = [node.body, node.placeholder, node.fallback]
+        return [block for block in blocks if block is not None]
+    else:
+        return []
+
+
+def node_expressions(node: Node) -> t.List[ast.AST]:
+    "The python code directly contained in a node, excluding nested blocks"
+    if isinstance(node, (ExprNode, RawExprNode)):
+        return [node.value]
+    elif isinstance(node, ComponentNode):
+        return list(node.keywords.values())
+    elif isinstance(node, IfNode):
+        return [node.condition, *(condition for condition, _ in node.elif_blocks)]
+    elif isinstance(node, ForNode):
+        return [node.target, node.iterable]
+    elif isinstance(node, CodeNode):
+        return list(node.body)
+    elif isinstance(node, DeferNode) and node.timeout is not None:
+        return [node.timeout]
+    else:
+        return []
+
+
+def find_used_names(block: TemplateBlock) -> t.Set[str]:
+    "Find every variable name and component used in a block"
+    names: t.Set[str] = set()
+    for node in iterate_nodes(block):
+        if isinstance(node, ComponentNode):
+            names.add(node.component_name)
+
+        for expr in node_expressions(node):
+            names.update(
+                child.id for child in ast.walk(expr) if isinstance(child, ast.Name)
+            )
+
+    return names
+
+
+def count_assignments(block: TemplateBlock) -> t.Counter[str]:
+    "Count the number of places each variable is assigned"
+    assignments: t.Counter[str] = Counter()
+    for node in iterate_nodes(block):
+        if isinstance(node, ForNode):
+            assignments.update(
+                child.id
+                for child in ast.walk(node.target)
+                if isinstance(child, ast.Name)
+            )
+
+        for expr in node_expressions(node):
+            assignments.update(
+                child.id
+                for child in ast.walk(expr)
+                if isinstance(child, ast.Name) and isinstance(child.ctx, ast.Store)
+            )
+
+    return assignments
+
+
+def defined_names(body: t.List[ast.stmt]) -> t.Set[str]:
+    "Find every name used or defined by some code"
+    names: t.Set[str] = set()
+    for node in (child for statement in body for child in ast.walk(statement)):
+        if isinstance(node, ast.Name):
+            names.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, ast.alias):
+            names.add(node.asname or node.name.split(".")[0])
+
+    return names
@@ -67,6 +67,9 @@ def apply_scope_to_soup(soup: bs4.BeautifulSoup, scope_id: t.Optional[str]):
         if is_tag_in_head(tag):
             continue
 
+        if tag.name.startswith("t:"):
+            continue  # Tempered tags aren't output, their attributes are python
+
         classes = tag.attrs.get("class", "")
 
         if isinstance(classes, list):
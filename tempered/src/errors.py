@@ -12,6 +12,10 @@ class ParsingWarning(Warning):
     pass
 
 
+class FrozenGlobalException(Exception):
+    pass
+
+
 class InvalidTemplateException(BuildException):
     @classmethod
     def create(
@@ -1,14 +1,65 @@
+from dataclasses import dataclass
 from importlib.util import module_from_spec, spec_from_loader
-from types import ModuleType
+from types import CodeType, ModuleType
 import typing_extensions as t
 from . import compiling, parsing
+from .cache import TemplateCache
 from .compiling import constants
+from .compiling.walk import find_used_names
+from .errors import FrozenGlobalException
+
+
+class RenderStream(t.Protocol):
+    "The chunks of a streamed template"
+
+    def __iter__(self) -> t.Iterator[str]: ...
+
+    def __next__(self) -> str: ...
+
+    def close(self) -> None: ...
+
+    def cancel(self) -> None:
+        "Stop rendering at the next loop or component, and end the stream"
+
+
+class Writer(t.Protocol):
+    "Anything HTML can be written to, such as a file, `io.StringIO` or a response"
+
+    def write(self, html: str, /) -> t.Any: ...
+
+
+@dataclass
+class CancelInfo:
+    "How many streamed and async renders were cancelled, by where they stopped"
+
+    loop: int = 0
+    "Stopped at the start of a loop"
+    component: int = 0
+    "Stopped at the start of a component or layout"
+    chunk: int = 0
+    "The stream was closed before it finished, while the server was sending a chunk"
+    deferred: int = 0
+    "Stopped while waiting for deferred blocks"
+    awaiting: int = 0
+    "An async render was cancelled while it was awaiting"
+
+    @property
+    def total(self) -> int:
+        return self.loop + self.component + self.chunk + self.deferred + self.awaiting
 
 
 class TemperedModule:
     module: ModuleType
+    cache: t.Optional[TemplateCache]
+    keep_source: bool
+    options: compiling.CompilerOptions
 
-    def __init__(self):
+    def __init__(
+        self,
+        cache: t.Optional[TemplateCache] = None,
+        keep_source: bool = False,
+        options: compiling.CompilerOptions = compiling.CompilerOptions(),
+    ):
         spec = spec_from_loader(name="tempered.generated", loader=None)
         if spec is None:
             raise RuntimeError("InteralError: Failed to create module spec")
@@ -18,23 +69,134 @@ class TemperedModule:
         source = compiling.default_module_code()
         exec(source, module.__dict__)
         self.module = module
+        self.cache = cache
+        self.keep_source = keep_source
+        self.options = options
 
     def register_global(self, name: str, value: t.Any):
+        if name in self.options.frozen_globals:
+            raise FrozenGlobalException(f"The global '{name}' is frozen")
+
         module_register_global = self.module.__dict__[constants.REGISTER_GLOBAL_FUNC]
         module_register_global(name, value)
 
+    def get_globals(self) -> t.Dict[str, t.Any]:
+        return self.module.__dict__[constants.GLOBALS_VAR]
+
+    def request_scope(self, values: t.Dict[str, t.Any]) -> t.ContextManager[None]:
+        enter_request_scope = self.module.__dict__[constants.REQUEST_SCOPE_FUNC]
+        return enter_request_scope(values)
+
+    def freeze_globals(self, names: t.Collection[str]):
+        """
+        Prevent globals from changing, and recompile the templates that use them
+        so literal values are compiled in as constants.
+        """
+        names = set(names).difference(self.options.frozen_globals)
+        if len(names) == 0:
+            return
+
+        self.options = compiling.freeze_globals(self.options, names, self.get_globals())
+        affected_templates = [
+            template
+            for template in self.get_templates()
+            if not names.isdisjoint(find_used_names(template.body))
+        ]
+        if len(affected_templates) > 0:
+            self.build_templates(affected_templates)
+
     def get_templates(self) -> t.List[parsing.Template]:
-        return self.module.__dict__[constants.TEMPLATE_LIST_VAR]
+        return list(self._get_template_lookup().values())
+
+    def get_template(self, name: str) -> parsing.Template:
+        return self._get_template_lookup()[name]
 
     def get_template_func(self, name: str) -> t.Callable[..., str]:
         name_lookup = self.module.__dict__[constants.NAME_LOOKUP_VAR]
         return name_lookup[name]
 
+    def render_template(self, name: str, context: t.Dict[str, t.Any]) -> str:
+        render_template = self.module.__dict__[constants.RENDER_TEMPLATE_FUNC]
+        return render_template(name, context)
+
+    async def render_template_async(
+        self,
+        name: str,
+        context: t.Dict[str, t.Any],
+    ) -> str:
+        render_template = self.module.__dict__[constants.RENDER_TEMPLATE_ASYNC_FUNC]
+        return await render_template(name, context)
+
+    def stream_template(
+        self,
+        name: str,
+        context: t.Dict[str, t.Any],
+    ) -> RenderStream:
+        stream_template = self.module.__dict__[constants.STREAM_TEMPLATE_FUNC]
+        return stream_template(self.get_template_func(name), context)
+
+    def render_into(
+        self,
+        writer: Writer,
+        name: str,
+        context: t.Dict[str, t.Any],
+    ):
+        render_into = self.module.__dict__[constants.RENDER_INTO_FUNC]
+        render_into(writer.write, name, context)
+
+    def cancel_info(self) -> CancelInfo:
+        return CancelInfo(**self.module.__dict__[constants.CANCEL_COUNTS_VAR])
+
     def build_templates(self, templates: t.List[parsing.Template]):
-        existing_templates = self.get_templates()
-        source = compiling.create_template_functions_code(templates, existing_templates)
-        exec(source, self.module.__dict__)
+        """
+        Add templates to the module, replacing any existing templates with the same name.
+
+        Only the given templates and the templates that depend on them are
+        validated and recompiled.
+        """
+        lookup = self._get_template_lookup().copy()
+        lookup.update({template.name: template for template in templates})
+
+        names = [template.name for template in templates]
+        compiling.validate_templates(templates, lookup, self.options)
+        dependents = [
+            lookup[name]
+            for name in compiling.calculate_dependents(names, lookup)
+            if name not in names
+        ]
+        compiling.validate_templates(dependents, lookup, self.options)
+
+        rebuilt_templates = [*templates, *dependents]
+        codes = [
+            self._compile_template(template, lookup) for template in rebuilt_templates
+        ]
+        for code in codes:
+            exec(code, self.module.__dict__)
 
         register_template = self.module.__dict__[constants.REGISTER_TEMPLATE_FUNC]
         for template in templates:
             register_template(template)
+
+        commit_templates = self.module.__dict__[constants.COMMIT_TEMPLATES_FUNC]
+        commit_templates()
+
+    def _get_template_lookup(self) -> t.Dict[str, parsing.Template]:
+        return self.module.__dict__[constants.TEMPLATE_LIST_VAR]
+
+    def _compile_template(
+        self,
+        template: parsing.Template,
+        lookup: t.Dict[str, parsing.Template],
+    ) -> CodeType:
+        # Cached code doesn't have it's source, so isn't used when it's requested
+        if self.cache is None or self.keep_source:
+            return compiling.create_template_code(
+                template, lookup, self.options, self.keep_source
+            )
+
+        code = self.cache.load_code(template, lookup, self.options)
+        if code is None:
+            code = compiling.create_template_code(template, lookup, self.options)
+            self.cache.store_code(template, lookup, self.options, code)
+
+        return code
@@ -2,7 +2,7 @@ import textwrap
 from dataclasses import dataclass, field
 import bs4
 import strictyaml
-from strictyaml import Any, Map, MapPattern, Optional, Seq, Str
+from strictyaml import Any, Bool, Map, MapPattern, Optional, Seq, Str
 import typing_extensions as t
 from ..errors import ParserException
 
@@ -18,6 +18,8 @@ class Metadata:
     style_includes: t.List[str] = field(default_factory=list)
     imports: t.Dict[str, str] = field(default_factory=dict)
     layout: t.Union[str, None] = None
+    inline: t.Union[bool, None] = None
+    explicit_props: t.Union[bool, None] = None
 
 
 def extract_metadata_from_soup(soup: bs4.BeautifulSoup) -> Metadata:
@@ -46,6 +48,8 @@ def parse_metadata_yaml(text: str) -> Metadata:
             Optional("style_includes"): Seq(Str()),
             Optional("imports"): MapPattern(Str(), Str()),
             Optional("parameters"): MapPattern(Str(), Any()),
+            Optional("inline"): Bool(),
+            Optional("explicit_props"): Bool(),
         }
     )
     data = strictyaml.load(text, schema).data
@@ -69,4 +73,6 @@ def parse_metadata_yaml(text: str) -> Metadata:
         parameters=parameters,
         style_includes=data.get("style_includes", []),
         layout=data.get("layout", None),
+        inline=data.get("inline", None),
+        explicit_props=data.get("explicit_props", None),
     )
@@ -19,9 +19,14 @@ class HtmlNode(SingleTagNode):
     html: str
 
 
+EscapeContext: t.TypeAlias = t.Literal["html", "text", "attribute", "url"]
+
+
 @dataclass
 class ExprNode(SingleTagNode):
     value: ast.expr
+    context: EscapeContext = "html"
+    "Where the expression is placed, which decides how it's escaped"
 
 
 @dataclass
@@ -34,6 +39,11 @@ class StyleNode(SingleTagNode):
     """Place styles in component here"""
 
 
+@dataclass
+class FlushNode(SingleTagNode):
+    """Send the output so far when the template is streamed"""
+
+
 @dataclass
 class ComponentNode(SingleTagNode):
     # Needed to prevent CSS from being created multiple times
@@ -66,6 +76,8 @@ class ForNode(Node):
     target: ast.expr
     iterable: ast.expr
     loop_block: TemplateBlock
+    is_async: bool = False
+    "Loop over an async iterable with `async for`"
 
 
 @dataclass
@@ -80,6 +92,17 @@ class BlockNode(Node):
     body: TemplateBlock
 
 
+@dataclass
+class DeferNode(Node):
+    "Content that's sent after the rest of the page when it's streamed"
+    body: TemplateBlock
+    placeholder: t.Optional[TemplateBlock] = None
+    "Shown until the content is sent"
+    fallback: t.Optional[TemplateBlock] = None
+    "Replaces the placeholder if the content isn't rendered before the timeout"
+    timeout: t.Optional[ast.expr] = None
+
+
 @dataclass
 class TemplateParameter:
     name: str
@@ -105,6 +128,8 @@ class Template:
     imports: t.List[ImportNode] = field(default_factory=list)
     style_includes: t.Set[str] = field(default_factory=set)
     layout: t.Union[str, None] = None
+    inline: t.Union[bool, None] = None
+    explicit_props: t.Union[bool, None] = None
 
     components_calls: t.List[ComponentNode] = field(default_factory=list)
     blocks: t.Set[str] = field(default_factory=set)
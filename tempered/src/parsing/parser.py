@@ -1,3 +1,4 @@
+import ast
 import re
 from textwrap import dedent
 import bs4
@@ -6,6 +7,17 @@ from ..errors import ParserException
 from ..utils import ast_utils
 from . import nodes
 
+RAW_TEXT_TAGS = ("script", "style")
+"Tags where the text isn't HTML, so the context of expressions in them isn't known"
+URL_ATTRIBUTES = ("href", "src", "action", "formaction", "poster", "cite", "xlink:href")
+EMPTY_TAGS_PATTERN = re.compile(r"<t:(flush|styles)\s*/>")
+"Tags that never have content, so they can be written as `<t:flush/>`"
+
+
+def expand_empty_tags(html: str) -> str:
+    "The minifier ignores the slash in self closing tags, so they're given an end tag"
+    return EMPTY_TAGS_PATTERN.sub(r"<t:\1></t:\1>", html)
+
 
 def parse_soup_into_nodes(soup: bs4.Tag) -> t.Sequence[nodes.Node]:
     body = list(iterate_over_tag(soup))
@@ -19,7 +31,11 @@ def iterate_over_tag(soup: bs4.Tag) -> t.Iterable[nodes.Node]:
         tag = children.pop(0)
 
         if isinstance(tag, bs4.NavigableString):
-            yield from extract_exprs_from_text(tag.text)
+            if soup.name in RAW_TEXT_TAGS:
+                # Newer versions of bs4 don't include scripts in `.text`
+                yield from extract_exprs_from_text(str(tag), "html")
+            else:
+                yield from extract_exprs_from_text(tag.text, "text")
             continue
 
         tag = t.cast(bs4.Tag, tag)
@@ -39,7 +55,12 @@ def iterate_over_tag(soup: bs4.Tag) -> t.Iterable[nodes.Node]:
             target = ast_utils.create_expr(get_attr(tag, "for"))
             iterable = ast_utils.create_expr(get_attr(tag, "in"))
             body = parse_soup_into_nodes(tag)
-            yield nodes.ForNode(target=target, iterable=iterable, loop_block=body)
+            yield nodes.ForNode(
+                target=target,
+                iterable=iterable,
+                loop_block=body,
+                is_async="async" in tag.attrs,
+            )
         elif name == "if":
             if_condition = ast_utils.create_expr(get_attr(tag, "condition"))
             if_block = list(parse_soup_into_nodes(tag))
@@ -74,12 +95,18 @@ def iterate_over_tag(soup: bs4.Tag) -> t.Iterable[nodes.Node]:
                 elif_blocks=elif_blocks,
                 else_block=else_block,
             )
+        elif name == "defer":
+            yield parse_defer(tag)
+        elif name in ("placeholder", "fallback"):
+            raise ParserException(f"t:{name} must be used with t:defer")
         elif name == "elif":
             raise ParserException("t:elif must be used with t:if")
         elif name == "else":
             raise ParserException("t:else must be used with t:if")
         elif name == "styles":
             yield nodes.StyleNode()
+        elif name == "flush":
+            yield nodes.FlushNode()
         elif name == "html":
             value = get_attr(tag, "value")
             yield nodes.RawExprNode(value=ast_utils.create_expr(value))
@@ -110,6 +137,25 @@ def iterate_over_tag(soup: bs4.Tag) -> t.Iterable[nodes.Node]:
             )
 
 
+def parse_defer(tag: bs4.Tag) -> nodes.DeferNode:
+    blocks: t.Dict[str, t.Optional[t.List[nodes.Node]]] = {}
+    for name in ("placeholder", "fallback"):
+        child = tag.find(f"t:{name}", recursive=False)
+        if isinstance(child, bs4.Tag):
+            child.extract()
+            blocks[name] = list(parse_soup_into_nodes(child))
+        else:
+            blocks[name] = None
+
+    timeout = get_attr_optional(tag, "timeout")
+    return nodes.DeferNode(
+        body=list(parse_soup_into_nodes(tag)),
+        placeholder=blocks["placeholder"],
+        fallback=blocks["fallback"],
+        timeout=ast_utils.create_expr(timeout) if timeout is not None else None,
+    )
+
+
 def squash_html_nodes(_nodes: t.List[nodes.Node]) -> t.List[nodes.Node]:
     "Combined sequential HTML nodes"
     new_nodes = []
@@ -141,7 +187,7 @@ def get_opening_tag(tag: bs4.Tag) -> t.Iterable[nodes.Node]:
         if isinstance(value, list):
             value = " ".join(value)
 
-        yield from extract_exprs_from_text(value)
+        yield from extract_attribute_exprs(name, value)
         yield nodes.HtmlNode('"')
 
     yield nodes.HtmlNode(">")
@@ -151,14 +197,63 @@ def get_closing_tag(tag: bs4.Tag) -> nodes.HtmlNode:
     return nodes.HtmlNode(f"</{tag.name}>")
 
 
-def extract_exprs_from_text(text: str) -> t.Iterable[nodes.Node]:
+def extract_attribute_exprs(name: str, value: str) -> t.Iterable[nodes.Node]:
+    if name.lower() not in URL_ATTRIBUTES:
+        yield from extract_exprs_from_text(value, "attribute")
+        return
+
+    # Once the attribute has a scheme or path, values can't change the scheme
+    url_nodes = list(extract_exprs_from_text(value, "url"))
+    for i, node in enumerate(url_nodes):
+        if isinstance(node, nodes.HtmlNode) and any(c in node.html for c in ":/?#"):
+            break
+    else:
+        yield from url_nodes
+        return
+
+    html = node.html
+    end = min(html.index(char) for char in ":/?#" if char in html)
+    before = url_nodes[:i]
+    if html[end] == ":" and any(isinstance(node, nodes.ExprNode) for node in before):
+        # Values before a literal colon are part of the scheme, so they're
+        # checked together with the text around them
+        scheme = join_url_nodes([*before, nodes.HtmlNode(html[: end + 1])])
+        yield nodes.ExprNode(scheme, context="url")
+        yield nodes.HtmlNode(html[end + 1 :])
+    else:
+        yield from before
+        yield node
+
+    for node in url_nodes[i + 1 :]:
+        if isinstance(node, nodes.ExprNode):
+            node.context = "attribute"
+
+        yield node
+
+
+def join_url_nodes(url_nodes: t.Sequence[nodes.Node]) -> ast.expr:
+    "Create an f-string of the text and expressions in part of a URL"
+    values: t.List[ast.expr] = []
+    for node in url_nodes:
+        if isinstance(node, nodes.ExprNode):
+            values.append(node.value)
+        elif isinstance(node, nodes.HtmlNode):
+            values.append(ast_utils.Constant(node.html))
+
+    return ast_utils.FormatString(*values)
+
+
+def extract_exprs_from_text(
+    text: str,
+    context: nodes.EscapeContext = "html",
+) -> t.Iterable[nodes.Node]:
     EXPR_RE = re.compile(r"(?:{{)([\s\S]*?)(?:}})")
 
     for i, x in enumerate(EXPR_RE.split(text)):
         is_expr = i % 2 == 1  # Every odd value is an expression
         if is_expr:
             expr = str(x).strip()
-            yield nodes.ExprNode(ast_utils.create_expr(expr))
+            yield nodes.ExprNode(ast_utils.create_expr(expr), context=context)
         else:
             yield nodes.HtmlNode(x)
 
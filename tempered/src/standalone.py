@@ -0,0 +1,86 @@
+"Creates python modules that can render templates without tempered installed"
+import inspect
+import sys
+import typing_extensions as t
+from .. import __version__
+from .._internals import escape
+from . import compiling, parsing
+from .compiling import constants
+
+# Modules copied into the output, they must only depend on the standard library
+RUNTIME_MODULES = [sys.modules[escape.__module__]]
+
+
+STANDALONE_HEADER = f'''"""
+Generated by tempered {__version__}, do not edit.
+
+Use `render(name, **context)` to render a template,
+`render_bytes(name, **context)` to render it as UTF-8,
+`await render_async(name, **context)` to render one that awaits anything,
+`render_stream(name, **context)` to render it in chunks if it was built with streaming,
+which stops at the next loop or component after `.cancel()` is called on it,
+`render_into(writer, name, **context)` to write it to a file or response,
+`add_global(name, value)` to add a global variable and
+`request_scope(**values)` to add variables to renders in a `with` block.
+"""
+from __future__ import annotations as _
+'''
+
+STANDALONE_FOOTER = f'''
+{constants.ESCAPE_FUNC} = escape
+{constants.ESCAPE_FUNCS["text"]} = escape_text
+{constants.ESCAPE_FUNCS["attribute"]} = escape_attribute
+{constants.ESCAPE_FUNCS["url"]} = escape_url
+{constants.COMMIT_TEMPLATES_FUNC}()
+
+
+def add_global(name: str, value: t.Any) -> None:
+    {constants.REGISTER_GLOBAL_FUNC}(name, value)
+
+
+def request_scope(**values: t.Any) -> t.ContextManager[None]:
+    return {constants.REQUEST_SCOPE_FUNC}(values)
+
+
+def render(name: str, **context: t.Any) -> Markup:
+    return Markup({constants.RENDER_TEMPLATE_FUNC}(name, context))
+
+
+def render_bytes(name: str, **context: t.Any) -> bytes:
+    return {constants.RENDER_TEMPLATE_FUNC}(name, context).encode()
+
+
+async def render_async(name: str, **context: t.Any) -> Markup:
+    return Markup(await {constants.RENDER_TEMPLATE_ASYNC_FUNC}(name, context))
+
+
+def render_into(writer: t.Any, name: str, **context: t.Any) -> None:
+    {constants.RENDER_INTO_FUNC}(writer.write, name, context)
+
+
+def render_stream(name: str, **context: t.Any) -> t.Iterator[str]:
+    return {constants.STREAM_TEMPLATE_FUNC}({constants.NAME_LOOKUP_VAR}[name], context)
+
+
+templates = tuple({constants.NAME_LOOKUP_VAR})
+'''
+
+
+def create_standalone_module(
+    templates: t.List[parsing.Template],
+    options: compiling.CompilerOptions,
+) -> str:
+    runtime_sources = [inspect.getsource(module) for module in RUNTIME_MODULES]
+    functions_source = compiling.create_template_functions_code(
+        templates, [], options
+    )
+
+    return "\n\n".join(
+        (
+            STANDALONE_HEADER,
+            *runtime_sources,
+            constants.RUNTIME_HEADER,
+            functions_source,
+            STANDALONE_FOOTER,
+        )
+    )
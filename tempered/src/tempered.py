@@ -2,7 +2,12 @@ from __future__ import annotations
 import zlib
 from pathlib import Path
 import typing_extensions as t
-from . import module, types
+from .._internals import Markup
+from . import module, parsing, standalone, types
+from .cache import CacheInfo, TemplateCache
+from .compiling import CompilerOptions
+from .compiling.options import AccumulatorType
+from .module import CancelInfo, RenderStream, Writer
 from .template.template import parse_template
 
 
@@ -10,18 +15,43 @@ class TemperedBase:
     template_files: t.List[Path]
 
     _module: module.TemperedModule
-    _from_string_cache: t.Dict[str, t.Callable[..., str]]
-    _generate_types: bool
+    _cache: t.Optional[TemplateCache]
+    _from_string_cache: t.Dict[str, str]
+    _template_folders: t.List[Path]
+    _generate_types: t.Optional[bool]
 
     def __init__(
         self,
         *,
         template_folder: t.Union[str, Path, None] = None,
-        generate_types: bool = True,
+        generate_types: t.Optional[bool] = True,
+        cache_folder: t.Union[str, Path, None] = None,
+        keep_source: bool = False,
+        accumulator: AccumulatorType = "concat",
+        inline_threshold: int = 32,
+        strict_types: bool = False,
+        explicit_props: bool = False,
+        concurrent_awaits: bool = True,
+        streaming: bool = False,
+        stream_chunk_size: int = 8192,
     ):
         self._from_string_cache = {}
+        self._template_folders = []
         self.template_files = []
-        self._module = module.TemperedModule()
+        self._cache = TemplateCache(cache_folder) if cache_folder else None
+        self._module = module.TemperedModule(
+            cache=self._cache,
+            keep_source=keep_source,
+            options=CompilerOptions(
+                accumulator=accumulator,
+                inline_threshold=inline_threshold,
+                strict_types=strict_types,
+                explicit_props=explicit_props,
+                concurrent_awaits=concurrent_awaits,
+                streaming=streaming,
+                stream_chunk_size=stream_chunk_size,
+            ),
+        )
 
         self._generate_types = generate_types
         if template_folder:
@@ -33,12 +63,13 @@ class TemperedBase:
         self.template_files.append(file)
         name = str(file)
         html = file.read_text()
-        template = parse_template(name, html, file)
+        template = self._parse_template(name, html, file)
         self._module.build_templates([template])
         self._reconstruct_types()
 
     def add_from_folder(self, folder: t.Union[Path, str]):
         folder = Path(folder)
+        self._template_folders.append(folder)
 
         FOLDER_PREFIX = f"{folder}/"
         templates = []
@@ -47,43 +78,130 @@ class TemperedBase:
             name = str(file)
             name = name[len(FOLDER_PREFIX) :]
             html = file.read_text()
-            template = parse_template(name, html, file)
+            template = self._parse_template(name, html, file)
             templates.append(template)
 
         self._module.build_templates(templates)
         self._reconstruct_types()
 
     def add_from_string(self, name: str, html: str):
-        template = parse_template(name, html, file=None)
+        template = self._parse_template(name, html)
         self._module.build_templates([template])
         self._reconstruct_types()
 
     def add_from_mapping(self, templates: t.Mapping[str, str]):
         template_objs = [
-            parse_template(name, html, file=None) for name, html in templates.items()
+            self._parse_template(name, html) for name, html in templates.items()
         ]
         self._module.build_templates(template_objs)
         self._reconstruct_types()
 
-    def render_string(self, html: str, **context: t.Any) -> str:
+    def reload(self, name: str):
+        template = self._module.get_template(name)
+        if template.file is None:
+            raise ValueError(f"Template {name} wasn't loaded from a file")
+
+        html = template.file.read_text()
+        template = self._parse_template(name, html, template.file)
+        self._module.build_templates([template])
+        self._reconstruct_types()
+
+    def reload_files(self, files: t.Iterable[t.Union[Path, str]]):
+        file_names = {
+            template.file.resolve(): template.name
+            for template in self._module.get_templates()
+            if template.file is not None
+        }
+
+        templates = []
+        for file in map(Path, files):
+            if file.resolve() in file_names:
+                name = file_names[file.resolve()]
+            else:
+                name = self._get_new_file_name(file)
+                self.template_files.append(file)
+
+            html = file.read_text()
+            template = self._parse_template(name, html, file)
+            templates.append(template)
+
+        self._module.build_templates(templates)
+        self._reconstruct_types()
+
+    def _get_new_file_name(self, file: Path) -> str:
+        for folder in self._template_folders:
+            try:
+                return str(file.resolve().relative_to(folder.resolve()))
+            except ValueError:
+                continue
+
+        return str(file)
+
+    def render_string(self, html: str, **context: t.Any) -> Markup:
         if html in self._from_string_cache:
-            func = self._from_string_cache[html]
-            return func(**context)
+            name = self._from_string_cache[html]
+            return self.render(name, **context)
 
         string_hash = hex(zlib.crc32(html.encode()))[2:]
         name = f"string_<{string_hash}>"
-        parsed_template = parse_template(name, html)
+        parsed_template = self._parse_template(name, html)
         self._module.build_templates([parsed_template])
-        func = self._module.get_template_func(name)
-        self._from_string_cache[html] = func
-        return func(**context)
+        self._from_string_cache[html] = name
+        return self.render(name, **context)
+
+    def render(self, name: str, **context: t.Any) -> Markup:
+        # Components are called with plain strings, since adding a str subclass
+        # to the output copies it instead of appending in place
+        return Markup(self._module.render_template(name, context))
+
+    def render_bytes(self, name: str, **context: t.Any) -> bytes:
+        # Encoded directly, since wrapping the output in Markup copies it
+        return self._module.render_template(name, context).encode()
+
+    async def render_async(self, name: str, **context: t.Any) -> Markup:
+        return Markup(await self._module.render_template_async(name, context))
 
-    def render(self, name: str, **context: t.Any) -> str:
-        func = self._module.get_template_func(name)
-        return func(**context)
+    def render_stream(self, name: str, **context: t.Any) -> RenderStream:
+        return self._module.stream_template(name, context)
 
-    def add_global(self, name: str, value: t.Any):
+    def render_into(self, writer: Writer, name: str, **context: t.Any):
+        self._module.render_into(writer, name, context)
+
+    def add_global(self, name: str, value: t.Any, frozen: bool = False):
         self._module.register_global(name, value)
+        if frozen:
+            self._module.freeze_globals([name])
+
+    def freeze_globals(self):
+        self._module.freeze_globals(self._module.get_globals())
+
+    def request_scope(self, **values: t.Any) -> t.ContextManager[None]:
+        return self._module.request_scope(values)
+
+    def export_module(self, file: t.Union[Path, str]):
+        templates = self._module.get_templates()
+        source = standalone.create_standalone_module(templates, self._module.options)
+        Path(file).write_text(source)
+
+    def cache_info(self) -> CacheInfo:
+        if self._cache is None:
+            return CacheInfo()
+
+        return self._cache.info
+
+    def cancel_info(self) -> CancelInfo:
+        return self._module.cancel_info()
+
+    def _parse_template(
+        self,
+        name: str,
+        html: str,
+        file: t.Union[Path, None] = None,
+    ) -> parsing.Template:
+        if self._cache is None:
+            return parse_template(name, html, file)
+
+        return self._cache.parse_template(name, html, file)
 
     _has_cleared_types = False
 
@@ -91,7 +209,7 @@ class TemperedBase:
         if self._generate_types:
             templates = self._module.get_templates()
             types.build_types(templates)
-        elif not self._has_cleared_types:
+        elif self._generate_types is False and not self._has_cleared_types:
             self._has_cleared_types = True
             types.clear_types()
 
@@ -120,18 +238,45 @@ class Tempered(TemperedBase):
         self,
         *,
         template_folder: t.Union[str, Path, None] = None,
-        generate_types: bool = True,
+        generate_types: t.Optional[bool] = True,
+        cache_folder: t.Union[str, Path, None] = None,
+        keep_source: bool = False,
+        accumulator: AccumulatorType = "concat",
+        inline_threshold: int = 32,
+        strict_types: bool = False,
+        explicit_props: bool = False,
+        concurrent_awaits: bool = True,
+        streaming: bool = False,
+        stream_chunk_size: int = 8192,
         **kwargs,
     ):
         """
         Args:
             template_folder: The folder to import templates from, searches recursively
-            generate_types: Should type declarations be created for templates? This improves developer experience, however requires IO and can be disabled in production for a small build-time performance boost.
+            generate_types: Should type declarations be created for templates? This improves developer experience, however requires IO and can be disabled in production for a small build-time performance boost. `False` removes any existing declarations, `None` leaves them as they are.
+            cache_folder: A folder to store parsed and compiled templates in. Unchanged templates are loaded from here instead of being rebuilt, which greatly reduces startup time.
+            keep_source: Keep the source of the generated code, so it is shown in tracebacks. This slows down building, so is only recommended for debugging.
+            accumulator: How template output is built, `"concat"` appends to a string and `"join"` collects a list of strings that is joined once. `"join"` can be faster for very large pages.
+            inline_threshold: Components with at most this many nodes are placed directly into the templates that use them, which avoids the cost of calling them. Set `inline: true` or `inline: false` in a component's metadata to override this, or use `0` to only inline components that set `inline: true`.
+            strict_types: Check the type of parameters declared as `int`, `float` or `bool` when a template is called, raising a `TypeError` if they're the wrong type. These parameters are then rendered without being escaped.
+            explicit_props: Only pass components their parameters, instead of forwarding the render context to them. Templates can override this by setting `explicit_props` in their metadata.
+            concurrent_awaits: Await async components and expressions that are only separated by HTML at the same time. Disable this if they share something that can't be used concurrently, such as a database session.
+            streaming: Also compile templates to generators, so they can be rendered with `render_stream`. This increases build time, so is disabled by default.
+            stream_chunk_size: The minimum number of characters in each chunk from `render_stream`, apart from the last one.
         """
         TemperedBase.__init__(
             self,
             template_folder=template_folder,
             generate_types=generate_types,
+            cache_folder=cache_folder,
+            keep_source=keep_source,
+            accumulator=accumulator,
+            inline_threshold=inline_threshold,
+            strict_types=strict_types,
+            explicit_props=explicit_props,
+            concurrent_awaits=concurrent_awaits,
+            streaming=streaming,
+            stream_chunk_size=stream_chunk_size,
         )
 
     def add_from_file(self, file: t.Union[Path, str]):
@@ -200,9 +345,46 @@ class Tempered(TemperedBase):
         """
         TemperedBase.add_from_mapping(self, templates)
 
-    def render(self, name: str, **context: t.Any) -> str:
+    def reload(self, name: str):
+        """
+        Reload a template from it's file, as well as any templates that depend on it.
+
+        Other templates aren't rebuilt, so this is much faster than creating a new Tempered instance.
+
+        Args:
+            name: The name of the template to reload
+
+        **Example**
+        ```python
+        tempered.reload("components/navbar.html")
+        ```
+        """
+        TemperedBase.reload(self, name)
+
+    def reload_files(self, files: t.Iterable[t.Union[Path, str]]):
+        """
+        Reload the templates from the given files, as well as any templates that depend on them.
+
+        Files that aren't templates yet are added, using the same name as if they were added by `add_from_folder`.
+
+        Args:
+            files: The files that have changed
+
+        **Example with watchdog**
+        ```python
+        class ReloadHandler(FileSystemEventHandler):
+            def on_modified(self, event):
+                tempered.reload_files([event.src_path])
+        ```
+        """
+        TemperedBase.reload_files(self, files)
+
+    def render(self, name: str, **context: t.Any) -> Markup:
         """Renders a template using the given parameters
 
+        The HTML is returned as `Markup`, so it isn't escaped again
+        when it's passed into another template.
+
         Args:
             name: The name of the template to render
             context: The parameters to pass to the template
@@ -217,7 +399,93 @@ class Tempered(TemperedBase):
         """
         return TemperedBase.render(self, name, **context)
 
-    def render_string(self, html: str, **context: t.Any) -> str:
+    def render_bytes(self, name: str, **context: t.Any) -> bytes:
+        """
+        Render a template as UTF-8, for frameworks that send the response as bytes.
+
+        This skips the copy `render(...).encode()` makes when it wraps the output in `Markup`.
+
+        Args:
+            name: The name of the template to render
+            context: The parameters to pass to the template
+
+        **Example with Starlette**
+
+        ```python
+        async def homepage(request):
+            html = tempered.render_bytes("index.html", user=request.user)
+            return Response(html, media_type="text/html; charset=utf-8")
+        ```
+        """
+        return TemperedBase.render_bytes(self, name, **context)
+
+    async def render_async(self, name: str, **context: t.Any) -> Markup:
+        """
+        Render a template that awaits anything, such as `{{ await user.get_posts() }}` or `<t:for for="post" in="user.posts()" async>`.
+
+        Templates only become async when they, or a component or layout they use, await something. `render_async` can render any template, while `render` raises a `TypeError` for async templates.
+
+        Args:
+            name: The name of the template to render
+            context: The parameters to pass to the template
+
+        **Example with FastAPI**
+
+        ```python
+        @app.get("/users/{user_id}", response_class=HTMLResponse)
+        async def user_page(user_id: int):
+            return await tempered.render_async("user.html", user_id=user_id)
+        ```
+        """
+        return await TemperedBase.render_async(self, name, **context)
+
+    def render_stream(self, name: str, **context: t.Any) -> RenderStream:
+        """
+        Render a template in chunks, which are sent as the template is rendered.
+
+        Requires `streaming=True`. Each chunk has at least `stream_chunk_size` characters, apart from the last one. The chunks are rendered in the request scope `render_stream` was called in, even if they're read after it's left.
+
+        Call `.cancel()` on the stream, from any thread, to stop rendering at the next loop or component once the client has disconnected.
+
+        Args:
+            name: The name of the template to render
+            context: The parameters to pass to the template
+
+        **Example with Starlette**
+
+        ```python
+        tempered = Tempered(template_folder="templates", streaming=True)
+
+        async def homepage(request):
+            chunks = tempered.render_stream("index.html", user=request.user)
+            return StreamingResponse(chunks, media_type="text/html")
+        ```
+        """
+        return TemperedBase.render_stream(self, name, **context)
+
+    def render_into(self, writer: Writer, name: str, **context: t.Any):
+        """
+        Render a template straight into a writer, such as a file, `io.StringIO` or a framework's response.
+
+        With `streaming=True` the page is written in chunks of `stream_chunk_size` as it's rendered. Components write into the chunk being built by the template that calls them, so nested content isn't copied into each template's output. Otherwise the page is written once it's finished.
+
+        Args:
+            writer: An object with a `write(html)` method
+            name: The name of the template to render
+            context: The parameters to pass to the template
+
+        **Example with Django**
+
+        ```python
+        def homepage(request):
+            response = HttpResponse(content_type="text/html")
+            tempered.render_into(response, "index.html", user=request.user)
+            return response
+        ```
+        """
+        TemperedBase.render_into(self, writer, name, **context)
+
+    def render_string(self, html: str, **context: t.Any) -> Markup:
         """
         Render a template from a string, useful for one-off templates.
 
@@ -238,13 +506,14 @@ class Tempered(TemperedBase):
         """
         return TemperedBase.render_string(self, html, **context)
 
-    def add_global(self, name: str, value: t.Any):
+    def add_global(self, name: str, value: t.Any, frozen: bool = False):
         """
         Add a global variable to the template context
 
         Args:
             name: The name the global is assigned to
             value: The value of the global variable
+            frozen: Prevent the global from changing, see `freeze_globals`
 
         **Example**
 
@@ -252,4 +521,87 @@ class Tempered(TemperedBase):
         tempered.add_global("DOMAIN", "example.com")
         ```
         """
-        TemperedBase.add_global(self, name, value)
+        TemperedBase.add_global(self, name, value, frozen)
+
+    def freeze_globals(self):
+        """
+        Prevent the current globals from changing, templates that use them are recompiled.
+
+        Strings, numbers, booleans and None are compiled into templates as constants, which lets unused branches be removed. Frozen globals always take priority over variables passed to `render`, and changing one raises a `FrozenGlobalException`.
+
+        **Example**
+
+        ```python
+        tempered.add_global("SITE_NAME", "Example")
+        tempered.add_global("SHOW_BANNER", False)
+        tempered.freeze_globals()
+        ```
+        """
+        TemperedBase.freeze_globals(self)
+
+    def request_scope(self, **values: t.Any) -> t.ContextManager[None]:
+        """
+        Add variables to every template rendered inside a `with` block, without passing them to `render`.
+
+        The variables are only visible to the current thread or asyncio task, so they can hold per-request data such as the current user. Variables passed to `render` take priority over them, and they take priority over globals.
+
+        Args:
+            values: The variables to add
+
+        **Example**
+
+        ```python
+        with tempered.request_scope(user=request.user, csrf_token=token):
+            html = tempered.render("page.html")
+        ```
+        """
+        return TemperedBase.request_scope(self, **values)
+
+    def export_module(self, file: t.Union[Path, str]):
+        """
+        Write the compiled templates to a python module.
+
+        The module can render the templates without tempered or it's dependencies, so they can be compiled at build time.
+        This is what the `tempered build` command uses.
+
+        Args:
+            file: The python file to create
+
+        **Example**
+
+        ```python
+        tempered = Tempered(template_folder="templates")
+        tempered.export_module("compiled_templates.py")
+
+        import compiled_templates
+        html = compiled_templates.render("index.html", title="Home")
+        ```
+        """
+        TemperedBase.export_module(self, file)
+
+    def cache_info(self) -> CacheInfo:
+        """
+        Get the hit and miss counts of the template cache, this is all zeros if `cache_folder` isn't set.
+
+        **Example**
+
+        ```python
+        tempered = Tempered(template_folder="templates", cache_folder=".tempered_cache")
+        info = tempered.cache_info()
+        print(f"{info.hits} hits, {info.misses} misses")
+        ```
+        """
+        return TemperedBase.cache_info(self)
+
+    def cancel_info(self) -> CancelInfo:
+        """
+        Get the number of streamed and async renders that were cancelled, such as when a client disconnected, by where they stopped.
+
+        **Example**
+
+        ```python
+        info = tempered.cancel_info()
+        print(f"{info.total} cancelled, {info.loop} in a loop")
+        ```
+        """
+        return TemperedBase.cancel_info(self)
@@ -11,6 +11,8 @@ class TemplateInfo:
     is_layout: bool = False
     parameters: t.List[nodes.TemplateParameter] = field(default_factory=list)
     layout: t.Union[str, None] = None
+    inline: t.Union[bool, None] = None
+    explicit_props: t.Union[bool, None] = None
 
     has_default_slot: bool = False
     slots: t.List[nodes.SlotInfo] = field(default_factory=list)
@@ -36,6 +38,8 @@ def create_template_info(
 
     # TODO: refactor metadata and introspection
     ctx.layout = metadata.layout
+    ctx.inline = metadata.inline
+    ctx.explicit_props = metadata.explicit_props
     ctx.style_includes = set(metadata.style_includes)
     # TODO: Don't need import node, atrifact from when they were {% import %}
     ctx.imports = [
@@ -47,7 +51,7 @@ def create_template_info(
     for name, value in metadata.parameters.items():
         if isinstance(value, str):
             type_str = value
-            default_str = value
+            default_str = None
         else:
             type_str = value["type"]
             default_str = value["default"]
@@ -4,7 +4,7 @@ from .. import errors
 from ..css.extract import extract_css_from_soup
 from ..parsing import nodes
 from ..parsing.metadata import extract_metadata_from_soup
-from ..parsing.parser import parse_soup_into_nodes
+from ..parsing.parser import expand_empty_tags, parse_soup_into_nodes
 from ..utils.minify import minify_html
 from ..utils.soup import HtmlSoup
 from . import introspection, postprocess
@@ -37,7 +37,7 @@ def _parse_template(
     html: str,
     file: t.Union[Path, None],
 ) -> nodes.Template:
-    minifed_html = minify_html(html)
+    minifed_html = minify_html(expand_empty_tags(html))
     soup = HtmlSoup(minifed_html)
     css = extract_css_from_soup(soup, prefix=name)
     metadata = extract_metadata_from_soup(soup)
@@ -66,6 +66,8 @@ def construct_template_obj(
             components_calls=info.components_calls,
             style_includes=info.style_includes,
             layout=info.layout,
+            inline=info.inline,
+            explicit_props=info.explicit_props,
             blocks=info.blocks,
             slots=info.slots,
             has_default_slot=info.has_default_slot,
@@ -81,6 +83,8 @@ def construct_template_obj(
         components_calls=info.components_calls,
         style_includes=info.style_includes,
         layout=info.layout,
+        inline=info.inline,
+        explicit_props=info.explicit_props,
         blocks=info.blocks,
         imports=info.imports,
     )
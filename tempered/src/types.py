@@ -90,7 +90,7 @@ def create_render_func_overload(template: parsing.Template) -> ast.FunctionDef:
     func_def = ast_utils.create_stmt(
         """
         @t.overload
-        def render() -> str:
+        def render() -> Markup:
             ...
         """,
         ast.FunctionDef,
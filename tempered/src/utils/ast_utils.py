@@ -42,11 +42,11 @@ None_ = Constant(None)
 
 
 def List(value: Iterable[t.Union[LiteralType, ast.expr]]) -> ast.List:
-    return ast.List(elts=_IterableConstant(value))
+    return ast.List(elts=_IterableConstant(value), ctx=ast.Load())
 
 
 def Tuple(value: Iterable[t.Union[LiteralType, ast.expr]]) -> ast.Tuple:
-    return ast.Tuple(elts=_IterableConstant(value))
+    return ast.Tuple(elts=_IterableConstant(value), ctx=ast.Load())
 
 
 def Set(value: Iterable[t.Union[LiteralType, ast.expr]]) -> ast.Set:
@@ -86,7 +86,7 @@ def Call(
 
     return ast.Call(
         func=func,
-        args=arguments,
+        args=list(arguments),
         keywords=call_keywords,
     )
 
@@ -99,6 +99,24 @@ def Name(ident: str) -> ast.Name:
     return ast.Name(id=ident, ctx=ast.Load())
 
 
+def Store(target: ast.expr) -> ast.expr:
+    "Create a copy of an expression that can be assigned to"
+    if isinstance(target, ast.Name):
+        return ast.Name(id=target.id, ctx=ast.Store())
+    elif isinstance(target, ast.Attribute):
+        return ast.Attribute(value=target.value, attr=target.attr, ctx=ast.Store())
+    elif isinstance(target, ast.Subscript):
+        return ast.Subscript(value=target.value, slice=target.slice, ctx=ast.Store())
+    elif isinstance(target, ast.Starred):
+        return ast.Starred(value=Store(target.value), ctx=ast.Store())
+    elif isinstance(target, ast.Tuple):
+        return ast.Tuple(elts=[Store(elt) for elt in target.elts], ctx=ast.Store())
+    elif isinstance(target, ast.List):
+        return ast.List(elts=[Store(elt) for elt in target.elts], ctx=ast.Store())
+    else:
+        raise ValueError(f"Cannot assign to {unparse(target)}")
+
+
 Str = Name("str")
 Int = Name("int")
 Float = Name("float")
@@ -162,6 +180,23 @@ def Function(
     )
 
 
+def AsyncFunction(
+    name: str,
+    args: ast.arguments,
+    body: Sequence[ast.stmt],
+    returns: t.Union[ast.expr, None] = None,
+    decorators: Sequence[ast.expr] = [],
+) -> ast.AsyncFunctionDef:
+    return ast.AsyncFunctionDef(
+        name=name,
+        args=args,
+        body=list(body),
+        returns=returns,
+        decorator_list=list(decorators),
+        type_params=[],
+    )
+
+
 def ClassDef(
     name: str,
     bases: t.List[ast.expr] = [],
@@ -188,7 +223,7 @@ def AddAssign(
 
     return ast.AugAssign(
         op=ast.Add(),
-        target=target,
+        target=Store(target),
         value=value,
     )
 
@@ -203,7 +238,7 @@ def Assign(
         value = Constant(value)
 
     return ast.Assign(
-        targets=[target],
+        targets=[Store(target)],
         value=value,
         type_comment=None,
     )
@@ -225,7 +260,7 @@ def UnaryOp(op: ast.unaryop, arg: ast.expr) -> ast.expr:
 
 
 def BoolOp(op: ast.boolop, *args: ast.expr) -> ast.expr:
-    return ast.BoolOp(op=op, values=args)
+    return ast.BoolOp(op=op, values=list(args))
 
 
 def And(*args: ast.expr) -> ast.expr:
@@ -283,7 +318,7 @@ def Comprehension(
         loop_var = Name(loop_var)
 
     return ast.comprehension(
-        target=loop_var,
+        target=Store(loop_var),
         iter=iterable,
         ifs=[],
         is_async=0,
@@ -312,6 +347,21 @@ def ListComp(
     )
 
 
+def For(
+    target: ast.expr,
+    iterable: ast.expr,
+    body: Sequence[ast.stmt],
+    is_async: bool = False,
+) -> t.Union[ast.For, ast.AsyncFor]:
+    loop = ast.AsyncFor if is_async else ast.For
+    return loop(
+        target=Store(target),
+        iter=iterable,
+        body=list(body),
+        orelse=[],
+    )
+
+
 def Return(value: t.Union[ast.expr, None] = None) -> ast.Return:
     return ast.Return(value=value)
 
@@ -1,3 +1,15 @@
-from .utils import build_template, build_templates, test
+from .utils import (
+    build_environment,
+    build_template,
+    build_templates,
+    called_components,
+    test,
+)
 
-__all__ = ["build_template", "build_templates", "test"]
+__all__ = [
+    "build_environment",
+    "build_template",
+    "build_templates",
+    "called_components",
+    "test",
+]
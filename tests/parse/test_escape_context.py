@@ -0,0 +1,37 @@
+from tempered.src.parsing.nodes import ExprNode
+from tempered.src.parsing.parser import parse_soup_into_nodes
+from tempered.src.utils.soup import HtmlSoup
+from tests import build_template
+
+
+def expr_contexts(html: str):
+    nodes = parse_soup_into_nodes(HtmlSoup(html))
+    return [node.context for node in nodes if isinstance(node, ExprNode)]
+
+
+def test_text_and_attribute_contexts():
+    html = '<p title="{{ a }}">{{ b }}</p>'
+    assert expr_contexts(html) == ["attribute", "text"]
+
+
+def test_url_context_ends_after_scheme_or_path():
+    html = '<a href="{{ a }}{{ b }}/{{ c }}"></a><a href="https:{{ d }}"></a>'
+    assert expr_contexts(html) == ["url", "url", "attribute", "attribute"]
+
+
+def test_values_before_a_scheme_are_checked_with_it():
+    html = '<a href="{{ a }}:alert({{ b }})"></a><a href="java{{ c }}:{{ d }}"></a>'
+    assert expr_contexts(html) == ["url", "attribute", "url", "attribute"]
+
+    render = build_template('<a href="{{ scheme }}:alert(1)"></a>')
+    html = render(scheme="javascript")
+    assert html == '<a href="about:invalid#unsafe-urlalert(1)"></a>'
+    assert render(scheme="https") == '<a href="https:alert(1)"></a>'
+
+    render = build_template('<a href="java{{ rest }}:alert(1)"></a>')
+    html = render(rest="script")
+    assert html == '<a href="about:invalid#unsafe-urlalert(1)"></a>'
+
+
+def test_script_text_context_isnt_known():
+    assert expr_contexts("<script>let x = '{{ a }}'</script>") == ["html"]
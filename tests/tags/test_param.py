@@ -1,6 +1,6 @@
 import pytest
 import tempered
-from tests import build_template
+from tests import build_template, build_templates
 
 
 def test_parameters_using_default():
@@ -42,3 +42,42 @@ def test_parameters_doesnt_allow_duplicates():
         </script>
         """
         )
+
+
+def test_short_parameters_only_set_type():
+    func = build_template(
+        """
+    <script type="tempered/metadata">
+    parameters:
+        foo: str
+    </script>
+    {{ foo }}
+    """
+    )
+    assert func(foo="abc") == "abc"
+    with pytest.raises(TypeError):
+        func()
+
+
+def test_short_parameters_are_required_by_components():
+    func = build_templates(
+        """
+    <script type="tempered/metadata">
+    imports:
+        Title: title
+    </script>
+    <t:Title></t:Title>
+    """,
+        (
+            "title",
+            """
+    <script type="tempered/metadata">
+    parameters:
+        text: str
+    </script>
+    <h1>{{ text }}</h1>
+    """,
+        ),
+    )
+    with pytest.raises(TypeError):
+        func()
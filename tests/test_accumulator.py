@@ -0,0 +1,42 @@
+import pytest
+from tempered import Tempered
+
+LAYOUT = """
+<head><t:styles></t:styles></head>
+<main><t:slot></t:slot></main>
+<footer><t:slot name="footer">Default Footer</t:slot></footer>
+"""
+COMPONENT = "<li>{{ item }}</li>"
+PAGE = """
+<script type="tempered/metadata">
+layout: layout.html
+imports:
+    Item: item.html
+</script>
+<ul>
+    <t:for for="number" in="items">
+        <t:if condition="number % 2">
+            <t:Item item="number"></t:Item>
+        </t:if><t:else>
+            {{ number }}
+        </t:else>
+    </t:for>
+</ul>
+"""
+
+
+def render(accumulator: str, **context) -> str:
+    tempered = Tempered(accumulator=accumulator, generate_types=False)  # type: ignore
+    tempered.add_from_mapping(
+        {"layout.html": LAYOUT, "item.html": COMPONENT, "page.html": PAGE}
+    )
+    return tempered.render("page.html", **context)
+
+
+@pytest.mark.parametrize("items", [[], [1], list(range(100))])
+def test_join_accumulator_matches_concat(items):
+    assert render("join", items=items) == render("concat", items=items)
+
+
+def test_join_accumulator_fills_slot_defaults():
+    assert "Default Footer" in render("join", items=[])
@@ -0,0 +1,255 @@
+import asyncio
+import importlib.util
+from pathlib import Path
+import pytest
+from tempered import Tempered
+from tests import build_environment
+
+USER = """
+<script type="tempered/metadata">
+parameters:
+    user_id: int
+</script>
+<p>{{ await get_name(user_id) }}</p>
+"""
+STATIC = """
+<script type="tempered/metadata">
+parameters:
+    text: str
+</script>
+<span>{{ text }}</span>
+"""
+PAGE = """
+<script type="tempered/metadata">
+imports:
+    User: user.html
+    Static: static.html
+parameters:
+    user_ids: list
+</script>
+<t:for for="user_id" in="user_ids"><t:User user_id="user_id"></t:User></t:for>
+<t:Static text="'Static'"></t:Static>
+"""
+
+
+async def get_name(user_id: int) -> str:
+    await asyncio.sleep(0)
+    return f"User {user_id}"
+
+
+TEMPLATES = {"user.html": USER, "static.html": STATIC, "page.html": PAGE}
+
+
+def build_pages(**options) -> Tempered:
+    options.setdefault("inline_threshold", 0)
+    tempered = build_environment(TEMPLATES, **options)
+    tempered.add_global("get_name", get_name)
+    return tempered
+
+
+@pytest.mark.parametrize("inline_threshold", [0, 1000])
+def test_awaited_expressions(inline_threshold: int):
+    tempered = build_pages(inline_threshold=inline_threshold)
+    html = asyncio.run(tempered.render_async("page.html", user_ids=[1, 2]))
+    assert html == "<p>User 1</p><p>User 2</p><span>Static</span>"
+
+
+def test_only_templates_that_await_are_async():
+    tempered = build_pages()
+    assert tempered.render("static.html", text="Text") == "<span>Text</span>"
+    with pytest.raises(TypeError, match="render_async"):
+        tempered.render("page.html", user_ids=[])
+
+
+def test_sync_templates_can_be_rendered_async():
+    tempered = build_pages()
+    html = asyncio.run(tempered.render_async("static.html", text="Text"))
+    assert html == "<span>Text</span>"
+
+
+def test_render_rejects_async_templates():
+    tempered = build_pages()
+    with pytest.raises(TypeError, match="render_async"):
+        tempered.render("user.html", user_id=1)
+
+
+def test_async_for():
+    tempered = build_pages()
+    tempered.add_from_string(
+        "list.html",
+        '<t:for for="name" in="iter_names()" async>{{ name }},</t:for>',
+    )
+
+    async def iter_names():
+        for name in ("a", "b"):
+            await asyncio.sleep(0)
+            yield name
+
+    html = asyncio.run(tempered.render_async("list.html", iter_names=iter_names))
+    assert html == "a,b,"
+
+
+def test_await_in_code_block():
+    tempered = build_pages()
+    tempered.add_from_string(
+        "code.html",
+        """
+        <script type="tempered/python">name = await get_name(3)</script>
+        <p>{{ name }}</p>
+        """,
+    )
+    assert asyncio.run(tempered.render_async("code.html")) == "<p>User 3</p>"
+
+
+def test_async_layout():
+    tempered = build_pages()
+    tempered.add_from_mapping(
+        {
+            "layout.html": "<title>{{ await get_name(1) }}</title><t:slot></t:slot>",
+            "content.html": """
+                <script type="tempered/metadata">
+                layout: layout.html
+                </script>
+                <main>Content</main>
+            """,
+        }
+    )
+    html = asyncio.run(tempered.render_async("content.html"))
+    assert html == "<title>User 1</title><main>Content</main>"
+
+
+def test_async_templates_arent_streamed():
+    tempered = build_pages(streaming=True)
+    assert list(tempered.render_stream("static.html", text="Text")) == [
+        "<span>Text</span>"
+    ]
+    with pytest.raises(RuntimeError, match="async"):
+        tempered.render_stream("user.html", user_id=1)
+
+
+def test_standalone_module_renders_async(tmp_path: Path):
+    file = tmp_path / "async_templates.py"
+    tempered = build_pages()
+    tempered.export_module(file)
+
+    spec = importlib.util.spec_from_file_location("async_templates", file)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    module.add_global("get_name", get_name)
+    html = asyncio.run(module.render_async("page.html", user_ids=[1]))
+    assert html == "<p>User 1</p><span>Static</span>"
+
+
+def create_dashboard(between: str = "", **options) -> Tempered:
+    tempered = build_pages(**options)
+    widgets = between.join(f'<t:User user_id="{i}"></t:User>' for i in range(4))
+    tempered.add_from_string(
+        "dashboard.html",
+        f"""
+        <script type="tempered/metadata">
+        imports:
+            User: user.html
+        </script>
+        <h1>Dashboard</h1>{widgets}<p>{{{{ await get_name(4) }}}}</p>
+        """,
+    )
+    return tempered
+
+
+def test_sibling_components_are_awaited_at_once():
+    tempered = create_dashboard()
+    running = []
+    max_running = 0
+
+    async def get_name(user_id: int) -> str:
+        nonlocal max_running
+        running.append(user_id)
+        max_running = max(max_running, len(running))
+        await asyncio.sleep(0)
+        running.remove(user_id)
+        return f"User {user_id}"
+
+    html = asyncio.run(tempered.render_async("dashboard.html", get_name=get_name))
+    assert max_running == 5
+    assert html == (
+        "<h1>Dashboard</h1>"
+        "<p>User 0</p><p>User 1</p><p>User 2</p><p>User 3</p>"
+        "<p>User 4</p>"
+    )
+
+
+def test_components_separated_by_code_are_awaited_in_order():
+    tempered = create_dashboard(
+        between='<script type="tempered/python">order.append("code")</script>'
+    )
+    order = []
+
+    async def get_name(user_id: int) -> str:
+        order.append(user_id)
+        await asyncio.sleep(0)
+        return f"User {user_id}"
+
+    asyncio.run(
+        tempered.render_async("dashboard.html", get_name=get_name, order=order)
+    )
+    assert order == [0, "code", 1, "code", 2, "code", 3, 4]
+
+
+def test_failed_component_cancels_its_siblings():
+    tempered = create_dashboard()
+    cancelled = []
+
+    async def get_name(user_id: int) -> str:
+        if user_id == 0:
+            raise ValueError("Failed to load user")
+
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(user_id)
+            raise
+        return f"User {user_id}"
+
+    async def render():
+        with pytest.raises(ValueError):
+            await tempered.render_async("dashboard.html", get_name=get_name)
+
+        await asyncio.sleep(0)  # Let the other components handle the cancel
+        return sorted(cancelled)
+
+    assert asyncio.run(render()) == [1, 2, 3, 4]
+
+
+class Session:
+    "Like SQLAlchemy's AsyncSession, it can't be used by two tasks at once"
+
+    in_use = False
+
+    async def get_name(self, user_id: int) -> str:
+        if self.in_use:
+            raise RuntimeError("The session is already in use")
+
+        self.in_use = True
+        await asyncio.sleep(0)
+        self.in_use = False
+        return f"User {user_id}"
+
+
+@pytest.mark.parametrize("inline_threshold", [0, 32])
+def test_sequential_awaits_can_share_a_session(inline_threshold: int):
+    tempered = create_dashboard(inline_threshold=inline_threshold)
+    render = tempered.render_async("dashboard.html", get_name=Session().get_name)
+    with pytest.raises(RuntimeError, match="already in use"):
+        asyncio.run(render)
+
+    tempered = create_dashboard(
+        concurrent_awaits=False, inline_threshold=inline_threshold
+    )
+    render = tempered.render_async("dashboard.html", get_name=Session().get_name)
+    assert asyncio.run(render) == (
+        "<h1>Dashboard</h1>"
+        "<p>User 0</p><p>User 1</p><p>User 2</p><p>User 3</p>"
+        "<p>User 4</p>"
+    )
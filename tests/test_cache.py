@@ -1,5 +1,7 @@
 import time
+from pathlib import Path
 import pytest
+from tempered import Tempered
 from tests import build_template
 
 
@@ -32,3 +34,53 @@ def test_different_templates_arent_cached():
 
     # The second parse should be much faster
     assert (first_duration / secondary_duration) < 1.5
+
+
+def create_folder(folder: Path):
+    folder.joinpath("layout.html").write_text("<title>A</title><t:slot></t:slot>")
+    folder.joinpath("component.html").write_text("<b>{{ text }}</b>")
+    folder.joinpath("page.html").write_text(
+        """
+        <script type="tempered/metadata">
+        layout: layout.html
+        imports:
+            Component: component.html
+        </script>
+        <t:Component text="'foo'"></t:Component>
+        """
+    )
+
+
+def test_disk_cache_is_used_on_rebuild(tmp_path: Path):
+    templates = tmp_path.joinpath("templates")
+    templates.mkdir()
+    create_folder(templates)
+    cache_folder = tmp_path.joinpath("cache")
+
+    first = Tempered(template_folder=templates, cache_folder=cache_folder)
+    assert first.cache_info().hits == 0
+    assert first.cache_info().misses == 6
+
+    second = Tempered(template_folder=templates, cache_folder=cache_folder)
+    assert second.cache_info().hits == 6
+    assert second.cache_info().misses == 0
+    assert first.render("page.html") == second.render("page.html")
+
+
+def test_disk_cache_invalidates_dependents(tmp_path: Path):
+    templates = tmp_path.joinpath("templates")
+    templates.mkdir()
+    create_folder(templates)
+    cache_folder = tmp_path.joinpath("cache")
+
+    Tempered(template_folder=templates, cache_folder=cache_folder)
+    templates.joinpath("layout.html").write_text(
+        "<title>B</title><t:slot></t:slot>"
+    )
+    tempered = Tempered(template_folder=templates, cache_folder=cache_folder)
+    info = tempered.cache_info()
+
+    # component.html is the only template without layout.html as a dependency
+    assert info.parse_hits == 2
+    assert info.code_hits == 1
+    assert "<title>B</title>" in tempered.render("page.html")
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+import pytest
+from tempered import CancelInfo
+from tests import build_environment
+
+LIST = """
+<script type="tempered/metadata">
+parameters:
+    items: list
+</script>
+<ul><t:for for="item" in="items"><li>{{ item }}</li></t:for></ul>
+"""
+PAGE = """
+<script type="tempered/metadata">
+imports:
+    List: list.html
+parameters:
+    items: list
+</script>
+<h1>Page</h1><t:flush/><t:List items="items"></t:List>
+"""
+DEFER = """
+<main>Page</main>
+<t:defer><p>{{ load() }}</p></t:defer>
+"""
+
+
+TEMPLATES = {"list.html": LIST, "page.html": PAGE, "defer.html": DEFER}
+OPTIONS = {"inline_threshold": 0, "streaming": True, "stream_chunk_size": 1}
+
+
+def test_cancelled_stream_stops_at_next_loop():
+    tempered = build_environment(TEMPLATES, **OPTIONS)
+    rendered = []
+
+    def items():
+        for i in range(100):
+            rendered.append(i)
+            if i == 2:
+                chunks.cancel()
+            yield i
+
+    chunks = tempered.render_stream("list.html", items=items())
+    assert "".join(chunks) == "<ul><li>0</li><li>1</li>"
+    assert rendered == [0, 1, 2]
+    assert tempered.cancel_info() == CancelInfo(loop=1)
+
+
+def test_cancelled_stream_stops_at_next_component():
+    tempered = build_environment(TEMPLATES, **OPTIONS)
+    chunks = tempered.render_stream("page.html", items=[1, 2])
+    assert next(chunks) == "<h1>Page</h1>"
+
+    chunks.cancel()
+    assert list(chunks) == []
+    assert tempered.cancel_info() == CancelInfo(component=1)
+
+
+def test_closed_stream_is_counted():
+    tempered = build_environment(TEMPLATES, **OPTIONS)
+    chunks = tempered.render_stream("list.html", items=[1, 2])
+    next(chunks)
+    chunks.close()
+    assert tempered.cancel_info() == CancelInfo(chunk=1)
+    assert tempered.cancel_info().total == 1
+
+
+def test_finished_stream_isnt_counted():
+    tempered = build_environment(TEMPLATES, **OPTIONS)
+    list(tempered.render_stream("list.html", items=[1, 2]))
+    assert tempered.cancel_info().total == 0
+
+
+def test_cancelled_stream_stops_waiting_for_deferred_blocks():
+    tempered = build_environment(TEMPLATES, **OPTIONS)
+    released = threading.Event()
+    chunks = tempered.render_stream("defer.html", load=lambda: released.wait(5))
+    try:
+        assert next(chunks).startswith("<main>Page</main>")
+        threading.Timer(0.05, chunks.cancel).start()
+        assert list(chunks) == []
+        assert tempered.cancel_info() == CancelInfo(deferred=1)
+    finally:
+        released.set()
+
+
+def test_cancelled_async_render_is_counted():
+    tempered = build_environment(TEMPLATES, **OPTIONS)
+    tempered.add_from_string("async.html", "<p>{{ await load() }}</p>")
+
+    async def load() -> str:
+        await asyncio.sleep(5)
+        return "Loaded"
+
+    async def render():
+        task = asyncio.ensure_future(tempered.render_async("async.html", load=load))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(render())
+    assert tempered.cancel_info() == CancelInfo(awaiting=1)
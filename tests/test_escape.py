@@ -1,6 +1,189 @@
+import pytest
+from tempered import Markup, Tempered
 from tempered import _internals as internals
+from tempered._internals.escape import BACKENDS
+from tests import build_environment, build_template
 
 
 def test_escape_str():
     assert "foo" == internals.escape("foo")
     assert "<script>" != internals.escape("<script>")
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_escape_backends(backend: str):
+    escape = BACKENDS[backend]
+    assert escape("plain text") == "plain text"
+    assert escape("<a href='x'>\"&\"</a>") == (
+        "&lt;a href=&#39;x&#39;&gt;&#34;&amp;&#34;&lt;/a&gt;"
+    )
+    assert escape("&amp;") == "&amp;amp;"
+    assert escape(1.5) == "1.5"
+    assert escape(None) == "None"
+    assert type(escape("<")) is str
+
+
+NUMBERS = """
+<script type="tempered/metadata">
+parameters:
+    count: int
+    items: list
+</script>
+<t:for for="i, item" in="enumerate(items)">
+    <b>{{ i + 1 }}: {{ item }}</b>
+</t:for>
+<p>{{ len(items) }} / {{ count }}</p>
+"""
+
+
+TEMPLATES = {
+    "numbers.html": NUMBERS,
+    "page.html": """
+        <script type="tempered/metadata">
+        imports:
+            Numbers: numbers.html
+        </script>
+        <t:Numbers count="total" items="values"></t:Numbers>
+    """,
+}
+
+
+class Bold(int):
+    def __str__(self) -> str:
+        return "<b>"
+
+
+class Text:
+    def __str__(self) -> str:
+        return "<b>"
+
+
+def test_numeric_expressions_arent_escaped():
+    tempered = build_environment(TEMPLATES)
+    html = tempered.render("numbers.html", count="<b>", items=["<i>"])
+    assert html == "<b>1:&lt;i&gt;</b><p>1/&lt;b&gt;</p>"
+
+
+def test_reassigned_loop_variables_are_escaped():
+    render = build_template(
+        """
+        <t:for for="i" in="range(1)">
+            <script type="tempered/python">i = "<b>"</script>
+            {{ i }}
+        </t:for>
+        """,
+    )
+    assert render() == "&lt;b&gt;"
+
+
+@pytest.mark.parametrize("inline_threshold", [0, 32])
+def test_strict_types_are_checked(inline_threshold: int):
+    tempered = build_environment(
+        TEMPLATES, strict_types=True, inline_threshold=inline_threshold
+    )
+    assert tempered.render("page.html", total=2, values=[]) == "<p>0/2</p>"
+    with pytest.raises(TypeError):
+        tempered.render("page.html", total="<b>", values=[])
+
+
+@pytest.mark.parametrize("count", [Bold(1), Text()])
+def test_strict_types_reject_values_that_render_html(count: object):
+    tempered = build_environment(TEMPLATES, strict_types=True)
+    html = tempered.render("numbers.html", count=1, items=["<i>"])
+    assert html == "<b>1:&lt;i&gt;</b><p>1/1</p>"
+    with pytest.raises(TypeError):
+        tempered.render("numbers.html", count=count, items=["<i>"])
+
+    tempered = build_environment(TEMPLATES)
+    html = tempered.render("numbers.html", count=count, items=["<i>"])
+    assert html == "<b>1:&lt;i&gt;</b><p>1/&lt;b&gt;</p>"
+
+
+def test_strict_types_allow_type_variables():
+    render = build_template(
+        """
+        <script type="tempered/metadata">
+        parameters:
+            type: str
+            size: int
+        </script>
+        <input type="{{ type }}" size="{{ size }}">
+        """,
+        strict_types=True,
+    )
+    html = render(type="text", size=2)
+    assert html == '<input size="2" type="text"></input>'
+
+
+def test_markup_isnt_escaped():
+    render = build_template("<p>{{ value }}</p>")
+    html = render(value=Markup("<b>Bold</b>"))
+    assert html == "<p><b>Bold</b></p>"
+
+
+def test_html_protocol_isnt_escaped():
+    class Comment:
+        def __html__(self) -> str:
+            return "<i>Comment</i>"
+
+    render = build_template("<p>{{ value }}</p>")
+    assert render(value=Comment()) == "<p><i>Comment</i></p>"
+
+
+def test_rendered_templates_arent_escaped_again():
+    tempered = Tempered(generate_types=False)
+    tempered.add_from_string("comment", "<i>{{ text }}</i>")
+    tempered.add_from_string("main", "<p>{{ body }}</p>")
+    body = tempered.render("comment", text="<3")
+    assert isinstance(body, Markup)
+    assert tempered.render("main", body=body) == "<p><i>&lt;3</i></p>"
+
+
+def test_text_quotes_arent_escaped():
+    render = build_template("<p>{{ value }}</p>")
+    html = render(value="\"It's\" <b> & </b>")
+    assert html == "<p>\"It's\" &lt;b&gt; &amp; &lt;/b&gt;</p>"
+
+
+def test_attribute_quotes_are_escaped():
+    render = build_template('<p title="{{ value }}"></p>')
+    html = render(value="\"It's\" <b>")
+    assert html == '<p title="&#34;It\'s&#34; &lt;b>"></p>'
+
+
+@pytest.mark.parametrize(
+    "url",
+    ["javascript:alert(1)", " JavaScript:alert(1)", "java\tscript:alert(1)", "data:,"],
+)
+def test_unsafe_urls_are_replaced(url: str):
+    render = build_template('<a href="{{ url }}"></a>')
+    assert render(url=url) == '<a href="about:invalid#unsafe-url"></a>'
+
+
+@pytest.mark.parametrize(
+    "url",
+    ["https://example.com/?a=1&b=2", "/users/1", "page#title:1", "mailto:a@b.com"],
+)
+def test_safe_urls_are_kept(url: str):
+    render = build_template('<a href="{{ url }}"></a>')
+    expected = url.replace("&", "&amp;")
+    assert render(url=url) == f'<a href="{expected}"></a>'
+
+
+def test_urls_after_a_path_arent_checked():
+    render = build_template('<a href="/search?q={{ query }}"></a>')
+    html = render(query="javascript:")
+    assert html == '<a href="/search?q=javascript:"></a>'
+
+
+def test_url_markup_isnt_checked():
+    render = build_template('<img src="{{ url }}">')
+    html = render(url=Markup("data:image/png;base64,AA=="))
+    assert html == '<img src="data:image/png;base64,AA=="></img>'
+
+
+def test_script_text_is_fully_escaped():
+    render = build_template("<script>let x = '{{ value }}'</script>")
+    html = render(value="'; alert(1); '")
+    assert "&#39;; alert(1); &#39;" in html
+
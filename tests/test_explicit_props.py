@@ -0,0 +1,129 @@
+import pytest
+import tempered
+from tempered import Tempered
+from tests import build_environment
+
+CARD = """
+<script type="tempered/metadata">
+parameters:
+    title: str
+{metadata}
+</script>
+<h2>{{ title }}</h2>{{ SITE }}
+"""
+PAGE = """
+<script type="tempered/metadata">
+imports:
+    Card: card.html
+parameters:
+    items: list
+</script>
+<t:for for="item" in="items">
+    <t:Card title="item"></t:Card>
+</t:for>
+"""
+
+
+def build_pages(card: str = CARD, page: str = PAGE, **options) -> Tempered:
+    card = card.replace("{metadata}", "")
+    options.setdefault("inline_threshold", 0)
+    tempered = build_environment({"card.html": card, "page.html": page}, **options)
+    tempered.add_global("SITE", "Site")
+    return tempered
+
+
+@pytest.mark.parametrize(
+    ("explicit_props", "expected"),
+    [(True, "<h2>a</h2>Site"), (False, "<h2>a</h2>Context")],
+)
+def test_explicit_props_arent_passed_the_context(explicit_props: bool, expected: str):
+    tempered = build_pages(explicit_props=explicit_props)
+    html = tempered.render("page.html", items=["a"], SITE="Context")
+    assert html == expected
+
+
+def test_explicit_props_pages_use_their_render_context():
+    tempered = build_pages(explicit_props=True)
+    tempered.add_from_string("greeting.html", "<p>{{ user }}</p>{{ SITE }}")
+    html = tempered.render("greeting.html", user="Ben", SITE="Context")
+    assert html == "<p>Ben</p>Context"
+
+
+def test_explicit_props_can_be_set_by_templates():
+    card = CARD.replace("{metadata}", "explicit_props: true")
+    tempered = build_pages(card=card)
+    html = tempered.render("page.html", items=["a"], SITE="Context")
+    assert html == "<h2>a</h2>Site"
+
+
+def test_templates_can_opt_out_of_explicit_props():
+    card = CARD.replace("{metadata}", "explicit_props: false")
+    tempered = build_pages(card=card, explicit_props=True)
+    html = tempered.render("page.html", items=["a"], SITE="Context")
+    assert html == "<h2>a</h2>Context"
+
+
+@pytest.mark.parametrize("inline_threshold", [0, 32])
+def test_explicit_props_dont_use_context_variables(inline_threshold: int):
+    tempered = build_pages(
+        card="<p>{{ missing }}</p>",
+        page=PAGE.replace(' title="item"', ""),
+        explicit_props=True,
+        inline_threshold=inline_threshold,
+    )
+    with pytest.raises(RuntimeError, match="'missing' could not be resolved"):
+        tempered.render("page.html", items=["a"], missing="Context")
+
+
+def test_explicit_props_other_variables_are_resolved_when_rendering():
+    tempered = build_pages(
+        card="<p>{{ user }}</p>",
+        page=PAGE.replace(' title="item"', ""),
+        explicit_props=True,
+    )
+    with pytest.raises(RuntimeError, match="'user' could not be resolved"):
+        tempered.render("page.html", items=["a"], user="Context")
+
+    with tempered.request_scope(user="Scope"):
+        assert tempered.render("page.html", items=["a"]) == "<p>Scope</p>"
+
+    tempered.add_global("user", "Global")
+    assert tempered.render("page.html", items=["a"]) == "<p>Global</p>"
+
+
+def test_explicit_props_require_parameters():
+    with pytest.raises(tempered.InvalidTemplateException, match="missing parameter"):
+        build_pages(page=PAGE.replace(' title="item"', ""), explicit_props=True)
+
+
+def test_explicit_props_reject_unknown_parameters():
+    with pytest.raises(tempered.InvalidTemplateException, match="'subtitle'"):
+        build_pages(
+            page=PAGE.replace('title="item"', 'title="item" subtitle="item"'),
+            explicit_props=True,
+        )
+
+
+def test_explicit_props_layouts_arent_passed_the_context():
+    tempered = build_environment(
+        {
+            "layout.html": """
+                <script type="tempered/metadata">
+                parameters:
+                    title:
+                        type: str
+                        default: "'Default'"
+                </script>
+                <title>{{ title }}</title><t:slot></t:slot>
+            """,
+            "page.html": """
+                <script type="tempered/metadata">
+                layout: layout.html
+                </script>
+                <main></main>
+            """,
+        },
+        explicit_props=True,
+    )
+    html = tempered.render("page.html", title="Context")
+    assert html == "<title>Default</title><main></main>"
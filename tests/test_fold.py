@@ -0,0 +1,143 @@
+import pytest
+from tempered import Tempered
+from tests import build_environment, build_template, called_components
+
+BUTTON = """
+<script type="tempered/metadata">
+parameters:
+    label:
+        type: str
+</script>
+<button>{{ label }}</button>
+"""
+NAVBAR = """
+<nav>
+    <t:for for="link" in="['home', 'about']">
+        <a>{{ link }}</a>
+    </t:for>
+    <t:Button label="'<menu>'"></t:Button>
+</nav>
+"""
+
+
+TEMPLATES = {
+    "button.html": BUTTON,
+    "navbar.html": """
+        <script type="tempered/metadata">
+        imports:
+            Button: button.html
+        </script>
+    """
+    + NAVBAR,
+}
+PAGE_METADATA = """
+<script type="tempered/metadata">
+imports:
+    Navbar: navbar.html
+    Button: button.html
+</script>
+"""
+
+
+def build_page(page: str) -> Tempered:
+    templates = {**TEMPLATES, "page.html": PAGE_METADATA + page}
+    return build_environment(templates, inline_threshold=0)
+
+
+def test_constant_expressions_are_folded():
+    tempered = build_page("<p>{{ 'a' + 'b' }} {{ 1 < 2 }}{{ '<' * 2 }}</p>")
+    expected = build_page("<p>{{ a + b }} {{ x < y }}{{ lt * 2 }}</p>").render(
+        "page.html", a="a", b="b", x=1, y=2, lt="<"
+    )
+    assert tempered.render("page.html") == expected == "<p>abTrue&lt;&lt;</p>"
+
+
+def test_static_components_are_rendered_when_building():
+    tempered = build_page("<t:Button label=\"'go'\"></t:Button>")
+    assert tempered.render("page.html") == "<button>go</button>"
+    assert called_components(tempered, "page.html") == ()
+
+
+def test_dynamic_components_are_still_called():
+    tempered = build_page("<t:Navbar></t:Navbar><t:Button label=\"text\"></t:Button>")
+    expected = "<nav><a>home</a><a>about</a><button>&lt;menu&gt;</button></nav>"
+    html = tempered.render("page.html", text="stop")
+    assert html == expected + "<button>stop</button>"
+    assert sorted(called_components(tempered, "page.html")) == ["button", "navbar"]
+    assert called_components(tempered, "navbar.html") == ()
+
+
+@pytest.mark.parametrize("frozen", [True, False])
+def test_frozen_globals_are_folded(frozen: bool):
+    tempered = build_page("<p>{{ SITE + '!' }}</p>")
+    tempered.add_global("SITE", "<Site>", frozen=frozen)
+    assert tempered.render("page.html") == "<p>&lt;Site&gt;!</p>"
+
+
+def test_constant_branches_are_removed():
+    tempered = build_page(
+        """
+        <t:if condition="value">A</t:if>
+        <t:elif condition="False">B</t:elif>
+        <t:elif condition="1 + 1 == 2">C</t:elif>
+        <t:else>D</t:else>
+        """
+    )
+    assert tempered.render("page.html", value=True) == "A"
+    assert tempered.render("page.html", value=False) == "C"
+
+
+BANNER_TEMPLATES = {
+    "banner.html": """
+        <div class="banner">{{ text }}</div>
+        <style>.banner { color: red; }</style>
+    """,
+    "page.html": """
+        <script type="tempered/metadata">
+        imports:
+            Banner: banner.html
+        </script>
+        <t:styles></t:styles>
+        <t:if condition="SHOW_BANNER">
+            <t:Banner></t:Banner>
+        </t:if>
+        <main></main>
+    """,
+}
+
+
+def test_components_in_removed_branches_arent_used():
+    tempered = Tempered(generate_types=False, inline_threshold=0)
+    tempered.add_global("SHOW_BANNER", False, frozen=True)
+    tempered.add_from_mapping(BANNER_TEMPLATES)
+    assert tempered.render("page.html") == "<main></main>"
+    assert called_components(tempered, "page.html") == ()
+
+    tempered = Tempered(generate_types=False, inline_threshold=0)
+    tempered.add_global("SHOW_BANNER", True, frozen=True)
+    tempered.add_from_mapping(BANNER_TEMPLATES)
+    html = tempered.render("page.html", text="Sale")
+    assert "color:red" in html
+    assert 'class="banner' in html
+
+
+@pytest.mark.parametrize(
+    "expr",
+    [
+        "1 << 100000000",
+        "'a' * 100000000",
+        "(1,) * 100000000",
+        "10 ** 10000 * 10 ** 10000",
+        "'%0100000000d' % 1",
+        "f'{1:>100000000}'",
+    ],
+)
+def test_huge_values_arent_folded(expr: str):
+    render = build_template(f'<t:if condition="show">{{{{ {expr} }}}}</t:if>')
+    assert render(show=False) == ""
+
+
+def test_values_that_cant_be_rendered_fail_when_rendering():
+    render = build_template("{{ 10 ** 1000 }}{{ 1 << 100000 }}")
+    with pytest.raises(ValueError):
+        render()
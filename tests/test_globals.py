@@ -1,6 +1,7 @@
 from functools import partial
+import pytest
 import typing_extensions as t
-from tempered import Tempered
+from tempered import FrozenGlobalException, Tempered
 
 
 def build_template(
@@ -30,3 +31,43 @@ def test_globals_dont_override_locals():
     template = "{{ text }}"
     render = build_template(template, globals)
     assert render(**locals) == "Bar"
+
+
+def test_globals_are_accessible_in_loops():
+    globals = {"prefix": "#"}
+    template = """
+        <t:for for="x" in="range(3)">
+            {{ prefix }}{{ x }}
+        </t:for>
+    """
+    render = build_template(template, globals)
+    assert "#0" in render() and "#2" in render()
+
+
+def test_frozen_globals_are_compiled_as_constants():
+    tempered = Tempered(generate_types=False)
+    tempered.add_global("SITE_NAME", "Example")
+    tempered.add_from_string("test", "{{ SITE_NAME }}")
+    tempered.freeze_globals()
+
+    # Changing the underlying value has no effect once it's compiled in
+    tempered._module.get_globals()["SITE_NAME"] = "Changed"
+    assert tempered.render("test") == "Example"
+
+
+def test_frozen_globals_override_context():
+    tempered = Tempered(generate_types=False)
+    tempered.add_global("wrap", lambda value: f"<{value}>", frozen=True)
+    tempered.add_global("DEBUG", False, frozen=True)
+    tempered.add_from_string(
+        "test", "{{ wrap('a') }}<t:if condition='DEBUG'>debug</t:if>"
+    )
+    html = tempered.render("test", DEBUG=True, wrap=str)
+    assert html == "&lt;a&gt;"
+
+
+def test_frozen_globals_cant_be_changed():
+    tempered = Tempered(generate_types=False)
+    tempered.add_global("DEBUG", False, frozen=True)
+    with pytest.raises(FrozenGlobalException):
+        tempered.add_global("DEBUG", True)
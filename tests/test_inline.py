@@ -0,0 +1,100 @@
+import pytest
+from tempered import Tempered
+from tests import build_environment, called_components
+
+ICON = """
+<script type="tempered/metadata">
+parameters:
+    user:
+        type: dict
+</script>
+<img alt="{{ user['name'] }}" src="{{ prefix }}/{{ user['id'] }}.png">
+"""
+CARD = """
+<script type="tempered/metadata">
+imports:
+    Icon: icon.html
+parameters:
+    user:
+        type: dict
+    tags:
+        type: list
+        default: '[]'
+</script>
+<div>
+    <t:Icon user="user"></t:Icon>
+    <t:for for="tag" in="tags">
+        <t:if condition="tag">{{ tag }}</t:if>
+    </t:for>
+    {{ len(tags) }}
+</div>
+"""
+PAGE = """
+<script type="tempered/metadata">
+imports:
+    Card: card.html
+</script>
+<t:for for="user" in="users">
+    <t:Card user="user" tags="[user['name'], tag]"></t:Card>
+</t:for>
+{{ tag }}
+"""
+
+
+TEMPLATES = {"icon.html": ICON, "card.html": CARD, "page.html": PAGE}
+
+
+def build_pages(**options) -> Tempered:
+    tempered = build_environment(TEMPLATES, **options)
+    tempered.add_global("prefix", "/static")
+    return tempered
+
+
+@pytest.mark.parametrize("users", [[], [{"name": "<Ben>", "id": 1}] * 3])
+def test_inlined_components_render_the_same(users):
+    context = {"users": users, "tag": "tag"}
+    expected = build_pages(inline_threshold=0).render("page.html", **context)
+    html = build_pages().render("page.html", **context)
+    assert html == expected
+
+
+def test_small_components_are_inlined():
+    tempered = build_pages()
+    html = tempered.render("page.html", users=[{"name": "Ben", "id": 1}], tag="a")
+    assert html == '<div><img alt="Ben" src="/static/1.png"></img>Bena2</div>a'
+    assert called_components(tempered, "page.html") == ()
+
+
+def test_components_above_threshold_arent_inlined():
+    tempered = build_pages(inline_threshold=1)
+    assert called_components(tempered, "page.html") == ("card",)
+
+
+def test_inline_metadata_overrides_threshold():
+    tempered = build_environment(
+        {
+            "a.html": """
+                <script type="tempered/metadata">
+                inline: true
+                </script>
+                <b>A</b>
+            """,
+            "b.html": """
+                <script type="tempered/metadata">
+                inline: false
+                </script>
+                <b>B</b>
+            """,
+            "page.html": """
+                <script type="tempered/metadata">
+                imports:
+                    A: a.html
+                    B: b.html
+                </script>
+                <t:A></t:A><t:B></t:B>
+            """,
+        },
+        inline_threshold=0,
+    )
+    assert called_components(tempered, "page.html") == ("b",)
+    assert tempered.render("page.html") == "<b>A</b><b>B</b>"
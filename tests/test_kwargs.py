@@ -1,4 +1,5 @@
-from tests import build_template, build_templates
+import pytest
+from tests import build_environment, build_template, build_templates
 
 
 def test_variables_are_converted_to_kwargs():
@@ -68,3 +69,56 @@ def test_kwargs_loop_variable():
     html = func(items=items)
     for item in items:
         assert item in html
+
+
+def test_missing_variables_raise_when_used():
+    func = build_template("{{ missing.title }}")
+    with pytest.raises(RuntimeError, match="'missing' could not be resolved"):
+        func()
+
+
+def test_missing_variables_only_raise_if_used():
+    func = build_template(
+        """
+        <t:if condition="show">
+            {{ missing }}
+        </t:if>
+    """
+    )
+    assert func(show=False).strip() == ""
+    assert "TEMPERED" in func(show=True, missing="TEMPERED")
+
+
+@pytest.mark.parametrize(
+    "condition", ["missing is None", "missing is not None", "type(missing)"]
+)
+def test_missing_variables_raise_when_compared(condition: str):
+    func = build_template(f'<t:if condition="{condition}">A</t:if>')
+    with pytest.raises(RuntimeError, match="'missing' could not be resolved"):
+        func()
+
+
+def test_missing_variables_raise_when_passed_to_functions():
+    func = build_template("{{ describe(missing) }}")
+    with pytest.raises(RuntimeError, match="'missing' could not be resolved"):
+        func(describe=repr)
+
+
+def test_variables_are_resolved_when_first_used():
+    func = build_template(
+        """
+        <t:for for="x" in="range(3)">
+            <t:if condition="x == 2">{{ value }}</t:if>
+        </t:for>
+        """
+    )
+    assert func(value="A") == "A"
+    with pytest.raises(RuntimeError, match="'value' could not be resolved"):
+        func()
+
+
+def test_render_bytes():
+    tempered = build_environment({"user.html": "<p>{{ user }}</p>"})
+    html = tempered.render_bytes("user.html", user="<Zoë>")
+    assert html == "<p>&lt;Zoë&gt;</p>".encode()
+    assert html == tempered.render("user.html", user="<Zoë>").encode()
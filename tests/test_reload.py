@@ -0,0 +1,58 @@
+from pathlib import Path
+import pytest
+from tempered import InvalidTemplateException, Tempered
+
+PAGE = """
+<script type="tempered/metadata">
+layout: layout.html
+imports:
+    Component: component.html
+</script>
+<t:Component></t:Component>
+"""
+
+
+def build_folder(folder: Path, **options) -> Tempered:
+    folder.joinpath("layout.html").write_text("<title>A</title><t:slot></t:slot>")
+    folder.joinpath("component.html").write_text("<b>foo</b>")
+    folder.joinpath("page.html").write_text(PAGE)
+    folder.joinpath("other.html").write_text("<i>other</i>")
+    return Tempered(template_folder=folder, generate_types=False, **options)
+
+
+@pytest.mark.parametrize("inline_threshold", [0, 32])
+def test_reload_updates_dependents(tmp_path: Path, inline_threshold: int):
+    tempered = build_folder(tmp_path, inline_threshold=inline_threshold)
+    assert "<b>foo</b>" in tempered.render("page.html")
+
+    tmp_path.joinpath("component.html").write_text("<b>bar</b>")
+    tempered.reload("component.html")
+    assert "<b>bar</b>" in tempered.render("page.html")
+
+
+def test_reload_files_only_rebuilds_dependents(tmp_path: Path):
+    tempered = build_folder(tmp_path)
+
+    tmp_path.joinpath("layout.html").write_text("<title>B</title><t:slot></t:slot>")
+    tmp_path.joinpath("other.html").write_text("<i>changed</i>")
+    tempered.reload_files([tmp_path.joinpath("layout.html")])
+
+    assert tempered.render("page.html") == "<title>B</title><b>foo</b>"
+    assert tempered.render("other.html") == "<i>other</i>"
+
+
+def test_reload_files_adds_new_files(tmp_path: Path):
+    tempered = build_folder(tmp_path)
+    tmp_path.joinpath("new.html").write_text("<p>new</p>")
+    tempered.reload_files([tmp_path.joinpath("new.html")])
+    assert tempered.render("new.html") == "<p>new</p>"
+
+
+def test_invalid_reload_keeps_previous_templates(tmp_path: Path):
+    tempered = build_folder(tmp_path)
+
+    tmp_path.joinpath("layout.html").write_text("Not a layout anymore")
+    with pytest.raises(InvalidTemplateException):
+        tempered.reload("layout.html")
+
+    assert "<b>foo</b>" in tempered.render("page.html")
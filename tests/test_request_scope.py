@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import pytest
+from tests import build_environment
+
+USER = """
+<script type="tempered/metadata">
+parameters:
+    greeting: str
+</script>
+<p>{{ greeting }}:{{ user }}</p>
+"""
+PAGE = """
+<script type="tempered/metadata">
+imports:
+    User: user.html
+</script>
+<t:User greeting="'Hi'"></t:User>
+"""
+
+
+TEMPLATES = {"user.html": USER, "page.html": PAGE}
+
+
+def test_request_scope_is_used_by_components():
+    tempered = build_environment(TEMPLATES, inline_threshold=0)
+    with tempered.request_scope(user="Ben"):
+        assert tempered.render("page.html") == "<p>Hi:Ben</p>"
+
+    with pytest.raises(RuntimeError, match="'user' could not be resolved"):
+        tempered.render("page.html")
+
+
+def test_request_scope_is_used_with_explicit_props():
+    tempered = build_environment(TEMPLATES, inline_threshold=0, explicit_props=True)
+    with tempered.request_scope(user="Ben"):
+        assert tempered.render("page.html") == "<p>Hi:Ben</p>"
+
+
+def test_request_scope_priority():
+    tempered = build_environment(TEMPLATES, inline_threshold=0)
+    tempered.add_global("user", "Global")
+    assert tempered.render("page.html") == "<p>Hi:Global</p>"
+    with tempered.request_scope(user="Scope"):
+        assert tempered.render("page.html") == "<p>Hi:Scope</p>"
+        assert tempered.render("page.html", user="Context") == "<p>Hi:Context</p>"
+
+
+def test_request_scopes_can_be_nested():
+    tempered = build_environment(TEMPLATES, inline_threshold=0)
+    tempered.add_from_string("both", "{{ user }}:{{ locale }}")
+    with tempered.request_scope(user="Ben", locale="en"):
+        with tempered.request_scope(locale="fr"):
+            assert tempered.render("both") == "Ben:fr"
+
+        assert tempered.render("both") == "Ben:en"
+
+
+def test_request_scope_is_per_thread():
+    tempered = build_environment(TEMPLATES, inline_threshold=0)
+    html = []
+
+    def render():
+        try:
+            tempered.render("page.html")
+        except RuntimeError:
+            html.append("Not in scope")
+
+        with tempered.request_scope(user="Thread"):
+            html.append(tempered.render("page.html"))
+
+    with tempered.request_scope(user="Main"):
+        thread = threading.Thread(target=render)
+        thread.start()
+        thread.join()
+        assert tempered.render("page.html") == "<p>Hi:Main</p>"
+
+    assert html == ["Not in scope", "<p>Hi:Thread</p>"]
+
+
+def test_request_scope_is_per_task():
+    tempered = build_environment(TEMPLATES, inline_threshold=0)
+
+    async def render(user: str) -> str:
+        with tempered.request_scope(user=user):
+            await asyncio.sleep(0)  # Let the other task enter it's scope
+            return tempered.render("page.html")
+
+    async def main():
+        return await asyncio.gather(render("A"), render("B"))
+
+    assert asyncio.run(main()) == ["<p>Hi:A</p>", "<p>Hi:B</p>"]
@@ -0,0 +1,21 @@
+import traceback
+import pytest
+from tempered import Tempered
+
+
+def test_generated_source_shown_in_traceback_when_kept():
+    tempered = Tempered(keep_source=True)
+    tempered.add_from_string("main", "{{ 1 / value }}")
+
+    with pytest.raises(ZeroDivisionError) as exc_info:
+        tempered.render("main", value=0)
+
+    err = exc_info.value
+    stack = traceback.format_exception(type(err), err, err.__traceback__)
+    assert any("1 / " in frame for frame in stack)
+
+
+def test_templates_render_without_source():
+    tempered = Tempered()
+    tempered.add_from_string("main", "<t:for for='x' in='range(3)'>{{ x }}</t:for>")
+    assert tempered.render("main") == "012"
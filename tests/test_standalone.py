@@ -0,0 +1,124 @@
+import io
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+from tempered import Tempered
+from tempered.src import types
+from tempered.src.cli import main
+
+COMPONENT = """
+<script type="tempered/metadata">
+parameters:
+    text: str
+</script>
+<b>{{ text }}</b>
+<style>b { color: red; }</style>
+"""
+PAGE = """
+<script type="tempered/metadata">
+imports:
+    Component: component.html
+</script>
+<t:Component text="'<foo>'"></t:Component>
+{{ SITE_NAME }}
+"""
+
+
+def test_exported_module_renders_like_tempered(tmp_path: Path):
+    tempered = Tempered(generate_types=False)
+    tempered.add_from_mapping({"component.html": COMPONENT, "page.html": PAGE})
+    tempered.add_global("SITE_NAME", "Tempered")
+
+    output = tmp_path.joinpath("compiled.py")
+    tempered.export_module(output)
+
+    namespace: dict = {}
+    exec(output.read_text(), namespace)
+    namespace["add_global"]("SITE_NAME", "Tempered")
+    assert namespace["render"]("page.html") == tempered.render("page.html")
+    assert namespace["render_bytes"]("page.html") == tempered.render_bytes(
+        "page.html"
+    )
+
+    writer = io.StringIO()
+    namespace["render_into"](writer, "page.html")
+    assert writer.getvalue() == tempered.render("page.html")
+
+
+def test_exported_module_has_request_scope(tmp_path: Path):
+    tempered = Tempered(generate_types=False)
+    tempered.add_from_string("user", "<p>{{ user }}</p>")
+
+    output = tmp_path.joinpath("compiled.py")
+    tempered.export_module(output)
+
+    namespace: dict = {}
+    exec(output.read_text(), namespace)
+    with namespace["request_scope"](user="Ben"):
+        assert namespace["render"]("user") == "<p>Ben</p>"
+
+
+def test_build_command_output_doesnt_import_tempered(tmp_path: Path):
+    templates = tmp_path.joinpath("templates")
+    templates.mkdir()
+    templates.joinpath("component.html").write_text(COMPONENT)
+    templates.joinpath("page.html").write_text(PAGE)
+
+    main(["build", str(templates), "-o", str(tmp_path.joinpath("compiled.py"))])
+
+    script = (
+        "import sys\n"
+        "for name in ('tempered', 'bs4', 'strictyaml', 'tinycss2', 'minify_html'):\n"
+        "    sys.modules[name] = None\n"
+        "import compiled\n"
+        "compiled.add_global('SITE_NAME', 'Tempered')\n"
+        "print(compiled.render('page.html'))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=tmp_path,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert "&lt;foo&gt;" in result.stdout
+    assert "Tempered" in result.stdout
+
+
+def test_build_command_passes_compiler_options(tmp_path: Path):
+    templates = tmp_path.joinpath("templates")
+    templates.mkdir()
+    templates.joinpath("list.html").write_text(
+        '<t:for for="i" in="range(3)"><p>{{ i }}</p></t:for>'
+    )
+    output = tmp_path.joinpath("compiled.py")
+    main(["build", str(templates), "-o", str(output)])
+
+    namespace: dict = {}
+    exec(output.read_text(), namespace)
+    assert namespace["render"]("list.html") == "<p>0</p><p>1</p><p>2</p>"
+    with pytest.raises(RuntimeError, match="streaming"):
+        namespace["render_stream"]("list.html")
+
+    options = ["--streaming", "--stream-chunk-size", "1", "--accumulator", "join"]
+    main(["build", str(templates), "-o", str(output), *options])
+
+    namespace = {}
+    exec(output.read_text(), namespace)
+    chunks = list(namespace["render_stream"]("list.html"))
+    assert chunks == ["<p>0</p>", "<p>1</p>", "<p>2</p>"]
+
+
+def test_build_command_keeps_type_declarations(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    changes = []
+    monkeypatch.setattr(types, "build_types", lambda _: changes.append("build"))
+    monkeypatch.setattr(types, "clear_types", lambda: changes.append("clear"))
+
+    templates = tmp_path.joinpath("templates")
+    templates.mkdir()
+    templates.joinpath("page.html").write_text("<p>Page</p>")
+    main(["build", str(templates), "-o", str(tmp_path.joinpath("compiled.py"))])
+    assert changes == []
@@ -0,0 +1,394 @@
+import io
+import importlib.util
+from pathlib import Path
+import threading
+import time
+import pytest
+import tempered
+from tempered import Tempered
+from tests import build_environment
+
+ROW = """
+<script type="tempered/metadata">
+parameters:
+    item: str
+</script>
+<li>{{ item }}</li>
+"""
+LIST = """
+<script type="tempered/metadata">
+imports:
+    Row: row.html
+parameters:
+    items: list
+</script>
+<ul><t:for for="item" in="items"><t:Row item="item"></t:Row></t:for></ul>
+"""
+LAYOUT = """
+<title><t:slot name="title"></t:slot></title><main><t:slot></t:slot></main>
+"""
+PAGE = """
+<script type="tempered/metadata">
+layout: layout.html
+imports:
+    List: list.html
+parameters:
+    items: list
+</script>
+<t:block name="title">Page</t:block>
+<t:List items="items"></t:List>
+"""
+ITEMS = [f"Item {i}" for i in range(100)]
+
+
+TEMPLATES = {
+    "row.html": ROW,
+    "list.html": LIST,
+    "layout.html": LAYOUT,
+    "page.html": PAGE,
+}
+
+
+def build_pages(**options) -> Tempered:
+    options.setdefault("streaming", True)
+    return build_environment(TEMPLATES, inline_threshold=0, **options)
+
+
+@pytest.mark.parametrize(
+    "name, context",
+    [
+        ("row.html", {"item": "<Item>"}),
+        ("list.html", {"items": ITEMS}),
+        ("page.html", {"items": ITEMS}),
+    ],
+)
+def test_stream_matches_render(name: str, context: dict):
+    tempered = build_pages()
+    chunks = list(tempered.render_stream(name, **context))
+    assert "".join(chunks) == tempered.render(name, **context)
+
+
+def test_stream_chunk_size():
+    tempered = build_pages(stream_chunk_size=100)
+    chunks = list(tempered.render_stream("list.html", items=ITEMS))
+    assert len(chunks) > 1
+    assert all(len(chunk) >= 100 for chunk in chunks[:-1])
+
+
+def test_stream_is_lazy():
+    tempered = build_pages(stream_chunk_size=1)
+
+    def items():
+        yield "First"
+        raise ValueError("The first chunk was sent before the second item")
+
+    chunks = tempered.render_stream("list.html", items=items())
+    assert next(chunks) == "<ul><li>First</li>"
+    with pytest.raises(ValueError):
+        next(chunks)
+
+
+def test_layout_is_sent_before_content():
+    tempered = build_pages()
+
+    def items():
+        yield "First"
+        raise ValueError("The content was rendered before the layout was sent")
+
+    chunks = tempered.render_stream("page.html", items=items())
+    assert next(chunks) == "<title>"
+    with pytest.raises(ValueError):
+        next(chunks)
+
+
+def test_page_content_is_streamed_through_layout():
+    tempered = build_pages(stream_chunk_size=20)
+
+    def items():
+        yield "First"
+        raise ValueError("The page was rendered before it's content was sent")
+
+    chunks = tempered.render_stream("page.html", items=items())
+    assert next(chunks) == "<title>"
+    assert next(chunks) == "Page</title><main><ul><li>First</li>"
+    with pytest.raises(ValueError):
+        next(chunks)
+
+
+def test_blocks_after_the_default_slot_are_streamed():
+    tempered = build_pages(stream_chunk_size=1)
+    tempered.add_from_mapping(
+        {
+            "footer_layout.html": """
+                <main><t:slot></t:slot></main>
+                <footer><t:slot name="footer">Footer</t:slot></footer>
+            """,
+            "footer.html": """
+                <script type="tempered/metadata">
+                layout: footer_layout.html
+                </script>
+                <p>{{ a }}</p><t:flush/><p>{{ b }}</p>
+                <t:block name="footer">{{ a }}</t:block>
+            """,
+        }
+    )
+    chunks = list(tempered.render_stream("footer.html", a="A", b="B"))
+    assert chunks == ["<main>", "<p>A</p>", "<p>B</p>", "</main><footer>A", "</footer>"]
+    assert "".join(chunks) == tempered.render("footer.html", a="A", b="B")
+
+
+def test_styles_are_sent_before_content():
+    tempered = build_pages()
+    tempered.add_from_mapping(
+        {
+            "layout.html": "<head><t:styles/></head><main><t:slot></t:slot></main>",
+            "page.html": """
+                <script type="tempered/metadata">
+                layout: layout.html
+                </script>
+                <p>{{ text }}</p>
+                <style>p { color: red; }</style>
+            """,
+        }
+    )
+    head, *rest = tempered.render_stream("page.html", text="Text")
+    assert head.startswith("<style>") and head.endswith("</style>")
+    assert "Text</p></main>" in "".join(rest)
+
+
+def test_flush_tag():
+    tempered = build_pages()
+    tempered.add_from_string("flush.html", "<p>{{ a }}</p><t:flush/><p>{{ b }}</p>")
+    chunks = list(tempered.render_stream("flush.html", a="A", b="B"))
+    assert chunks == ["<p>A</p>", "<p>B</p>"]
+    assert tempered.render("flush.html", a="A", b="B") == "<p>A</p><p>B</p>"
+
+
+def test_streamed_content_can_assign_parameters():
+    tempered = build_pages()
+    tempered.add_from_string(
+        "upper.html",
+        """
+        <script type="tempered/metadata">
+        layout: layout.html
+        parameters:
+            items: list
+        </script>
+        <t:block name="title">Upper</t:block>
+        <script type="tempered/python">items = [item.upper() for item in items]</script>
+        <t:for for="item" in="items">{{ item }}:</t:for>
+        """,
+    )
+    html = "".join(tempered.render_stream("upper.html", items=["a", "b"]))
+    assert html == "<title>Upper</title><main>A:B:</main>"
+
+
+DEFER = """
+<script type="tempered/metadata">
+parameters:
+    items: list
+</script>
+<t:for for="item" in="items">
+    <h2>{{ item }}</h2>
+    <t:defer timeout="timeout">
+        <p>{{ load(item) }}</p>
+        <t:placeholder>Loading</t:placeholder>
+        <t:fallback>Failed</t:fallback>
+    </t:defer>
+</t:for>
+<footer>{{ release() }}</footer>
+"""
+
+
+def render_deferred(load, items=("a", "b"), timeout=5) -> list:
+    tempered = build_pages()
+    tempered.add_from_string("defer.html", DEFER)
+    return list(
+        tempered.render_stream(
+            "defer.html",
+            items=list(items),
+            load=load,
+            timeout=timeout,
+            release=lambda: "",
+        )
+    )
+
+
+def test_deferred_blocks_are_sent_after_the_page():
+    page, *deferred = render_deferred(lambda item: item.upper())
+    assert page == (
+        '<h2>a</h2><t-defer id="t-defer-0">Loading</t-defer>'
+        '<h2>b</h2><t-defer id="t-defer-1">Loading</t-defer>'
+        "<footer></footer>"
+    )
+    assert len(deferred) == 2
+    assert all("<script>" in html for html in deferred)
+    assert sorted(html.split("</template>")[0] for html in deferred) == [
+        '<template id="t-defer-0-content"><p>A</p>',
+        '<template id="t-defer-1-content"><p>B</p>',
+    ]
+
+
+def test_deferred_blocks_render_while_the_page_streams():
+    released = threading.Event()
+    tempered = build_pages()
+    tempered.add_from_string("defer.html", DEFER)
+
+    def load(item: str) -> str:
+        return "Released" if released.wait(timeout=5) else "Blocked"
+
+    def release() -> str:
+        released.set()
+        return ""
+
+    chunks = tempered.render_stream(
+        "defer.html", items=["a"], load=load, release=release, timeout=None
+    )
+    assert "<p>Released</p>" in "".join(chunks)
+
+
+def test_deferred_block_fallback():
+    def load(item: str) -> str:
+        if item == "slow":
+            time.sleep(0.5)
+        return item
+
+    page, *deferred = render_deferred(load, items=["slow", "fast"], timeout=0.1)
+    fast, slow = deferred
+    assert '<template id="t-defer-1-content"><p>fast</p></template>' in fast
+    assert '<template id="t-defer-0-content">Failed</template>' in slow
+
+
+def test_failed_deferred_block_sends_fallback(caplog: pytest.LogCaptureFixture):
+    def load(item: str) -> str:
+        if item == "b":
+            raise ValueError("Failed to load")
+        return item
+
+    page, *deferred = render_deferred(load)
+    assert '<template id="t-defer-0-content"><p>a</p></template>' in "".join(deferred)
+    assert '<template id="t-defer-1-content">Failed</template>' in "".join(deferred)
+    assert "t-defer-1 failed" in caplog.text
+
+
+def test_failed_deferred_block_without_fallback_raises():
+    tempered = build_pages()
+    tempered.add_from_string(
+        "boom.html", "<main></main><t:defer>{{ boom() }}</t:defer>"
+    )
+
+    def boom():
+        raise ValueError("Failed to load")
+
+    chunks = tempered.render_stream("boom.html", boom=boom)
+    assert next(chunks).startswith("<main></main>")
+    with pytest.raises(ValueError):
+        next(chunks)
+
+
+def test_deferred_blocks_are_rendered_in_place_by_render():
+    tempered = build_pages()
+    tempered.add_from_string("defer.html", DEFER)
+    html = tempered.render(
+        "defer.html",
+        items=["a"],
+        load=str.upper,
+        timeout=5,
+        release=lambda: "",
+    )
+    assert html == "<h2>a</h2><p>A</p><footer></footer>"
+
+
+def test_fallback_must_be_in_defer():
+    with pytest.raises(tempered.ParserException, match="t:defer"):
+        build_pages().add_from_string("fallback.html", "<t:fallback>A</t:fallback>")
+
+
+def test_stream_keeps_request_scope():
+    tempered = build_pages()
+    tempered.add_from_string("user.html", "<p>{{ user }}</p>")
+    with tempered.request_scope(user="Ben"):
+        chunks = tempered.render_stream("user.html")
+
+    assert list(chunks) == ["<p>Ben</p>"]
+
+
+def test_stream_requires_streaming():
+    tempered = build_pages(streaming=False)
+    with pytest.raises(RuntimeError, match="streaming"):
+        tempered.render_stream("list.html", items=ITEMS)
+
+
+def test_standalone_module_streams(tmp_path: Path):
+    file = tmp_path / "stream_templates.py"
+    build_pages().export_module(file)
+
+    spec = importlib.util.spec_from_file_location("stream_templates", file)
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    chunks = list(module.render_stream("page.html", items=ITEMS))
+    assert "".join(chunks) == build_pages().render("page.html", items=ITEMS)
+
+
+@pytest.mark.parametrize("streaming", [True, False])
+def test_render_into(streaming: bool):
+    tempered = build_pages(streaming=streaming, stream_chunk_size=100)
+    writer = io.StringIO()
+    tempered.render_into(writer, "page.html", items=ITEMS)
+    assert writer.getvalue() == tempered.render("page.html", items=ITEMS)
+
+
+def test_render_into_writes_chunks():
+    tempered = build_pages(stream_chunk_size=100)
+    writes = []
+
+    class Writer:
+        def write(self, html: str):
+            writes.append(html)
+
+    tempered.render_into(Writer(), "list.html", items=ITEMS)
+    assert len(writes) > 1
+    assert "".join(writes) == tempered.render("list.html", items=ITEMS)
+
+
+def test_timed_out_deferred_blocks_stop_at_the_next_loop():
+    loaded = []
+
+    def load(item: str) -> str:
+        time.sleep(0.2)
+        loaded.append(item)
+        return item
+
+    tempered = build_pages()
+    tempered.add_from_string(
+        "slow.html",
+        """
+        <t:defer timeout="0.05">
+            <t:for for="item" in="items">{{ load(item) }}</t:for>
+            <t:fallback>Failed</t:fallback>
+        </t:defer>
+        """,
+    )
+    chunks = list(tempered.render_stream("slow.html", items=["a", "b"], load=load))
+    assert '<template id="t-defer-0-content">Failed</template>' in chunks[-1]
+    time.sleep(0.4)
+    assert loaded == ["a"]
+
+
+def test_deferred_blocks_use_the_csp_nonce():
+    tempered = build_pages()
+    tempered.add_from_string("nonce.html", "<t:defer>Content</t:defer>")
+    with tempered.request_scope(csp_nonce='"abc'):
+        chunks = tempered.render_stream("nonce.html")
+
+    _, deferred = chunks
+    assert '<script nonce="&#34;abc">' in deferred
+
+
+def test_thread_pool_is_only_created_by_deferred_blocks():
+    tempered = build_pages()
+    assert tempered._module.module.__dict__["__defer_executor"] is None
+    list(tempered.render_stream("row.html", item="Item"))
+    assert tempered._module.module.__dict__["__defer_executor"] is None
@@ -11,16 +11,38 @@ def test(name: str):
     return wrapper
 
 
-def build_template(template: str) -> Callable:
-    env = tempered.Tempered()
+def build_template(template: str, **options: t.Any) -> Callable:
+    env = tempered.Tempered(**options)
     env.add_from_string("main", template)
     return partial(env.render, "main")
 
 
-def build_templates(template: str, *other_templates: t.Tuple[str, str]) -> Callable:
-    env = tempered.Tempered()
+def build_templates(
+    template: str,
+    *other_templates: t.Tuple[str, str],
+    **options: t.Any,
+) -> Callable:
+    env = tempered.Tempered(**options)
 
     templates = {name: body for (name, body) in other_templates}
     templates["main"] = template
     env.add_from_mapping(templates)
     return partial(env.render, "main")
+
+
+def build_environment(
+    templates: t.Mapping[str, str] = {},
+    **options: t.Any,
+) -> tempered.Tempered:
+    "Build templates for tests that use more than `render`"
+    options.setdefault("generate_types", False)
+    env = tempered.Tempered(**options)
+    env.add_from_mapping(dict(templates))
+    return env
+
+
+def called_components(env: tempered.Tempered, name: str) -> t.Tuple[str, ...]:
+    "The components a template calls, instead of inlining or rendering them"
+    # Components are linked as closure variables
+    func = env._module.get_template_func(name)
+    return func.__code__.co_freevars